@@ -21,6 +21,7 @@
 
 
 # standard library imports
+import os
 import time
 import logging
 
@@ -28,7 +29,10 @@ import logging
 
 # library specific imports
 import src.wppage
+import src.wpmongo
 import src.wpconfig
+import src.wplocalization
+import src.wpregistry
 import src.wpxmlparser
 import src.wpmultiprocessor
 import src.wpmarkupparser.parser
@@ -46,7 +50,8 @@ def _get_templates(pages):
         for revision in page["revision"]:
             template = src.wppage.Template(
                 title, pageid, redirect,
-                revision["id"], revision["text"]["text"]
+                revision["id"], revision["text"]["text"],
+                parentid=revision["parentid"], sha1=revision["sha1"]
             )
             yield template
 
@@ -63,23 +68,29 @@ def _get_articles(pages):
         for revision in page["revision"]:
             article = src.wppage.Article(
                 title, pageid, redirect,
-                revision["id"], revision["text"]["text"]
+                revision["id"], revision["text"]["text"],
+                parentid=revision["parentid"], sha1=revision["sha1"]
             )
             yield article
 
 
-def process_templates(args, config, pages, localization=None):
+def process_templates(
+        args, config, pages, localization=None, registry=None
+):
     """Process templates.
 
     :param Namespace args: args
     :param ConfigParser config: config
     :param generator pages: template pages
+    :param LocalizationProfile localization: localization profile
+    :param TemplateRegistry registry: template registry
     """
     try:
         logger = logging.getLogger()
         templates = _get_templates(pages)
         multiprocessor = src.wpmultiprocessor.TemplateMultiprocessor(
-            args, config, templates, localization=localization
+            args, config, templates,
+            localization=localization, registry=registry
         )
         multiprocessor.process()
     except Exception:
@@ -88,19 +99,23 @@ def process_templates(args, config, pages, localization=None):
     return
 
 
-def process_articles(args, config, pages, localization=None):
+def process_articles(
+        args, config, pages, localization=None, registry=None
+):
     """Process articles.
 
     :param Namespace args: args
     :param ConfigParser config: config
     :param generator pages: article pages
-    :param ConfigParser localization: localization
+    :param LocalizationProfile localization: localization profile
+    :param TemplateRegistry registry: template registry
     """
     try:
         logger = logging.getLogger()
         articles = _get_articles(pages)
         multiprocessor = src.wpmultiprocessor.ArticleMultiprocessor(
-            args, config, articles, localization=localization
+            args, config, articles,
+            localization=localization, registry=registry
         )
         multiprocessor.process()
     except Exception:
@@ -109,6 +124,62 @@ def process_articles(args, config, pages, localization=None):
     return
 
 
+def _get_wpmongo(config):
+    """Connect to mongoDB (main process).
+
+    :param ConfigParser config: config
+
+    :returns: mongoDB interface
+    :rtype: WPMongo
+    """
+    wpmongo = src.wpmongo.WPMongo(
+        os.getpid(),
+        config["mongoDB"]["db"],
+        config["mongoDB"]["host"],
+        config["mongoDB"].getint("port"),
+        config["mongoDB"]["username"],
+        config["mongoDB"]["password"],
+        client_options=src.wpmongo.get_client_options(config["mongoDB"]),
+        **src.wpmongo.get_retry_options(config["mongoDB"])
+    )
+    return wpmongo
+
+
+def drop_indexes(args, config):
+    """Drop secondary indexes (before bulk loading).
+
+    Indexes needed while loading are kept: those on page IDs in upsert
+    mode and the one on titles if templates are expanded.
+
+    :param Namespace args: args
+    :param ConfigParser config: config
+    """
+    keep = set()
+    if args.upsert:
+        keep.update([("inclusion", "WP_page_id"), ("IWL", "WP_page_id")])
+    if args.expand:
+        keep.add(("article", "title"))
+    wpmongo = _get_wpmongo(config)
+    try:
+        wpmongo.drop_indexes(keep=frozenset(keep))
+    finally:
+        wpmongo.close()
+    return
+
+
+def build_indexes(config):
+    """Build secondary indexes (after loading).
+
+    :param ConfigParser config: config
+    """
+    wpmongo = _get_wpmongo(config)
+    try:
+        wpmongo.build_indexes()
+    finally:
+        wpmongo.close()
+    return
+
+
 def main():
     """main function."""
     try:
@@ -153,21 +224,58 @@ def main():
             "falling back to default content language (%s)", lang
         )
     logger.info("got XML file content language (%s)", lang)
+    logger.info("get XML file %s siteinfo", args.xml)
+    try:
+        # get XML file namespaces and case rules
+        siteinfo = wpxmlparser.find_siteinfo()
+        name = siteinfo["dbname"] or lang
+    except Exception:
+        logger.warning("failed to get XML file %s siteinfo", args.xml)
+        siteinfo = None
+        name = lang
     logger.info("get localization (%s)", lang)
-    if lang == "en":
+    file_ = src.wpconfig.LOCALIZATION.format(lang)
+    if lang == "en" or not os.path.exists(file_):
+        file_ = None
+    try:
+        # get (precompiled) localization profile
+        localization = src.wplocalization.load_profile(
+            file_,
+            cache=src.wpconfig.LOCALIZATION_PROFILE.format(name),
+            siteinfo=siteinfo
+        )
+    except Exception:
+        logger.warning("failed to get localization (%s)", lang)
+        lang = "en"
         localization = None
-    else:
+        logger.warning("falling back to default localization (%s)", lang)
+    logger.info("got localization (%s)", lang)
+    registry = None
+    if args.templates:
+        registry = src.wpregistry.TemplateRegistry(localization=localization)
+    elif args.registry and os.path.exists(args.registry):
+        logger.info("load template registry %s", args.registry)
         try:
-            # get localization
-            localization = src.wpconfig.get_localization(
-                src.wpconfig.LOCALIZATION.format(lang)
+            registry = src.wpregistry.TemplateRegistry.load(
+                args.registry, localization=localization
             )
         except Exception:
-            logger.warning("failed to get localization (%s)", lang)
-            lang = "en"
-            localization = None
-            logger.warning("falling back to default localization (%s)", lang)
-    logger.info("got localization (%s)", lang)
+            logger.warning(
+                "failed to load template registry %s", args.registry
+            )
+        else:
+            logger.info(
+                "loaded template registry %s (%d templates)",
+                args.registry, len(registry)
+            )
+    if args.bulk_load:
+        logger.info("drop secondary indexes")
+        try:
+            drop_indexes(args, config)
+        except Exception:
+            logger.exception("failed to drop secondary indexes")
+            raise SystemExit
+        logger.info("dropped secondary indexes")
     if args.templates:
         logger.info("process templates")
         time0 = time.time()
@@ -182,12 +290,24 @@ def main():
             logger.warning("failed to find template pages")
             raise SystemExit
         try:
-            process_templates(args, config, pages)
+            process_templates(args, config, pages, registry=registry)
         except Exception:
             logger.exception("failed to process templates")
             raise SystemExit
         time1 = time.time() - time0
         logger.info("processed templates in %f sec", time1)
+        if args.registry:
+            try:
+                registry.save(args.registry)
+            except Exception:
+                logger.warning(
+                    "failed to save template registry %s", args.registry
+                )
+            else:
+                logger.info(
+                    "saved template registry %s (%d templates)",
+                    args.registry, len(registry)
+                )
     logger.info("process articles")
     time0 = time.time()
     try:
@@ -202,13 +322,23 @@ def main():
         raise SystemExit
     try:
         process_articles(
-            args, config, pages, localization=localization
+            args, config, pages, localization=localization, registry=registry
         )
     except Exception:
         logger.exception("failed to process articles")
         raise SystemExit
     time1 = time.time() - time0
     logger.info("processed articles in %f sec", time1)
+    if args.bulk_load:
+        logger.info("build secondary indexes")
+        time0 = time.time()
+        try:
+            build_indexes(config)
+        except Exception:
+            logger.exception("failed to build secondary indexes")
+            raise SystemExit
+        time1 = time.time() - time0
+        logger.info("built secondary indexes in %f sec", time1)
     return
 
 
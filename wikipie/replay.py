@@ -0,0 +1,83 @@
+#    WikiPie 0.x
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Replay routine, reinserts records of dead-letter files.
+"""
+
+
+# standard library imports
+import os
+import logging
+
+# third party imports
+
+# library specific imports
+import src.wpmongo
+import src.wpconfig
+
+
+def main():
+    """main function."""
+    try:
+        src.wpconfig.get_logging_config()
+    except Exception:
+        print("failed to get logging configuration")
+        raise SystemExit
+    logger = logging.getLogger()
+    try:
+        config = src.wpconfig.get_config()
+    except Exception:
+        logger.exception("failed to get configuration")
+        raise SystemExit
+    try:
+        args = src.wpconfig.get_replay_args()
+    except Exception:
+        raise SystemExit
+    try:
+        wpmongo = src.wpmongo.WPMongo(
+            os.getpid(),
+            config["mongoDB"]["db"],
+            config["mongoDB"]["host"],
+            config["mongoDB"].getint("port"),
+            config["mongoDB"]["username"],
+            config["mongoDB"]["password"],
+            upsert=args.upsert,
+            client_options=src.wpmongo.get_client_options(config["mongoDB"]),
+            **src.wpmongo.get_retry_options(config["mongoDB"])
+        )
+    except Exception:
+        logger.exception("failed to connect to mongoDB")
+        raise SystemExit
+    logger.info("replay dead-letter files (%s)", wpmongo.dead_letter)
+    try:
+        count = wpmongo.replay()
+    except Exception:
+        logger.exception("failed to replay dead-letter files")
+        raise SystemExit
+    finally:
+        wpmongo.close()
+    logger.info(
+        "replayed %d records (%d failed, %d spooled again)",
+        count, wpmongo.errors, wpmongo.spooled
+    )
+    return
+
+
+if __name__ == "__main__":
+    main()
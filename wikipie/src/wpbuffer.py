@@ -0,0 +1,261 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Record buffer module, provides column-oriented record buffers.
+
+Workers buffer the links and inclusions of many pages before a bulk
+insert. Instead of one dictionary per record, the buffers keep one
+integer array per field; strings (covered texts, targets, templates,
+argument names and values) are stored once in a string table and
+referred to by ID. Records are only assembled when the buffer is
+flushed.
+"""
+
+
+# standard library imports
+import array
+
+# third party imports
+
+# library specific imports
+
+
+class StringTable(object):
+    """String table.
+
+    :ivar list strings: strings (by ID)
+    :ivar dict ids: IDs (by string)
+    """
+
+    def __init__(self):
+        """Initialize string table."""
+        self.strings = []
+        self.ids = {}
+        return
+
+    def __len__(self):
+        """Get number of strings.
+
+        :returns: number of strings
+        :rtype: int
+        """
+        return len(self.strings)
+
+    def __getitem__(self, id_):
+        """Get string.
+
+        :param int id_: ID
+
+        :returns: string
+        :rtype: str
+        """
+        return self.strings[id_]
+
+    def get_id(self, string):
+        """Get ID of string (adding it if necessary).
+
+        :param str string: string
+
+        :returns: ID
+        :rtype: int
+        """
+        try:
+            return self.ids[string]
+        except KeyError:
+            pass
+        id_ = len(self.strings)
+        self.strings.append(string)
+        self.ids[string] = id_
+        return id_
+
+    def clear(self):
+        """Clear string table."""
+        self.strings = []
+        self.ids = {}
+        return
+
+
+class LinkBuffer(object):
+    """Column-oriented link buffer.
+
+    :ivar StringTable strings: string table
+    :ivar array pageids: page IDs
+    :ivar array starts: start locations
+    :ivar array ends: end locations
+    :ivar array covered_texts: covered text IDs
+    :ivar array targets: target IDs
+    """
+
+    def __init__(self, strings=None):
+        """Initialize link buffer.
+
+        :param StringTable strings: string table (shared with other
+            buffers)
+        """
+        self.strings = strings if strings is not None else StringTable()
+        self.clear()
+        return
+
+    def __len__(self):
+        """Get number of links.
+
+        :returns: number of links
+        :rtype: int
+        """
+        return len(self.pageids)
+
+    def append(self, pageid, link_):
+        """Append link.
+
+        :param int pageid: page ID
+        :param dict link_: link
+        """
+        self.pageids.append(pageid)
+        self.starts.append(link_["start_doc"])
+        self.ends.append(link_["end_doc"])
+        self.covered_texts.append(self.strings.get_id(link_["covered_text"]))
+        self.targets.append(self.strings.get_id(link_["target"]))
+        return
+
+    def extend(self, pageid, links):
+        """Append links.
+
+        :param int pageid: page ID
+        :param list links: links
+        """
+        for link_ in links:
+            self.append(pageid, link_)
+        return
+
+    def __iter__(self):
+        """Iterate over links.
+
+        :returns: page ID, covered text, target, start and end location
+        :rtype: generator
+        """
+        strings = self.strings.strings
+        for pageid, covered_text, target, start, end in zip(
+                self.pageids, self.covered_texts, self.targets,
+                self.starts, self.ends
+        ):
+            yield pageid, strings[covered_text], strings[target], start, end
+        return
+
+    def clear(self):
+        """Clear link buffer (not the string table)."""
+        self.pageids = array.array("q")
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.covered_texts = array.array("q")
+        self.targets = array.array("q")
+        return
+
+
+class InclusionBuffer(object):
+    """Column-oriented inclusion buffer.
+
+    Arguments of all inclusions are stored in two flat arrays (name and
+    value IDs), the arguments of an inclusion start at its argument
+    offset.
+
+    :ivar StringTable strings: string table
+    :ivar array pageids: page IDs
+    :ivar array starts: start locations
+    :ivar array ends: end locations
+    :ivar array templates: template IDs
+    :ivar array arg_offsets: argument offsets
+    :ivar array arg_names: argument name IDs
+    :ivar array arg_values: argument value IDs
+    """
+
+    def __init__(self, strings=None):
+        """Initialize inclusion buffer.
+
+        :param StringTable strings: string table (shared with other
+            buffers)
+        """
+        self.strings = strings if strings is not None else StringTable()
+        self.clear()
+        return
+
+    def __len__(self):
+        """Get number of inclusions.
+
+        :returns: number of inclusions
+        :rtype: int
+        """
+        return len(self.pageids)
+
+    def append(self, pageid, inclusion):
+        """Append inclusion.
+
+        :param int pageid: page ID
+        :param dict inclusion: inclusion
+        """
+        self.pageids.append(pageid)
+        self.starts.append(inclusion["start_doc"])
+        self.ends.append(inclusion["end_doc"])
+        self.templates.append(self.strings.get_id(inclusion["template"]))
+        self.arg_offsets.append(len(self.arg_names))
+        for name, value in inclusion["args"].items():
+            self.arg_names.append(self.strings.get_id(name))
+            self.arg_values.append(self.strings.get_id(value))
+        return
+
+    def extend(self, pageid, inclusions):
+        """Append inclusions.
+
+        :param int pageid: page ID
+        :param list inclusions: inclusions
+        """
+        for inclusion in inclusions:
+            self.append(pageid, inclusion)
+        return
+
+    def __iter__(self):
+        """Iterate over inclusions.
+
+        :returns: page ID, template, arguments, start and end location
+        :rtype: generator
+        """
+        strings = self.strings.strings
+        offsets = self.arg_offsets.tolist() + [len(self.arg_names)]
+        for i, (pageid, template, start, end) in enumerate(zip(
+                self.pageids, self.templates, self.starts, self.ends
+        )):
+            args = {
+                strings[name]: strings[value]
+                for name, value in zip(
+                    self.arg_names[offsets[i]:offsets[i+1]],
+                    self.arg_values[offsets[i]:offsets[i+1]]
+                )
+            }
+            yield pageid, strings[template], args, start, end
+        return
+
+    def clear(self):
+        """Clear inclusion buffer (not the string table)."""
+        self.pageids = array.array("q")
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.templates = array.array("q")
+        self.arg_offsets = array.array("q")
+        self.arg_names = array.array("q")
+        self.arg_values = array.array("q")
+        return
@@ -0,0 +1,240 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Parse cache module, handles the on-disk parse cache.
+
+Parsed pages are stored in an SQLite database keyed by the revision
+SHA-1 and a namespace (parser version, localization and options), so
+that reruns, refreshed dumps and duplicate revisions skip parsing.
+Pages parsed with template expansion are stored with the digests of the
+expanded template bodies and are only reused as long as these match.
+The least recently used entries are evicted once the cache exceeds its
+maximum size, access times are written in batches.
+"""
+
+
+# standard library imports
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import multiprocessing
+
+# third party imports
+
+# library specific imports
+import src.wplocalization
+
+
+#: parsed page attributes (article OR template)
+ATTRIBUTES = [
+    "text", "inclusions", "links", "categories", "collected", "params"
+]
+
+
+def get_namespace(version, localization=None, *options):
+    """Get cache namespace.
+
+    :param str version: parser version
+    :param localization: localization (ConfigParser or profile)
+    :param options: options changing parse results
+
+    :returns: namespace
+    :rtype: str
+    """
+    sha1 = hashlib.sha1()
+    sha1.update(str(version).encode())
+    if localization is not None:
+        localization = src.wplocalization.get_profile(localization)
+        sha1.update(localization.digest.encode())
+    for option in options:
+        sha1.update(repr(option).encode())
+    return sha1.hexdigest()
+
+
+class WPCache(object):
+    """Parse cache.
+
+    :cvar int EVICTION_INTERVAL: number of insertions between evictions
+        (and number of hits between access time updates)
+    :ivar str path: database file
+    :ivar int max_size: maximum size (in bytes)
+    :ivar str namespace: namespace
+    :ivar int hits: number of hits
+    :ivar int misses: number of misses
+    """
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, path, max_size, namespace):
+        """Open parse cache.
+
+        :param str path: database file
+        :param int max_size: maximum size (in bytes)
+        :param str namespace: namespace
+        """
+        try:
+            logger = multiprocessing.get_logger().getChild(__name__)
+            self.path = path
+            self.max_size = max_size
+            self.namespace = namespace
+            self.hits = 0
+            self.misses = 0
+            self._insertions = 0
+            # access times of hits (by key) not written yet
+            self._atimes = {}
+            # autocommit, several processes share the database
+            self.connection = sqlite3.connect(
+                path, timeout=60, isolation_level=None
+            )
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, atime REAL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS parse_cache_atime "
+                "ON parse_cache (atime)"
+            )
+        except Exception:
+            logger.exception("failed to open parse cache %s", path)
+            raise
+        return
+
+    def _get_key(self, page):
+        """Get key.
+
+        :param Page page: page
+
+        :returns: key
+        :rtype: str
+        """
+        return "{}:{}:{}".format(
+            self.namespace, type(page).__name__, page.sha1
+        )
+
+    def get(self, page, get_digest=None):
+        """Get parsed page.
+
+        :param Page page: page
+        :param callable get_digest: returns the digest of a template body
+            by title (None skips checking the expanded templates)
+
+        :returns: hit toggle (page is updated on hits)
+        :rtype: bool
+        """
+        if not page.sha1:
+            return False
+        key = self._get_key(page)
+        row = self.connection.execute(
+            "SELECT value FROM parse_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return False
+        value = json.loads(zlib.decompress(row[0]).decode())
+        templates = value.pop("templates", {})
+        if get_digest is not None and any(
+                get_digest(template) != digest
+                for template, digest in templates.items()
+        ):
+            # expanded templates changed
+            self.misses += 1
+            return False
+        for attribute, attribute_value in value.items():
+            setattr(page, attribute, attribute_value)
+        self._atimes[key] = time.time()
+        if len(self._atimes) >= self.EVICTION_INTERVAL:
+            self._write_atimes()
+        self.hits += 1
+        return True
+
+    def _write_atimes(self):
+        """Write access times of hits."""
+        if not self._atimes:
+            return
+        self.connection.executemany(
+            "UPDATE parse_cache SET atime = ? WHERE key = ?",
+            [(atime, key) for key, atime in self._atimes.items()]
+        )
+        self._atimes.clear()
+        return
+
+    def put(self, page, templates=None):
+        """Put parsed page.
+
+        :param Page page: page
+        :param dict templates: digests of the expanded template bodies
+            (by title)
+        """
+        if not page.sha1:
+            return
+        value = {
+            attribute: getattr(page, attribute)
+            for attribute in ATTRIBUTES if hasattr(page, attribute)
+        }
+        if templates:
+            value["templates"] = templates
+        value = zlib.compress(json.dumps(value).encode())
+        self.connection.execute(
+            "INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?)",
+            (self._get_key(page), value, len(value), time.time())
+        )
+        self._insertions += 1
+        if self._insertions % self.EVICTION_INTERVAL == 0:
+            self.evict()
+        return
+
+    def evict(self):
+        """Evict least recently used entries exceeding the maximum size."""
+        self._write_atimes()
+        size = self.connection.execute(
+            "SELECT TOTAL(size) FROM parse_cache"
+        ).fetchone()[0]
+        if size <= self.max_size:
+            return
+        keys = []
+        for key, entry_size in self.connection.execute(
+                "SELECT key, size FROM parse_cache ORDER BY atime"
+        ):
+            if size <= self.max_size:
+                break
+            keys.append((key,))
+            size -= entry_size
+        self.connection.executemany(
+            "DELETE FROM parse_cache WHERE key = ?", keys
+        )
+        return
+
+    @property
+    def hit_rate(self):
+        """Hit rate.
+
+        :returns: hit rate
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0.0
+        return self.hits / lookups
+
+    def close(self):
+        """Close parse cache."""
+        self._write_atimes()
+        self.connection.close()
+        return
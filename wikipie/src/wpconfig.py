@@ -29,12 +29,35 @@ import configparser
 
 # third party imports
 # library specific imports
+import src.wpmarkupparser.constants
 
 
 CONF = "conf/{}"
 LOGGING_CONFIG = CONF.format("logging.ini")
 CONFIG = CONF.format("config.ini")
 LOCALIZATION = CONF.format("{}.ini")
+LOCALIZATION_PROFILE = CONF.format("{}.profile")
+
+
+def _get_outputs(value):
+    """Get outputs to extract.
+
+    :param str value: comma-separated outputs
+
+    :returns: outputs
+    :rtype: frozenset
+    """
+    outputs = frozenset(
+        output.strip() for output in value.split(",") if output.strip()
+    )
+    unknown = outputs - set(src.wpmarkupparser.constants.OUTPUTS)
+    if not outputs or unknown:
+        raise argparse.ArgumentTypeError(
+            "outputs are {}".format(
+                ", ".join(src.wpmarkupparser.constants.OUTPUTS)
+            )
+        )
+    return outputs
 
 
 def get_logging_config(file_=LOGGING_CONFIG):
@@ -86,6 +109,109 @@ def _get_command_line_parser():
         default=False,
         help="process templates"
     )
+    parser.add_argument(
+        "-e", "--engine",
+        default="pyparsing",
+        choices=["pyparsing", "linear"],
+        help="wiki markup parser engine"
+    )
+    parser.add_argument(
+        "-s", "--section-size",
+        default=0,
+        type=int,
+        help="parse articles larger than section size section-wise "
+        "in parallel (0 disables section parsing)"
+    )
+    parser.add_argument(
+        "--section-processes",
+        default=2,
+        type=int,
+        help="number of section processes per process"
+    )
+    parser.add_argument(
+        "-i", "--incremental",
+        action="store_true",
+        default=False,
+        help="reparse only the sections changed since the parent revision"
+    )
+    parser.add_argument(
+        "--cache",
+        default="",
+        help="parse cache (SQLite database file)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        default=1024,
+        type=int,
+        help="maximum parse cache size (in MB)"
+    )
+    parser.add_argument(
+        "-x", "--expand",
+        action="store_true",
+        default=False,
+        help="expand templates (requires processed templates)"
+    )
+    parser.add_argument(
+        "--expansion-depth",
+        default=8,
+        type=int,
+        help="maximum template expansion nesting depth"
+    )
+    parser.add_argument(
+        "--expansion-cache",
+        default=1024,
+        type=int,
+        help="maximum number of cached template bodies and expansions"
+    )
+    parser.add_argument(
+        "-f", "--fast",
+        action="store_true",
+        default=False,
+        help="extract links, categories and inclusions only (regex-only, "
+        "low fidelity, keeps wikitext)"
+    )
+    parser.add_argument(
+        "--stream-size",
+        default=0,
+        type=int,
+        help="stream parse events of articles larger than stream size "
+        "to the database (0 disables streaming, not in upsert mode)"
+    )
+    parser.add_argument(
+        "--extract",
+        default=None,
+        type=_get_outputs,
+        help="comma-separated article outputs to extract and store "
+        "(text, links, inclusions, categories; default: all of them)"
+    )
+    parser.add_argument(
+        "--intern",
+        action="store_true",
+        default=False,
+        help="share repeated link targets, templates and categories "
+        "between records (seeded from the template registry)"
+    )
+    parser.add_argument(
+        "--bulk-load",
+        action="store_true",
+        default=False,
+        help="unordered writes, acknowledged by the primary only and not "
+        "journaled unless configured otherwise, secondary indexes "
+        "dropped while loading (initial loads)"
+    )
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        default=False,
+        help="idempotent writes (replace stored pages unless of a later "
+        "revision, replace stored inclusions and links of a page)"
+    )
+    parser.add_argument(
+        "--registry",
+        default="",
+        help="template registry file (written by template processing, "
+        "read by article-only runs)"
+    )
     return parser
 
 
@@ -100,6 +226,24 @@ def get_command_line_args():
     return args
 
 
+def get_replay_args():
+    """Get command-line arguments (dead-letter replay).
+
+    :returns: args
+    :rtype: Namespace
+    """
+    parser = argparse.ArgumentParser(prog="WikiPie 0.x replay")
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        default=False,
+        help="idempotent writes (replace stored pages unless of a later "
+        "revision)"
+    )
+    args = parser.parse_args()
+    return args
+
+
 def get_localization(file_):
     """Get localization.
 
@@ -0,0 +1,132 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Intern table module, shares repeated names between records.
+
+Link targets, template names and category names repeat across millions
+of pages, but every parse creates them as fresh string objects. A
+worker's intern table maps each name to the first object seen (or seeded,
+e.g. from the template registry), so records of later pages refer to
+that one object and the duplicates can be freed.
+"""
+
+
+# standard library imports
+import sys
+
+# third party imports
+
+# library specific imports
+
+
+class InternTable(object):
+    """Intern table.
+
+    :ivar dict strings: shared strings (by string)
+    :ivar int hits: number of lookups returning a shared string
+    :ivar int misses: number of lookups adding a string
+    :ivar int saved: approximate number of bytes saved (size of the
+        duplicates replaced by shared strings)
+    """
+
+    def __init__(self, strings=None):
+        """Initialize intern table.
+
+        :param strings: strings to seed the table with
+        :type strings: iterable or None
+        """
+        self.strings = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0
+        if strings is not None:
+            self.seed(strings)
+        return
+
+    def __len__(self):
+        """Get number of shared strings.
+
+        :returns: number of shared strings
+        :rtype: int
+        """
+        return len(self.strings)
+
+    def __contains__(self, string):
+        """Check whether string is shared.
+
+        :param str string: string
+
+        :returns: toggle
+        :rtype: bool
+        """
+        return string in self.strings
+
+    def seed(self, strings):
+        """Seed table (seeded strings are not counted as misses).
+
+        :param iterable strings: strings
+        """
+        for string in strings:
+            self.strings.setdefault(string, string)
+        return
+
+    def seed_registry(self, registry):
+        """Seed table with the titles and redirect targets of a template
+        registry.
+
+        :param TemplateRegistry registry: template registry
+        """
+        for title, (target, _) in registry.templates.items():
+            self.strings.setdefault(title, title)
+            if target:
+                self.strings.setdefault(target, target)
+        return
+
+    def intern(self, string):
+        """Get shared string.
+
+        :param str string: string
+
+        :returns: shared string
+        :rtype: str
+        """
+        shared = self.strings.get(string)
+        if shared is None:
+            self.misses += 1
+            self.strings[string] = string
+            return string
+        self.hits += 1
+        if shared is not string:
+            self.saved += sys.getsizeof(string)
+        return shared
+
+    def get_report(self):
+        """Get report.
+
+        :returns: number of shared strings, hits, misses and approximate
+            number of bytes saved
+        :rtype: dict
+        """
+        report = {
+            "strings": len(self.strings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "saved": self.saved
+        }
+        return report
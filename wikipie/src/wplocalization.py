@@ -0,0 +1,260 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Localization profile module, handles localization profiles.
+
+A localization profile merges the MediaWiki software information (see
+:mod:`src.wpdata`) with a localization and the namespaces and case
+rules of the export file (siteinfo) into read-only sequences, sets and
+canonical name maps, so that parse actions do set or dict lookups
+instead of reading the localization on every match. Profiles are built
+once per language (or export file) and cached to disk.
+"""
+
+
+# standard library imports
+import os
+import json
+import pickle
+import hashlib
+
+# third party imports
+
+# library specific imports
+import src.wpdata
+import src.wpconfig
+
+
+class LocalizationProfile(object):
+    """Localization profile (read-only).
+
+    :ivar str digest: localization digest (empty if there is no
+        localization)
+    :ivar tuple behavior_switches: behavior switches
+    :ivar tuple parser_extensions: parser extensions
+    :ivar tuple language_codes: language codes
+    :ivar tuple projects: projects
+    :ivar tuple namespaces: namespaces
+    :ivar tuple variables: variables
+    :ivar tuple parser_functions: parser functions
+    :ivar tuple modifiers: modifiers
+    :ivar str template_namespace: template namespace
+    :ivar frozenset template_namespaces: template namespace names
+    :ivar frozenset category_namespaces: category namespace names
+    :ivar dict canonical_modifiers: canonical modifiers (by modifier)
+    :ivar bool template_first_letter: toggle first letter capitalization
+        of templates
+    """
+    __slots__ = (
+        "digest", "behavior_switches", "parser_extensions",
+        "language_codes", "projects", "namespaces", "variables",
+        "parser_functions", "modifiers", "template_namespace",
+        "template_namespaces", "category_namespaces", "canonical_modifiers",
+        "template_first_letter"
+    )
+
+    def __init__(self, localization=None, digest="", siteinfo=None):
+        """Build localization profile.
+
+        :param ConfigParser localization: localization
+        :param str digest: localization digest
+        :param dict siteinfo: site information (see
+            :meth:`WPXMLParser.find_siteinfo`)
+        """
+        localized = {
+            section: _get_localized(localization, section)
+            for section in (
+                "BEHAVIOR_SWITCHES", "NAMESPACES", "VARIABLES",
+                "PARSER_FUNCTIONS", "MODIFIERS"
+            )
+        }
+        if siteinfo is not None:
+            localized["NAMESPACES"] = _merge_namespaces(
+                localized["NAMESPACES"], siteinfo["namespaces"]
+            )
+        self.digest = digest
+        self.behavior_switches = tuple(src.wpdata.BEHAVIOR_SWITCHES) + (
+            _get_names(localized["BEHAVIOR_SWITCHES"])
+        )
+        self.parser_extensions = tuple(src.wpdata.PARSER_EXTENSIONS)
+        self.language_codes = tuple(src.wpdata.LANGUAGE_CODES)
+        self.projects = tuple(src.wpdata.PROJECTS)
+        self.namespaces = tuple(src.wpdata.NAMESPACES) + (
+            _get_names(localized["NAMESPACES"])
+        )
+        self.variables = tuple(src.wpdata.VARIABLES) + (
+            _get_names(localized["VARIABLES"])
+        )
+        self.parser_functions = tuple(src.wpdata.PARSER_FUNCTIONS) + (
+            _get_names(localized["PARSER_FUNCTIONS"])
+        )
+        self.modifiers = tuple(src.wpdata.MODIFIERS) + (
+            _get_names(localized["MODIFIERS"])
+        )
+        namespaces = dict(localized["NAMESPACES"])
+        if "10" in namespaces:
+            self.template_namespace = namespaces["10"][0]
+        else:
+            self.template_namespace = src.wpdata.NAMESPACES["10"][0]
+        self.template_namespaces = frozenset(
+            src.wpdata.NAMESPACES["10"] + list(namespaces.get("10", []))
+        )
+        self.category_namespaces = frozenset(
+            src.wpdata.NAMESPACES["14"] + list(namespaces.get("14", []))
+        )
+        canonical_modifiers = {
+            modifier: modifier for modifier in src.wpdata.MODIFIERS
+        }
+        for modifier, values in localized["MODIFIERS"]:
+            for value in values:
+                canonical_modifiers[value] = modifier
+        self.canonical_modifiers = canonical_modifiers
+        case = "first-letter"
+        if siteinfo is not None and "10" in siteinfo["namespaces"]:
+            case = siteinfo["namespaces"]["10"]["case"] or case
+        self.template_first_letter = case == "first-letter"
+        return
+
+    def __setattr__(self, name, value):
+        """Set attribute (only while building).
+
+        :param str name: name
+        :param value: value
+        """
+        if hasattr(self, name):
+            raise AttributeError("localization profile is read-only")
+        super().__setattr__(name, value)
+        return
+
+
+def _get_localized(localization, section):
+    """Get localized names.
+
+    :param ConfigParser localization: localization
+    :param str section: section
+
+    :returns: localized names (key, names)
+    :rtype: tuple
+    """
+    if localization is None or section not in localization:
+        return ()
+    return tuple(
+        (key, tuple(value.split(",")))
+        for key, value in localization[section].items()
+    )
+
+
+def _merge_namespaces(localized, namespaces):
+    """Merge localized namespace names with siteinfo namespace names.
+
+    :param tuple localized: localized namespace names (key, names)
+    :param dict namespaces: siteinfo namespaces (name and case rule by
+        key)
+
+    :returns: localized namespace names (key, names)
+    :rtype: tuple
+    """
+    merged = dict(localized)
+    for key, namespace in namespaces.items():
+        names = merged.get(key, ())
+        if namespace["name"] and namespace["name"] not in names:
+            # localized names first
+            merged[key] = names + (namespace["name"],)
+    return tuple(merged.items())
+
+
+def _get_names(localized):
+    """Get names.
+
+    :param tuple localized: localized names (key, names)
+
+    :returns: names
+    :rtype: tuple
+    """
+    return tuple(name for _, names in localized for name in names)
+
+
+#: profile without localization
+DEFAULT_PROFILE = LocalizationProfile()
+
+
+def get_profile(localization=None):
+    """Get localization profile.
+
+    :param localization: localization (ConfigParser or profile)
+
+    :returns: localization profile
+    :rtype: LocalizationProfile
+    """
+    if localization is None:
+        return DEFAULT_PROFILE
+    if isinstance(localization, LocalizationProfile):
+        return localization
+    sha1 = hashlib.sha1()
+    for section in localization.sections():
+        sha1.update("[{}]".format(section).encode())
+        for key, value in localization.items(section, raw=True):
+            sha1.update("{}={}".format(key, value).encode())
+    return LocalizationProfile(localization, digest=sha1.hexdigest())
+
+
+def load_profile(file_=None, cache="", siteinfo=None):
+    """Load localization profile.
+
+    The profile is rebuilt if the cached one is missing or stale.
+
+    :param str file_: localization file (None if there is none)
+    :param str cache: profile cache file (empty disables caching)
+    :param dict siteinfo: site information (see
+        :meth:`WPXMLParser.find_siteinfo`)
+
+    :returns: localization profile
+    :rtype: LocalizationProfile
+    """
+    sha1 = hashlib.sha1(" ".join(LocalizationProfile.__slots__).encode())
+    if file_ is not None:
+        with open(file_, "rb") as fp:
+            sha1.update(fp.read())
+    if siteinfo is not None:
+        sha1.update(json.dumps(siteinfo, sort_keys=True).encode())
+    digest = sha1.hexdigest()
+    if cache and os.path.exists(cache):
+        try:
+            with open(cache, "rb") as fp:
+                profile = pickle.load(fp)
+            if profile.digest == digest:
+                return profile
+        except Exception:
+            # corrupt profile cache, rebuild
+            pass
+    if file_ is not None:
+        localization = src.wpconfig.get_localization(file_)
+    else:
+        localization = None
+    profile = LocalizationProfile(
+        localization, digest=digest, siteinfo=siteinfo
+    )
+    if cache:
+        tmp = "{}.{}.tmp".format(cache, os.getpid())
+        try:
+            with open(tmp, "wb") as fp:
+                pickle.dump(profile, fp)
+            os.replace(tmp, cache)
+        except OSError:
+            pass
+    return profile
@@ -0,0 +1,185 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+.. _`Manual:Preprocessor`: \
+https://www.mediawiki.org/wiki/Manual:Parser.php#Preprocessor
+
+:synopsis: Linear brace and bracket matcher.
+
+Finds the balanced "{{", "{{{" and "[[" openers of a text in one scan
+using a stack of brace and bracket runs, similar to the MediaWiki
+preprocessor (see `Manual:Preprocessor`_). Comments and parser
+extensions are skipped. Inclusions, params and links are only parsed
+at balanced openers, unbalanced openers fall through to plaintext.
+"""
+
+
+# standard library imports
+import re
+
+# third party imports
+
+# library specific imports
+
+
+# openers
+INCLUSION = "{{"
+PARAM = "{{{"
+LINK = "[["
+
+
+def _get_pattern(parser_extensions):
+    """Get brace and bracket run pattern.
+
+    :param list parser_extensions: parser extensions
+
+    :returns: pattern
+    :rtype: SRE_Pattern
+    """
+    skipped = [r"<!--.*?-->"]
+    if parser_extensions:
+        parser_extensions = sorted(parser_extensions, key=len, reverse=True)
+        skipped.append(
+            r"<({})\b[^>]*?(?<!/)>.*?</\1>".format(
+                "|".join(re.escape(tag) for tag in parser_extensions)
+            )
+        )
+    pattern = re.compile(
+        "|".join(skipped + [r"\{{2,}", r"\}{2,}", r"\[{2,}", r"\]{2,}"]),
+        re.DOTALL
+    )
+    return pattern
+
+
+def _scan(text, pattern):
+    """Scan brace and bracket runs.
+
+    :param str text: text
+    :param SRE_Pattern pattern: brace and bracket run pattern
+
+    :returns: balanced openers (opener, start location, end location)
+    :rtype: generator
+    """
+    # [opening character, location, length]
+    stack = []
+    for match in pattern.finditer(text):
+        run = match.group()
+        char = run[0]
+        if char in "{[":
+            stack.append([char, match.start(), len(run)])
+            continue
+        if char == "}":
+            opening_char = "{"
+        elif char == "]":
+            opening_char = "["
+        else:
+            # comment or parser extension
+            continue
+        count = len(run)
+        while count > 1 and stack and stack[-1][0] == opening_char:
+            opening = stack[-1]
+            if opening_char == "{" and count > 2 and opening[2] > 2:
+                matched = 3
+                opener = PARAM
+            else:
+                matched = 2
+                opener = INCLUSION if opening_char == "{" else LINK
+            opening[2] -= matched
+            end = match.end() - count + matched
+            count -= matched
+            yield opener, opening[1] + opening[2], end
+            if opening[2] < 2:
+                stack.pop()
+    return
+
+
+def find_balanced(text, parser_extensions=None, pattern=None):
+    """Find balanced openers.
+
+    :param str text: text
+    :param list parser_extensions: parser extensions
+    :param SRE_Pattern pattern: brace and bracket run pattern
+
+    :returns: locations of balanced openers (by opener)
+    :rtype: dict
+    """
+    if pattern is None:
+        pattern = _get_pattern(parser_extensions)
+    balanced = {INCLUSION: set(), PARAM: set(), LINK: set()}
+    for opener, start, _ in _scan(text, pattern):
+        balanced[opener].add(start)
+    return balanced
+
+
+def find_spans(text, parser_extensions=None, pattern=None):
+    """Find balanced spans.
+
+    :param str text: text
+    :param list parser_extensions: parser extensions
+    :param SRE_Pattern pattern: brace and bracket run pattern
+
+    :returns: balanced spans (opener, start location, end location)
+        sorted by start location
+    :rtype: list
+    """
+    if pattern is None:
+        pattern = _get_pattern(parser_extensions)
+    return sorted(_scan(text, pattern), key=lambda span: span[1])
+
+
+class BracketMatcher(object):
+    """Bracket matcher remembering the last text.
+
+    :ivar list parser_extensions: parser extensions
+    """
+
+    def __init__(self, parser_extensions=None):
+        """Initialize bracket matcher.
+
+        :param list parser_extensions: parser extensions
+        """
+        self.parser_extensions = parser_extensions
+        self._pattern = _get_pattern(parser_extensions)
+        self._text = None
+        self._balanced = {}
+        return
+
+    def find_balanced(self, text):
+        """Find balanced openers (cached for the last text).
+
+        :param str text: text
+
+        :returns: locations of balanced openers (by opener)
+        :rtype: dict
+        """
+        if text is not self._text:
+            self._balanced = find_balanced(text, pattern=self._pattern)
+            self._text = text
+        return self._balanced
+
+    def is_balanced(self, text, loc, opener):
+        """Check whether opener at location is balanced.
+
+        :param str text: text
+        :param int loc: location
+        :param str opener: opener
+
+        :returns: balanced toggle
+        :rtype: bool
+        """
+        return loc in self.find_balanced(text)[opener]
@@ -0,0 +1,117 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Collector hooks.
+
+Collectors registered with an :class:`ArticleParser` receive each
+top-level match of its single wiki markup pass (element, parse results
+and output location) and write records into their own buffers, which
+end up in the collected records of the page. Matches of template
+expansions are not passed on.
+"""
+
+
+# standard library imports
+
+# third party imports
+
+# library specific imports
+
+
+INCLUSION = "inclusion"
+LINK = "link"
+EXTERNAL_LINK = "external_link"
+TEXT = "text"
+
+
+def get_element(toks):
+    """Get matching element.
+
+    :param ParseResults toks: parse results
+
+    :returns: element (inclusion, link, external link or text)
+    :rtype: str
+    """
+    for element in (INCLUSION, LINK, EXTERNAL_LINK):
+        if element in toks:
+            return element
+    return TEXT
+
+
+class Collector(object):
+    """Collector hook.
+
+    Records are dictionaries, their start_doc and end_doc locations are
+    locations in the output like those of link records (the article
+    parser shifts them when merging sections and maps them when
+    restoring nowiki contents). Collectors have to be picklable to be
+    used by section processes.
+
+    :cvar str name: name (the records are collected by)
+    :ivar list records: records
+    """
+    name = ""
+
+    def __init__(self):
+        """Initialize collector hook."""
+        self.records = []
+        return
+
+    def collect(self, element, toks, loc):
+        """Collect match.
+
+        :param str element: element (inclusion, link, external link or
+            text)
+        :param ParseResults toks: parse results
+        :param int loc: location in the output
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """Reset records.
+
+        :returns: records
+        :rtype: list
+        """
+        records = self.records
+        self.records = []
+        return records
+
+
+class ExternalLinkCollector(Collector):
+    """External link collector hook."""
+    name = "external_links"
+
+    def collect(self, element, toks, loc):
+        """Collect external link.
+
+        :param str element: element (inclusion, link, external link or
+            text)
+        :param ParseResults toks: parse results
+        :param int loc: location in the output
+        """
+        if element != EXTERNAL_LINK:
+            return
+        covered_text = toks["external_link"]
+        external_link = {
+            "covered_text": covered_text,
+            "start_doc": loc,
+            "end_doc": loc + len(covered_text)
+        }
+        self.records.append(external_link)
+        return
@@ -0,0 +1,1561 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Linear-time wiki markup engine.
+
+Hand-written alternative to the pyparsing wiki markup parser element.
+It recognizes the same constructs in the same order as the parser
+elements assembled in :mod:`src.wpmarkupparser.parser` and reuses the
+parse actions, but memoizes every (construct, position) pair and
+dispatches on the character at the current position, so each page is
+scanned in linear time.
+"""
+
+
+# standard library imports
+import re
+import string
+
+# third party imports
+
+# library specific imports
+import src.wpmarkupparser.brackets
+import src.wpmarkupparser.parse_actions.link
+import src.wpmarkupparser.parse_actions.lists
+import src.wpmarkupparser.parse_actions.sections
+import src.wpmarkupparser.parse_actions.template
+
+
+# pyparsing.alphanums + "_$"
+_KEYWORD_CHARS = frozenset(string.ascii_letters + string.digits + "_$")
+_CASELESS_KEYWORD_CHARS = frozenset(
+    (string.ascii_letters + string.digits + "_$").upper()
+)
+# line start parser element whitespace characters
+_WHITESPACE = " \n\t\r"
+# line end parser element whitespace characters
+_LINE_END_WHITESPACE = " \t\r"
+# plaintext = { ( any of a-zA-Z0-9 or '!"$%&()+,-./?@\^_`~',
+# any of "[]*#:;='", any Unicode character without "|[]*#:;<>='{}" ) |
+# any Unicode character without "|[]*#:;<>='{}" }-;
+_PLAINTEXT = re.compile(
+    r"(?:[{0}][{1}][^{2}]|[^{2}])+".format(
+        re.escape(
+            string.ascii_letters + string.digits + '!"$%&()+,-./?@\\^_`~'
+        ),
+        re.escape("[]*#:;='"),
+        re.escape("|[]*#:;<>='{}")
+    )
+)
+_PLAINTEXT_EXCLUDED = frozenset("|[]*#:;<>='{}")
+# special = any of "[]*#:;<>='";
+_SPECIAL = frozenset("[]*#:;<>='")
+# url = url_scheme, ":", [ "//" ], { uri_character };
+_URL = re.compile(
+    r"[A-Za-z][A-Za-z0-9+\-.]+:(?://)?"
+    r"(?:[!*'():@&=+$/#A-Za-z0-9\-_.~]|%[0-9A-Fa-f]{2})*"
+)
+_URL_SCHEME_START = frozenset(string.ascii_letters)
+# label_extension = { letter }-;
+_LABEL_EXTENSION = re.compile(r"[A-Za-z]+")
+# basic_table = "{|", { any Unicode character }, "|}";
+_BASIC_TABLE = re.compile(
+    r"\{\|(?:[^|]|\|[^}])*\|\}", re.MULTILINE | re.DOTALL
+)
+# br_tag = "<br>" | "<br />" | "<br/>";
+_BR_TAG = re.compile(r"<br>|<br[ ]?/>")
+# list_item = line_start, { ordered | unordered }- |
+# ( term | description ), [ { space | tabs }- ];
+_LIST_ITEM = re.compile(r"(?:[*#]+|[;:])[ \t]*")
+# indent = line_start, { ":" }-;
+_INDENT = re.compile(r":+")
+# first characters of non-terminal parser elements
+_NON_TERMINAL = re.compile(r"[{'<=]")
+# whitespace preceding headers
+_HEADER_WHITESPACE = re.compile(r"[ \n\t\r]+(?=[=<])")
+
+
+class Tokens(list):
+    """Parse results.
+
+    Minimal stand-in for :class:`pyparsing.ParseResults`: a list of tokens
+    plus results names, where ``in`` tests results names (not tokens) and
+    string keys look up results names.
+
+    :ivar dict names: results names
+    """
+
+    def __init__(self, tokens=(), names=None):
+        """Initialize parse results.
+
+        :param list tokens: tokens
+        :param dict names: results names
+        """
+        super().__init__(tokens)
+        self.names = {}
+        if names:
+            for name, value in names.items():
+                # like pyparsing, empty results are not named
+                if value not in (None, ""):
+                    self[name] = value
+        return
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            value = self.names[key]
+            if isinstance(value, _Accumulated):
+                return Tokens(value)
+            return value
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, str):
+            self.names[key] = value
+        else:
+            super().__setitem__(key, value)
+        return
+
+    def accumulate(self, name, value):
+        """Add results name value (listAllMatches).
+
+        :param str name: results name
+        :param value: value
+        """
+        self.names.setdefault(name, _Accumulated()).append(value)
+        return
+
+    def merge(self, other):
+        """Merge parse results (tokens and results names).
+
+        :param Tokens other: parse results
+        """
+        self.extend(other)
+        for name, value in other.names.items():
+            if isinstance(value, _Accumulated):
+                self.names.setdefault(name, _Accumulated()).extend(value)
+            else:
+                self.names[name] = value
+        return
+
+    def copy(self):
+        """Copy parse results.
+
+        :returns: parse results
+        :rtype: Tokens
+        """
+        tokens = Tokens(self)
+        for name, value in self.names.items():
+            if isinstance(value, _Accumulated):
+                value = _Accumulated(value)
+            tokens.names[name] = value
+        return tokens
+
+
+class _Accumulated(list):
+    """Results name values collected with listAllMatches."""
+    pass
+
+
+class _Finder(object):
+    """Pattern finder remembering the last search.
+
+    Consecutive searches for the same pattern from increasing
+    positions reuse the previous result, so repeated lookahead over
+    the same region costs linear time in total.
+
+    :ivar str text: text
+    :ivar SRE_Pattern pattern: pattern
+    :ivar int searched: position the last search started from
+    :ivar int found: position of the last match (-1 if none)
+    """
+
+    def __init__(self, text, pattern):
+        """Initialize pattern finder.
+
+        :param str text: text
+        :param SRE_Pattern pattern: pattern
+        """
+        self.text = text
+        self.pattern = pattern
+        self.searched = len(text) + 1
+        self.found = -1
+        return
+
+    def find(self, pos):
+        """Find pattern.
+
+        :param int pos: position
+
+        :returns: position of the next match (-1 if none)
+        :rtype: int
+        """
+        if self.searched <= pos and (self.found == -1 or pos <= self.found):
+            return self.found
+        self.searched = pos
+        match = self.pattern.search(self.text, pos)
+        if match is None:
+            self.found = -1
+        else:
+            self.found = match.start()
+        return self.found
+
+
+class WikiMarkup(object):
+    """Linear-time wiki markup parser element.
+
+    Drop-in replacement for the ``wiki_markup`` parser element of
+    :class:`ArticleParser` (``parse_actions=True``) and
+    :class:`TemplateParser` (``original_text=True``): :meth:`scanString`
+    yields the same tokens, start and end locations.
+
+    :ivar LocalizationProfile localization: localization profile
+    :ivar bool parse_actions: toggle parse actions
+    :ivar bool original_text: toggle original text (except noinclude
+        and list items)
+    :ivar frozenset features: optional parser elements to keep
+    """
+
+    def __init__(
+            self, behavior_switches, parser_extensions, language_codes,
+            projects, namespaces, variables, parser_functions, modifiers,
+            localization=None, parse_actions=False, original_text=False,
+            features=None
+    ):
+        """Initialize linear-time wiki markup parser element.
+
+        :param list behavior_switches: behavior switches
+        :param list parser_extensions: parser extensions
+        :param list language_codes: language codes
+        :param list projects: projects
+        :param list namespaces: namespaces
+        :param list variables: variables
+        :param list parser_functions: parser functions
+        :param list modifiers: modifiers
+        :param LocalizationProfile localization: localization profile
+        :param bool parse_actions: toggle parse actions
+        :param bool original_text: toggle original text
+        :param frozenset features: optional parser elements to keep
+            (None keeps all of them)
+        """
+        self.localization = localization
+        self.parse_actions = parse_actions
+        self.original_text = original_text
+        self.features = features
+        self._behavior_switches = sorted(
+            behavior_switches, key=len, reverse=True
+        )
+        self._parser_extensions = sorted(
+            parser_extensions, key=len, reverse=True
+        )
+        self._language_codes = [
+            (language_code, language_code.upper())
+            for language_code in sorted(language_codes, key=len, reverse=True)
+        ]
+        self._projects = [
+            (project, project.upper())
+            for project in projects if project != "wikipedia"
+        ]
+        namespaces = sorted(namespaces, key=len, reverse=True)
+        self._link_namespaces = [
+            (namespace, namespace.upper())
+            for namespace in namespaces if namespace != "Wikipedia"
+        ]
+        self._template_namespaces = [
+            (namespace, namespace.upper()) for namespace in namespaces
+        ]
+        self._brackets = src.wpmarkupparser.brackets.BracketMatcher(
+            parser_extensions
+        )
+        self._variables = sorted(variables, key=len, reverse=True)
+        self._parser_functions = sorted(
+            parser_functions, key=len, reverse=True
+        )
+        self._modifiers = [
+            (modifier, modifier.upper())
+            for modifier in sorted(modifiers, key=len, reverse=True)
+        ]
+        # (parser element, first characters) in wiki_markup order,
+        # None matches any character
+        self._elements = [
+            (self._behavior_switch, frozenset(
+                behavior_switch[0]
+                for behavior_switch in self._behavior_switches
+                if behavior_switch
+            )),
+            (self._param, frozenset("{")),
+            (self._noinclude, frozenset("<")),
+            (self._comment, frozenset("<")),
+            (self._parser_extension, frozenset("<")),
+            (self._basic_table, frozenset("{")),
+            (self._br_tag, frozenset("<")),
+            (self._horizontal, frozenset("-<")),
+            (self._link, frozenset("[")),
+            (self._abbr_tag, frozenset("<")),
+            (self._url, _URL_SCHEME_START),
+            (self._external_link, frozenset("[")),
+            (self._list_item, frozenset(_WHITESPACE + "*#;:")),
+            (self._indent, frozenset(_WHITESPACE + ":")),
+            (self._mw_variable, frozenset("{")),
+            (self._mw_parser_function, frozenset("{")),
+            (self._inclusion, frozenset("{")),
+            (self._header6, frozenset(_WHITESPACE + "=<")),
+            (self._header5, frozenset(_WHITESPACE + "=<")),
+            (self._header4, frozenset(_WHITESPACE + "=<")),
+            (self._header3, frozenset(_WHITESPACE + "=<")),
+            (self._header2, frozenset(_WHITESPACE + "=<")),
+            (self._header1, frozenset(_WHITESPACE + "=<")),
+            (self._p_tag, frozenset("<")),
+            (self._italics, frozenset("'<")),
+            (self._bold, frozenset("'<")),
+            (self._bold_italics, frozenset("'")),
+            (self._cite_tag, frozenset("<")),
+            (self._plaintext, None),
+            (self._special, _SPECIAL)
+        ]
+        if features is not None:
+            # reduced variant (parser elements listed in OPTIONAL_ELEMENTS
+            # and TEXT_ELEMENTS of src.wpmarkupparser.parser)
+            optional = {
+                "behavior_switch": self._behavior_switch,
+                "param": self._param,
+                "noinclude": self._noinclude,
+                "comment": self._comment,
+                "parser_extension": self._parser_extension,
+                "basic_table": self._basic_table,
+                "abbr_tag": self._abbr_tag,
+                "cite_tag": self._cite_tag,
+                "br_tag": self._br_tag,
+                "list_item": self._list_item,
+                "indent": self._indent,
+                "italics": self._italics,
+                "bold": self._bold,
+                "bold_italics": self._bold_italics
+            }
+            pruned = [
+                element for name, element in optional.items()
+                if name not in features
+            ]
+            self._elements = [
+                (element, first) for element, first in self._elements
+                if element not in pruned
+            ]
+        # parser elements exempt from original text
+        self._exempt = (self._noinclude, self._list_item, self._indent)
+        self._dispatch = {}
+        self._reset("")
+        return
+
+    def _reset(self, text):
+        """Reset state.
+
+        :param str text: text
+        """
+        self._text = text
+        self._len = len(text)
+        self._balanced = self._brackets.find_balanced(text)
+        self._memo = {}
+        self._nested_memo = {}
+        self._finders = {}
+        return
+
+    def _find(self, sub, pos):
+        """Find substring.
+
+        :param str sub: substring
+        :param int pos: position
+
+        :returns: position of the next match (-1 if none)
+        :rtype: int
+        """
+        return self._search(("sub", sub), pos)
+
+    def _search(self, key, pos):
+        """Find substring or character set.
+
+        :param tuple key: ("sub", substring), ("in", characters) or
+            ("not in", characters)
+        :param int pos: position
+
+        :returns: position of the next match (-1 if none)
+        :rtype: int
+        """
+        try:
+            finder = self._finders[key]
+        except KeyError:
+            kind, chars = key
+            if kind == "sub":
+                pattern = re.escape(chars)
+            elif kind == "in":
+                pattern = "[{}]".format(re.escape(chars))
+            else:
+                pattern = "[^{}]".format(re.escape(chars))
+            finder = self._finders[key] = _Finder(
+                self._text, re.compile(pattern)
+            )
+        return finder.find(pos)
+
+    def _get_elements(self, char):
+        """Get parser elements which may match at character.
+
+        :param str char: character
+
+        :returns: parser elements
+        :rtype: list
+        """
+        try:
+            return self._dispatch[char]
+        except KeyError:
+            pass
+        elements = []
+        for element, first in self._elements:
+            if first is None:
+                if char not in _PLAINTEXT_EXCLUDED:
+                    elements.append(element)
+            elif char in first:
+                elements.append(element)
+        self._dispatch[char] = elements
+        return elements
+
+    def scanString(self, instring):
+        """Scan string for wiki markup.
+
+        :param str instring: string
+
+        :returns: tokens, start and end location
+        :rtype: generator
+        """
+        self._reset(instring)
+        # match non-terminal parser elements back to front so that
+        # nested wiki markup is always memoized and the recursion depth
+        # does not grow with the length of the text
+        for loc in reversed(self._get_non_terminal_locs()):
+            self._wiki_markup(loc)
+        loc = 0
+        while loc <= self._len:
+            match = self._wiki_markup(loc)
+            if match is not None and match[0] > loc:
+                yield match[1], loc, match[0]
+                loc = match[0]
+            else:
+                loc += 1
+        self._reset("")
+
+    def _get_non_terminal_locs(self):
+        """Get locations non-terminal parser elements may match at.
+
+        :returns: locations
+        :rtype: list
+        """
+        locs = [match.start() for match in _NON_TERMINAL.finditer(self._text)]
+        for match in _HEADER_WHITESPACE.finditer(self._text):
+            # header parser elements skip leading whitespace
+            if self._text[match.end()-1] == "\n":
+                locs.extend(range(match.start(), match.end()))
+        locs.sort()
+        return locs
+
+    def _wiki_markup(self, loc):
+        """Match wiki markup.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        try:
+            return self._memo[loc]
+        except KeyError:
+            pass
+        match = None
+        if loc < self._len:
+            for element in self._get_elements(self._text[loc]):
+                match = element(loc)
+                if match is not None:
+                    if self.original_text and element not in self._exempt:
+                        match = (
+                            match[0], Tokens([self._text[loc:match[0]]])
+                        )
+                    break
+        self._memo[loc] = match
+        return match
+
+    def _value(self, loc):
+        """Match value.
+
+        value = wiki_markup;
+
+        :param int loc: location
+
+        :returns: end location and value
+        :rtype: tuple
+        """
+        end = loc
+        match = self._wiki_markup(end)
+        while match is not None:
+            end = match[0]
+            match = self._wiki_markup(end)
+        if end == loc:
+            return None
+        return end, self._text[loc:end]
+
+    def _chars_not_in(self, loc, chars):
+        """Match { any Unicode character without chars }-.
+
+        :param int loc: location
+        :param str chars: characters
+
+        :returns: end location
+        :rtype: int
+        """
+        end = self._search(("in", chars), loc)
+        if end == -1:
+            end = self._len
+        if end <= loc:
+            return None
+        return end
+
+    def _literal(self, loc, literals):
+        """Match first of literals.
+
+        :param int loc: location
+        :param list literals: literals
+
+        :returns: literal
+        :rtype: str
+        """
+        for literal in literals:
+            if self._text.startswith(literal, loc):
+                return literal
+        return None
+
+    def _caseless_keyword(self, loc, keywords):
+        """Match first of caseless keywords.
+
+        :param int loc: location
+        :param list keywords: (keyword, uppercase keyword)
+
+        :returns: keyword
+        :rtype: str
+        """
+        text = self._text
+        for keyword, upper in keywords:
+            end = loc + len(keyword)
+            if (
+                    text[loc:end].upper() == upper
+                    and (
+                        loc >= self._len - len(keyword)
+                        or text[end].upper() not in _CASELESS_KEYWORD_CHARS
+                    )
+            ):
+                return keyword
+        return None
+
+    def _keyword(self, loc, keyword):
+        """Match keyword.
+
+        :param int loc: location
+        :param str keyword: keyword
+
+        :returns: keyword
+        :rtype: str
+        """
+        text = self._text
+        end = loc + len(keyword)
+        if (
+                text.startswith(keyword, loc)
+                and (
+                    loc >= self._len - len(keyword)
+                    or text[end] not in _KEYWORD_CHARS
+                )
+                and (loc == 0 or text[loc-1] not in _KEYWORD_CHARS)
+        ):
+            return keyword
+        return None
+
+    def _skip(self, loc, chars):
+        """Skip characters.
+
+        :param int loc: location
+        :param str chars: characters
+
+        :returns: location
+        :rtype: int
+        """
+        loc = self._search(("not in", chars), loc)
+        if loc == -1:
+            loc = self._len
+        return loc
+
+    def _line_start(self, loc):
+        """Match line start (skipping leading whitespace).
+
+        :param int loc: location
+
+        :returns: location
+        :rtype: int
+        """
+        loc = self._skip(loc, _WHITESPACE)
+        if loc == 0 or self._text[loc-1] == "\n":
+            return loc
+        return None
+
+    def _line_end(self, loc):
+        """Match line end (skipping leading whitespace).
+
+        :param int loc: location
+
+        :returns: end location
+        :rtype: int
+        """
+        loc = self._skip(loc, _LINE_END_WHITESPACE)
+        if loc == self._len or self._text[loc] == "\n":
+            return loc + 1
+        return None
+
+    def _behavior_switch(self, loc):
+        """Match behavior switch.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        behavior_switch = self._literal(loc, self._behavior_switches)
+        if behavior_switch is None:
+            return None
+        end = loc + len(behavior_switch)
+        if self.parse_actions:
+            behavior_switch = ""
+        return (
+            end,
+            Tokens([behavior_switch], {"behavior_switch": behavior_switch})
+        )
+
+    def _nested(self, loc, opener, closer, content):
+        """Match nested expression.
+
+        :param int loc: location
+        :param str opener: opener
+        :param str closer: closer
+        :param function content: content parser element
+
+        :returns: end location and group
+        :rtype: tuple
+        """
+        key = (opener, loc)
+        try:
+            return self._nested_memo[key]
+        except KeyError:
+            pass
+        match = None
+        if self._text.startswith(opener, loc):
+            end = loc + len(opener)
+            group = Tokens()
+            while True:
+                nested = self._nested(end, opener, closer, content)
+                if nested is not None:
+                    end = nested[0]
+                    group.append(nested[1])
+                    continue
+                toks = content(end)
+                if toks is not None:
+                    end = toks[0]
+                    group.merge(toks[1])
+                    continue
+                break
+            if self._text.startswith(closer, end):
+                match = (end + len(closer), group)
+        self._nested_memo[key] = match
+        return match
+
+    def _param_content(self, loc):
+        """Match param content.
+
+        content = { any Unicode character without "|={}" }-, [ default ];
+        default = "|", [ value ];
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        end = self._chars_not_in(loc, "|={}")
+        if end is None:
+            return None
+        name = self._text[loc:end]
+        toks = Tokens([name], {"name": name})
+        if self._text.startswith("|", end):
+            end += 1
+            toks.append("|")
+            value = self._value(end)
+            if value is not None:
+                end = value[0]
+                toks.append(value[1])
+                toks["value"] = value[1]
+        return end, toks
+
+    def _param(self, loc):
+        """Match param.
+
+        param = "{{{", content, "}}}";
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if loc not in self._balanced[src.wpmarkupparser.brackets.PARAM]:
+            return None
+        match = self._nested(loc, "{{{", "}}}", self._param_content)
+        if match is None:
+            return None
+        toks = Tokens([match[1]])
+        if self.parse_actions:
+            toks = Tokens([
+                src.wpmarkupparser.parse_actions.template.sub_param(toks)
+            ])
+        return match[0], toks
+
+    def _noinclude(self, loc):
+        """Match noinclude.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if not self._text.startswith("<noinclude>", loc):
+            return None
+        end = self._find("</noinclude>", loc + len("<noinclude>") + 1)
+        if end == -1:
+            return None
+        return end + len("</noinclude>"), Tokens([""])
+
+    def _comment(self, loc):
+        """Match comment.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if not self._text.startswith("<!--", loc):
+            return None
+        end = self._find("-->", loc + len("<!--") + 1)
+        if end == -1:
+            return None
+        end += len("-->")
+        return end, self._substitute(loc, end)
+
+    def _substitute(self, loc, end, sub=""):
+        """Get tokens of substituted wiki markup.
+
+        :param int loc: location
+        :param int end: end location
+        :param str sub: substitute
+
+        :returns: tokens
+        :rtype: Tokens
+        """
+        if self.parse_actions:
+            return Tokens([sub])
+        return Tokens([self._text[loc:end]])
+
+    def _tag(self, loc, tag):
+        """Match opening tag, { any Unicode character }, closing tag.
+
+        :param int loc: location
+        :param str tag: tag
+
+        :returns: end location
+        :rtype: int
+        """
+        if not self._text.startswith(tag, loc + 1):
+            return None
+        closing_tag = "</{}>".format(tag)
+        end = self._find(">", loc + 1 + len(tag))
+        if end == -1:
+            return None
+        end = self._find(closing_tag, end + 1)
+        if end == -1:
+            return None
+        return end + len(closing_tag)
+
+    def _self_closing_tag(self, loc, tag):
+        """Match self-closing tag.
+
+        :param int loc: location
+        :param str tag: tag
+
+        :returns: end location
+        :rtype: int
+        """
+        if not self._text.startswith(tag, loc + 1):
+            return None
+        end = self._find("/>", loc + 1 + len(tag))
+        if end == -1:
+            return None
+        newline = self._find("\n", loc + 1 + len(tag))
+        if newline != -1 and newline < end:
+            return None
+        return end + len("/>")
+
+    def _parser_extension(self, loc):
+        """Match parser extension.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        for tag in self._parser_extensions:
+            end = self._tag(loc, tag)
+            if end is not None:
+                return end, self._substitute(loc, end)
+        for tag in self._parser_extensions:
+            end = self._self_closing_tag(loc, tag)
+            if end is not None:
+                return end, self._substitute(loc, end)
+        return None
+
+    def _basic_table(self, loc):
+        """Match basic table.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if not self._text.startswith("{|", loc):
+            return None
+        if self._find("|}", loc + 2) == -1:
+            return None
+        match = _BASIC_TABLE.match(self._text, loc)
+        if match is None:
+            return None
+        return match.end(), self._substitute(loc, match.end())
+
+    def _br_tag(self, loc):
+        """Match br tag.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        match = _BR_TAG.match(self._text, loc)
+        if match is None:
+            return None
+        return match.end(), self._substitute(loc, match.end(), sub="\n")
+
+    def _horizontal(self, loc):
+        """Match horizontal.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        horizontal = self._literal(loc, ("----", "<hr>"))
+        if horizontal is None:
+            return None
+        end = loc + len(horizontal)
+        return end, self._substitute(loc, end)
+
+    def _interwiki_prefix(self, loc):
+        """Match interwiki prefix.
+
+        interwiki_prefix = ( [ language_prefix ], project_prefix )
+        | ( [ project ], language_prefix );
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        matches = []
+        # [ language_prefix ], project_prefix
+        toks = Tokens()
+        end = loc
+        language_prefix = self._language_prefix(end)
+        if language_prefix is not None:
+            end = language_prefix[0]
+            toks.merge(language_prefix[1])
+        project = self._project(end)
+        if project is not None and self._text.startswith(":", project[0]):
+            toks.merge(project[1])
+            toks.append(":")
+            matches.append((project[0] + 1, toks))
+        # [ project ], language_prefix
+        toks = Tokens()
+        end = loc
+        project = self._project(end)
+        if project is not None:
+            end = project[0]
+            toks.merge(project[1])
+        language_prefix = self._language_prefix(end)
+        if language_prefix is not None:
+            toks.merge(language_prefix[1])
+            matches.append((language_prefix[0], toks))
+        if not matches:
+            return None
+        # longest match, first one on ties
+        return max(matches, key=lambda match: match[0])
+
+    def _language_prefix(self, loc):
+        """Match language prefix.
+
+        language_prefix = ":", language_code, ":";
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if not self._text.startswith(":", loc):
+            return None
+        language_code = self._caseless_keyword(loc + 1, self._language_codes)
+        if language_code is None:
+            return None
+        end = loc + 1 + len(language_code)
+        if not self._text.startswith(":", end):
+            return None
+        toks = Tokens(
+            [":", language_code, ":"], {"language_code": language_code}
+        )
+        return end + 1, toks
+
+    def _project(self, loc):
+        """Match project.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        project = self._caseless_keyword(loc, self._projects)
+        if project is None:
+            project = self._keyword(loc, "wikipedia")
+        if project is None:
+            return None
+        return loc + len(project), Tokens([project], {"project": project})
+
+    def _namespace_prefix(self, loc, namespaces, keyword=None):
+        """Match namespace prefix.
+
+        namespace_prefix = namespace, ":";
+
+        :param int loc: location
+        :param list namespaces: (namespace, uppercase namespace)
+        :param str keyword: case sensitive namespace
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        namespace = self._caseless_keyword(loc, namespaces)
+        if namespace is None and keyword is not None:
+            namespace = self._keyword(loc, keyword)
+        if namespace is None:
+            return None
+        end = loc + len(namespace)
+        if not self._text.startswith(":", end):
+            return None
+        return end + 1, Tokens([namespace, ":"], {"namespace": namespace})
+
+    def _link(self, loc):
+        """Match link.
+
+        link = "[[", page_link, [ section_id ], [ "|", [ label ] ], "]]",
+        [ label_extension ];
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        text = self._text
+        if loc not in self._balanced[src.wpmarkupparser.brackets.LINK]:
+            return None
+        end = loc + 2
+        toks = Tokens(["[["])
+        # [ interwiki_prefix ]
+        interwiki_prefix = self._interwiki_prefix(end)
+        if interwiki_prefix is not None:
+            end = interwiki_prefix[0]
+            toks.merge(interwiki_prefix[1])
+        # [ namespace_prefix ]
+        namespace_prefix = self._namespace_prefix(
+            end, self._link_namespaces, keyword="Wikipedia"
+        )
+        if namespace_prefix is not None:
+            end = namespace_prefix[0]
+            toks.merge(namespace_prefix[1])
+        # pagename
+        pagename = self._chars_not_in(end, "|[]#<>{}")
+        if pagename is None:
+            return None
+        toks.append(text[end:pagename])
+        toks["pagename"] = text[end:pagename]
+        end = pagename
+        # [ section_id ]
+        if text.startswith("#", end):
+            heading = self._chars_not_in(end + 1, "|[]")
+            if heading is not None:
+                toks.append(text[end:heading])
+                end = heading
+        # [ "|", [ label ] ]
+        if text.startswith("|", end):
+            end += 1
+            toks.append("|")
+            label = self._chars_not_in(end, "|[]")
+            if label is not None:
+                toks.append(text[end:label])
+                toks["label"] = text[end:label]
+                end = label
+        if not text.startswith("]]", end):
+            return None
+        end += 2
+        toks.append("]]")
+        # [ label_extension ]
+        label_extension = _LABEL_EXTENSION.match(text, end)
+        if label_extension is not None:
+            end = label_extension.end()
+            toks.append(label_extension.group())
+            toks["label_extension"] = label_extension.group()
+        toks["link"] = toks.copy()
+        return end, toks
+
+    def _abbr_tag(self, loc):
+        """Match abbr tag.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if not self._text.startswith("<", loc):
+            return None
+        end = self._tag(loc, "abbr")
+        if end is None:
+            return None
+        return end, Tokens([self._text[loc:end]])
+
+    def _url(self, loc):
+        """Match URL.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        match = _URL.match(self._text, loc)
+        if match is None:
+            return None
+        return match.end(), Tokens([match.group()], {"url": match.group()})
+
+    def _external_link(self, loc):
+        """Match external link.
+
+        external_link = "[", url, [ whitespace, anchor ], "]";
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        text = self._text
+        if not text.startswith("[", loc):
+            return None
+        url = _URL.match(text, loc + 1)
+        if url is None:
+            return None
+        end = url.end()
+        toks = Tokens(["[", url.group()], {"url": url.group()})
+        # [ whitespace, anchor ]
+        if text[end:end+2] in ("\n\r", "\r\n"):
+            whitespace = end + 2
+        elif text[end:end+1] and text[end] in _WHITESPACE:
+            whitespace = end + 1
+        else:
+            whitespace = None
+        if whitespace is not None:
+            anchor = self._chars_not_in(whitespace, "[]")
+            if anchor is not None:
+                toks.append(text[end:whitespace])
+                toks.append(text[whitespace:anchor])
+                toks["whitespace"] = text[end:whitespace]
+                toks["anchor"] = text[whitespace:anchor]
+                end = anchor
+        if not text.startswith("]", end):
+            return None
+        end += 1
+        toks.append("]")
+        if self.parse_actions:
+            toks["external_link"] = toks.copy()
+            anchor = src.wpmarkupparser.parse_actions.link.sub_external_link(
+                toks
+            )
+            toks = Tokens([anchor], {"external_link": anchor})
+        return end, toks
+
+    def _list_item(self, loc):
+        """Match list item.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        start = self._line_start(loc)
+        if start is None:
+            return None
+        match = _LIST_ITEM.match(self._text, start)
+        if match is None:
+            return None
+        toks = Tokens([match.group()])
+        if self.parse_actions:
+            toks = Tokens([
+                src.wpmarkupparser.parse_actions.lists.sub_list_item(toks)
+            ])
+        return match.end(), toks
+
+    def _indent(self, loc):
+        """Match indent.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        start = self._line_start(loc)
+        if start is None:
+            return None
+        match = _INDENT.match(self._text, start)
+        if match is None:
+            return None
+        if self.parse_actions:
+            return match.end(), Tokens([""])
+        return match.end(), Tokens([match.group()])
+
+    def _mw_arg(self, loc):
+        """Match magic words argument.
+
+        mw_arg = ":", arg, { "|", arg };
+
+        :param int loc: location
+
+        :returns: end location
+        :rtype: int
+        """
+        if not self._text.startswith(":", loc):
+            return None
+        arg = self._wiki_markup(loc + 1)
+        if arg is None:
+            return None
+        end = arg[0]
+        while self._text.startswith("|", end):
+            arg = self._wiki_markup(end + 1)
+            if arg is None:
+                break
+            end = arg[0]
+        return end
+
+    def _magic_word(self, loc, magic_words, name):
+        """Match magic word.
+
+        magic_word = "{{", variable | parser_function, [ mw_arg ], "}}";
+
+        :param int loc: location
+        :param list magic_words: variables or parser functions
+        :param str name: results name
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if not self._text.startswith("{{", loc):
+            return None
+        magic_word = self._literal(loc + 2, magic_words)
+        if magic_word is None:
+            return None
+        end = loc + 2 + len(magic_word)
+        mw_arg = self._mw_arg(end)
+        if mw_arg is not None:
+            end = mw_arg
+        if not self._text.startswith("}}", end):
+            return None
+        end += 2
+        toks = self._substitute(loc, end)
+        toks[name] = toks[0]
+        return end, toks
+
+    def _mw_variable(self, loc):
+        """Match magic words variable.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._magic_word(loc, self._variables, "mw_variable")
+
+    def _mw_parser_function(self, loc):
+        """Match magic words parser function.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._magic_word(
+            loc, self._parser_functions, "mw_parser_function"
+        )
+
+    def _full_template(self, loc):
+        """Match full template.
+
+        full_template = [ modifier_prefix ], [ namespace_prefix ], pagename;
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        text = self._text
+        end = loc
+        toks = Tokens()
+        modifier = self._caseless_keyword(end, self._modifiers)
+        if (
+                modifier is not None
+                and text.startswith(":", end + len(modifier))
+        ):
+            end += len(modifier) + 1
+            toks.extend([modifier, ":"])
+            toks["modifier"] = modifier
+        namespace_prefix = self._namespace_prefix(
+            end, self._template_namespaces
+        )
+        if namespace_prefix is not None:
+            end = namespace_prefix[0]
+            toks.merge(namespace_prefix[1])
+        pagename = self._chars_not_in(end, "|[]#<>{}")
+        if pagename is None:
+            return None
+        pagename_toks = Tokens(
+            [text[end:pagename]], {"pagename": text[end:pagename]}
+        )
+        if self.parse_actions:
+            normalized = (
+                src.wpmarkupparser.parse_actions.template.normalize_template(
+                    pagename_toks, localization=self.localization
+                )
+            )
+            pagename_toks = Tokens([normalized], {"pagename": normalized})
+        toks.merge(pagename_toks)
+        if self.parse_actions:
+            toks = src.wpmarkupparser.parse_actions.template.mod_full_template(
+                toks, localization=self.localization
+            )
+        return pagename, toks
+
+    def _arg(self, loc):
+        """Match argument.
+
+        arg = "|", ( named_arg | value );
+        named_arg = [ name ], "=", value;
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        text = self._text
+        if not text.startswith("|", loc):
+            return None
+        start = loc + 1
+        # named_arg
+        end = start
+        toks = Tokens(["|"])
+        name = self._chars_not_in(end, "|={}")
+        if name is not None:
+            toks.append(text[end:name])
+            toks["name"] = text[end:name]
+            end = name
+        if text.startswith("=", end):
+            value = self._value(end + 1)
+            if value is not None:
+                toks.extend(["=", value[1]])
+                toks["value"] = value[1]
+                return value[0], toks
+        # value
+        value = self._value(start)
+        if value is None:
+            return None
+        return value[0], Tokens(["|", value[1]], {"value": value[1]})
+
+    def _inclusion_content(self, loc):
+        """Match inclusion content.
+
+        content = full_template, { arg };
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        full_template = self._full_template(loc)
+        if full_template is None:
+            return None
+        end, toks = full_template
+        arg = self._arg(end)
+        while arg is not None:
+            end = arg[0]
+            toks.merge(arg[1])
+            toks.accumulate("arg", arg[1].copy())
+            arg = self._arg(end)
+        return end, toks
+
+    def _inclusion(self, loc):
+        """Match inclusion.
+
+        inclusion = "{{", full_template, { arg }, "}}";
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        if loc not in self._balanced[src.wpmarkupparser.brackets.INCLUSION]:
+            return None
+        match = self._nested(loc, "{{", "}}", self._inclusion_content)
+        if match is None:
+            return None
+        return match[0], Tokens([match[1]], {"inclusion": match[1]})
+
+    def _header(self, loc, level, sub_header):
+        """Match header.
+
+        header = line_start,
+        ( level*"=", content, level*"=" )
+        | ( "<hlevel>", content, "</hlevel>" ), line_end;
+
+        :param int loc: location
+        :param int level: level
+        :param function sub_header: parse action
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        start = self._line_start(loc)
+        if start is None:
+            return None
+        delimiters = (
+            (level * "=", level * "="),
+            ("<h{}>".format(level), "</h{}>".format(level))
+        )
+        for opening, closing in delimiters:
+            if not self._text.startswith(opening, start):
+                continue
+            content = self._wiki_markup(start + len(opening))
+            if content is None:
+                continue
+            if not self._text.startswith(closing, content[0]):
+                continue
+            end = self._line_end(content[0] + len(closing))
+            if end is None:
+                continue
+            toks = content[1].copy()
+            if self.parse_actions:
+                toks = Tokens([sub_header(toks)])
+            return end, toks
+        return None
+
+    def _header6(self, loc):
+        """Match header6.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._header(
+            loc, 6, src.wpmarkupparser.parse_actions.sections.sub_header6
+        )
+
+    def _header5(self, loc):
+        """Match header5.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._header(
+            loc, 5, src.wpmarkupparser.parse_actions.sections.sub_header5
+        )
+
+    def _header4(self, loc):
+        """Match header4.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._header(
+            loc, 4, src.wpmarkupparser.parse_actions.sections.sub_header4
+        )
+
+    def _header3(self, loc):
+        """Match header3.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._header(
+            loc, 3, src.wpmarkupparser.parse_actions.sections.sub_header3
+        )
+
+    def _header2(self, loc):
+        """Match header2.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._header(
+            loc, 2, src.wpmarkupparser.parse_actions.sections.sub_header2
+        )
+
+    def _header1(self, loc):
+        """Match header1.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._header(
+            loc, 1, src.wpmarkupparser.parse_actions.sections.sub_header1
+        )
+
+    def _enclosed(self, loc, delimiters):
+        """Match opening delimiter, wiki_markup, closing delimiter.
+
+        :param int loc: location
+        :param tuple delimiters: (opening, closing) delimiters
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        for opening, closing in delimiters:
+            if not self._text.startswith(opening, loc):
+                continue
+            content = self._wiki_markup(loc + len(opening))
+            if content is None:
+                continue
+            if not self._text.startswith(closing, content[0]):
+                continue
+            return content[0] + len(closing), content[1].copy()
+        return None
+
+    def _p_tag(self, loc):
+        """Match paragraph tag.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        match = self._enclosed(loc, (("<p>", "</p>"),))
+        if match is None:
+            return None
+        end, toks = match
+        if self.parse_actions:
+            toks = Tokens([
+                src.wpmarkupparser.parse_actions.sections.sub_p_tag(toks)
+            ])
+        return end, toks
+
+    def _italics(self, loc):
+        """Match italics.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._enclosed(loc, (("''", "''"), ("<i>", "</i>")))
+
+    def _bold(self, loc):
+        """Match bold.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._enclosed(loc, (("'''", "'''"), ("<b>", "</b>")))
+
+    def _bold_italics(self, loc):
+        """Match bold italics.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._enclosed(loc, (("'''''", "'''''"),))
+
+    def _cite_tag(self, loc):
+        """Match cite tag.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return self._enclosed(loc, (("<cite>", "</cite>"),))
+
+    def _plaintext(self, loc):
+        """Match plaintext.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        match = _PLAINTEXT.match(self._text, loc)
+        if match is None:
+            return None
+        return match.end(), Tokens([match.group()])
+
+    def _special(self, loc):
+        """Match special character.
+
+        :param int loc: location
+
+        :returns: end location and tokens
+        :rtype: tuple
+        """
+        return loc + 1, Tokens([self._text[loc]])
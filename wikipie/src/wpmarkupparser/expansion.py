@@ -0,0 +1,169 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+.. _`Help:Template`: https://en.wikipedia.org/wiki/Help:Template
+
+:synopsis: Template expansion.
+
+Substitutes the positional and named arguments of an inclusion for the
+params of the template body from the template pass (see
+`Help:Template`_). Template bodies and parsed expansions are kept in LRU
+caches, so that frequently used templates are looked up and parsed once
+per distinct argument set.
+"""
+
+
+# standard library imports
+import re
+import hashlib
+import functools
+import collections
+
+# third party imports
+
+# library specific imports
+
+
+# param openers and closers
+_PARAM_PATTERN = re.compile(r"\{\{\{|\}\}\}")
+
+
+def substitute(content, args):
+    """Substitute arguments for params.
+
+    Params without argument are substituted by their default value,
+    params without argument and default value are removed (the article
+    parser does not keep params). Nested params are substituted innermost
+    first.
+
+    :param str content: template body
+    :param dict args: arguments (positional arguments are numbered from 1)
+
+    :returns: wiki markup
+    :rtype: str
+    """
+    stack = [[]]
+    pos = 0
+    for match in _PARAM_PATTERN.finditer(content):
+        stack[-1].append(content[pos:match.start()])
+        pos = match.end()
+        if match.group() == "{{{":
+            stack.append([])
+        elif len(stack) > 1:
+            param = "".join(stack.pop())
+            name, sep, default = param.partition("|")
+            name = name.strip()
+            if name in args:
+                stack[-1].append(args[name])
+            elif sep:
+                stack[-1].append(default)
+        else:
+            stack[-1].append(match.group())
+    stack[-1].append(content[pos:])
+    # unclosed openers are kept
+    return "{{{".join("".join(segments) for segments in stack)
+
+
+class TemplateExpander(object):
+    """Template expander.
+
+    :ivar int max_depth: maximum inclusion nesting depth
+    :ivar int cache_size: maximum number of cached bodies and expansions
+    :ivar int hits: number of expansion cache hits
+    :ivar int misses: number of expansion cache misses
+    """
+
+    def __init__(self, find_template, max_depth=8, cache_size=1024):
+        """Initialize template expander.
+
+        :param callable find_template: returns the template body by title
+            (None if there is no template)
+        :param int max_depth: maximum inclusion nesting depth
+        :param int cache_size: maximum number of cached bodies and
+            expansions
+        """
+        self.max_depth = max_depth
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.get_body = functools.lru_cache(maxsize=cache_size)(
+            find_template
+        )
+        self._expansions = collections.OrderedDict()
+        return
+
+    def substitute(self, template, args):
+        """Substitute arguments for the params of the template body.
+
+        :param str template: template
+        :param dict args: arguments (positional arguments are numbered
+            from 1)
+
+        :returns: wiki markup (None if there is no template)
+        :rtype: str
+        """
+        content = self.get_body(template)
+        if content is None:
+            return None
+        return substitute(content, args)
+
+    def get_digest(self, template):
+        """Get digest of the template body.
+
+        :param str template: template
+
+        :returns: SHA-1 of the template body (empty string if there is no
+            template)
+        :rtype: str
+        """
+        content = self.get_body(template)
+        if content is None:
+            return ""
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def get_expansion(self, template, args, depth):
+        """Get cached expansion.
+
+        :param str template: template
+        :param dict args: arguments
+        :param int depth: inclusion nesting depth
+
+        :returns: expansion (None if not cached)
+        """
+        key = (template, frozenset(args.items()), depth)
+        expansion = self._expansions.get(key)
+        if expansion is None:
+            self.misses += 1
+            return None
+        self._expansions.move_to_end(key)
+        self.hits += 1
+        return expansion
+
+    def set_expansion(self, template, args, depth, expansion):
+        """Cache expansion.
+
+        :param str template: template
+        :param dict args: arguments
+        :param int depth: inclusion nesting depth
+        :param expansion: expansion
+        """
+        key = (template, frozenset(args.items()), depth)
+        self._expansions[key] = expansion
+        while len(self._expansions) > self.cache_size:
+            self._expansions.popitem(last=False)
+        return
@@ -0,0 +1,164 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Offset-tracking output buffer.
+
+Collects the substitutes of the matching substrings in amortized O(1)
+and keeps a compact offset map between parsed text (source) and output.
+Consecutive substitutes equal to their (contiguous) matching substrings
+share one entry of the map.
+"""
+
+
+# standard library imports
+import array
+import bisect
+
+# third party imports
+
+# library specific imports
+
+
+class OutputBuffer(object):
+    """Offset-tracking output buffer.
+
+    :ivar int length: output length
+    """
+
+    def __init__(self):
+        """Initialize offset-tracking output buffer."""
+        self.length = 0
+        self._segments = []
+        # offset map: output start, source start and source end
+        self._output_starts = array.array("q")
+        self._source_starts = array.array("q")
+        self._source_ends = array.array("q")
+        # last entry is identity
+        self._identity = False
+        return
+
+    def append(self, sub, start, end):
+        """Append substitute of matching substring.
+
+        :param str sub: substitute
+        :param int start: start location of the matching substring
+        :param int end: end location of the matching substring
+        """
+        identity = len(sub) == end - start
+        if (
+                identity and self._identity
+                and self._source_ends[-1] == start
+        ):
+            self._source_ends[-1] = end
+        else:
+            self._output_starts.append(self.length)
+            self._source_starts.append(start)
+            self._source_ends.append(end)
+            self._identity = identity
+        self._segments.append(sub)
+        self.length += len(sub)
+        return
+
+    def extend(self, output, offset):
+        """Append output buffer.
+
+        :param OutputBuffer output: output buffer
+        :param int offset: source location of the output buffer
+        """
+        for i in range(len(output._output_starts)):
+            self._output_starts.append(self.length + output._output_starts[i])
+            self._source_starts.append(offset + output._source_starts[i])
+            self._source_ends.append(offset + output._source_ends[i])
+        if output._output_starts:
+            self._identity = output._identity
+        self._segments.append(output.getvalue())
+        self.length += output.length
+        return
+
+    def getvalue(self):
+        """Get output.
+
+        :returns: output
+        :rtype: str
+        """
+        if len(self._segments) > 1:
+            self._segments = ["".join(self._segments)]
+        if not self._segments:
+            return ""
+        return self._segments[0]
+
+    def _get_output_end(self, i):
+        """Get output end of entry.
+
+        :param int i: index
+
+        :returns: output end
+        :rtype: int
+        """
+        if i + 1 < len(self._output_starts):
+            return self._output_starts[i+1]
+        return self.length
+
+    def get_source_location(self, loc):
+        """Map output location to source location.
+
+        Locations inside substitutes differing from their matching
+        substring are mapped to the start of the matching substring.
+
+        :param int loc: output location
+
+        :returns: source location
+        :rtype: int
+        """
+        i = bisect.bisect_right(self._output_starts, loc) - 1
+        if i < 0:
+            return loc
+        output_start = self._output_starts[i]
+        source_start = self._source_starts[i]
+        source_end = self._source_ends[i]
+        output_end = self._get_output_end(i)
+        if loc >= output_end:
+            return source_end
+        if output_end - output_start == source_end - source_start:
+            return source_start + loc - output_start
+        return source_start
+
+    def get_output_location(self, loc):
+        """Map source location to output location.
+
+        Locations inside matching substrings differing from their
+        substitute are mapped to the start of the substitute, skipped
+        locations to the start of the next substitute.
+
+        :param int loc: source location
+
+        :returns: output location
+        :rtype: int
+        """
+        i = bisect.bisect_right(self._source_starts, loc) - 1
+        if i < 0:
+            return 0
+        output_start = self._output_starts[i]
+        source_start = self._source_starts[i]
+        source_end = self._source_ends[i]
+        output_end = self._get_output_end(i)
+        if loc >= source_end:
+            return output_end
+        if output_end - output_start == source_end - source_start:
+            return output_start + loc - source_start
+        return output_start
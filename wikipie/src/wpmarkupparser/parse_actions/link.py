@@ -50,8 +50,10 @@ def sub_external_link(toks):
     :returns: anchor
     :rtype: str
     """
-    if "anchor" in toks["external_link"]:
-        anchor = toks["external_link"]["anchor"].strip()
+    # pyparsing >= 2.3 does not copy the results names of url and anchor
+    # to the external_link results name
+    if "anchor" in toks:
+        anchor = toks["anchor"].strip()
     else:
-        anchor = toks["external_link"]["url"].strip()
+        anchor = toks["url"].strip()
     return anchor
@@ -30,18 +30,23 @@ See `Manual:Title.php`_ for further information.
 # third party imports
 
 # library specific imports
-import src.wpdata
+import src.wplocalization
 
 
-def normalize_template(toks):
+def normalize_template(toks, localization=None):
     """Normalize template.
 
     :param ParseResults toks: parse results
+    :param LocalizationProfile localization: localization profile
 
     :returns: normalized template
     :rtype: str
     """
-    if len(toks["pagename"]) > 1:
+    if localization is None:
+        localization = src.wplocalization.DEFAULT_PROFILE
+    if not localization.template_first_letter:
+        template = toks["pagename"]
+    elif len(toks["pagename"]) > 1:
         template = toks["pagename"][0].upper() + toks["pagename"][1:]
     else:
         template = toks["pagename"][0].upper()
@@ -49,30 +54,68 @@ def normalize_template(toks):
     return template
 
 
+def get_arg(toks):
+    """Get argument name and value.
+
+    pyparsing >= 2.3 does not keep the results names of the matches of a
+    results name with listAllMatches, so both are taken from the tokens.
+
+    arg = "|", ( named_arg | value );
+    named_arg = [ name ], "=", value;
+
+    :param ParseResults toks: argument parse results
+
+    :returns: name (None if the argument is positional) and value
+    :rtype: tuple
+    """
+    if len(toks) > 2 and toks[-2] == "=":
+        if len(toks) > 3:
+            return toks[1], toks[-1]
+        # named argument without name
+        return None, toks[-1]
+    if len(toks) > 1:
+        return None, toks[1]
+    return None, ""
+
+
+def sub_param(toks):
+    """Substitute parameter.
+
+    param = "{{{", name, [ "|", [ value ] ], "}}}";
+
+    :param ParseResults toks: parse results
+
+    :returns: default value (empty string if there is none)
+    :rtype: str
+    """
+    if len(toks[0]) > 2:
+        return toks[0][2]
+    return ""
+
+
 def mod_full_template(toks, localization=None):
     """Modify full_template.
 
     :param ParseResults toks: parse results
-    :param ConfigParser localization: localization
+    :param LocalizationProfile localization: localization profile
 
     :returns: modified parse results
     :rtype: ParseResults
     """
+    if localization is None:
+        localization = src.wplocalization.DEFAULT_PROFILE
     if "modifier" in toks:
-        if localization is not None:
-            modifier = localization["MODIFIERS"][toks["modifier"]]
+        modifier = localization.canonical_modifiers.get(
+            toks["modifier"], toks["modifier"]
+        )
     else:
         modifier = ""
     toks["modifier"] = modifier
-    if "namespace" in toks:
+    namespace = localization.template_namespace
+    if (
+            "namespace" in toks
+            and toks["namespace"] not in localization.template_namespaces
+    ):
         namespace = toks["namespace"]
-        if namespace in src.wpdata.NAMESPACES["10"]:
-            if localization is not None:
-                namespace = localization["NAMESPACES"]["10"].split(",")[0]
-    else:
-        if localization is not None:
-            namespace = localization["NAMESPACES"]["10"].split(",")[0]
-        else:
-            namespace = src.wpdata.NAMESPACES["10"][0]
     toks["namespace"] = namespace
     return toks
@@ -21,13 +21,26 @@
 
 
 # standard library imports
+import os
+import re
+import hashlib
+import collections
+import multiprocessing
 
 # third party imports
 import pyparsing
 
 # library specific imports
-import src.wpdata
+import src.wplocalization
+import src.wpmarkupparser.brackets
+import src.wpmarkupparser.collectors
+import src.wpmarkupparser.constants
+import src.wpmarkupparser.engine
+import src.wpmarkupparser.output
 import src.wpmarkupparser.parse_actions.link
+import src.wpmarkupparser.parse_actions.template
+import src.wpmarkupparser.prestrip
+import src.wpmarkupparser.splitter
 from src.wpmarkupparser.parser_elements import (
     fundamental, link, lists,
     magic_words, sections, table,
@@ -35,19 +48,77 @@ from src.wpmarkupparser.parser_elements import (
 )
 
 
+ENGINES = ["pyparsing", "linear"]
+
+#: parser version (to be changed whenever parse results change)
+VERSION = "0.x.2"
+
+#: parser elements pruned from the grammar of pages lacking their triggers
+OPTIONAL_ELEMENTS = [
+    "behavior_switch", "param", "noinclude", "comment", "parser_extension",
+    "basic_table", "abbr_tag", "cite_tag"
+]
+
+#: parser elements pruned from the grammar if text is not extracted
+#: (headers, paragraph tags and external links drop the records of nested
+#: markup, horizontal rules and URLs decide where external links start,
+#: so they are kept)
+TEXT_ELEMENTS = [
+    "br_tag", "list_item", "indent", "italics", "bold", "bold_italics"
+]
+
+
+def get_version():
+    """Get parser version including a digest of the parser sources.
+
+    Cached parse results are keyed by the version, the digest keeps them
+    from being reused after changes of the grammar, the parse actions or
+    the localization handling.
+
+    :returns: parser version
+    :rtype: str
+    """
+    sha1 = hashlib.sha1()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.abspath(src.wplocalization.__file__)]
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(
+            os.path.join(root, file_) for file_ in sorted(files)
+            if file_.endswith(".py")
+        )
+    for path in paths:
+        sha1.update(os.path.basename(path).encode())
+        with open(path, "rb") as source:
+            sha1.update(source.read())
+    return "{}+{}".format(VERSION, sha1.hexdigest())
+
+
 class Parser(object):
     """Run time parser.
 
-    :param ConfigParser localization: localization
+    :param LocalizationProfile localization: localization profile
+    :param str engine: parser engine
     """
 
-    def __init__(self, localization=None):
+    def __init__(self, localization=None, engine="pyparsing"):
         """Initialize run time parser.
 
-        :param ConfigParser localization: localization
+        :param localization: localization (ConfigParser or profile)
+        :param str engine: parser engine (pyparsing or linear)
         """
+        if engine not in ENGINES:
+            raise ValueError("unknown parser engine {}".format(engine))
         self.wiki_markup = None
-        self.localization = localization
+        self.localization = src.wplocalization.get_profile(localization)
+        self.engine = engine
+        self.brackets = src.wpmarkupparser.brackets.BracketMatcher(
+            self._get_parser_extensions()
+        )
+        self.triggers = self._get_triggers()
+        self.text_elements = frozenset(TEXT_ELEMENTS)
+        self.variants = {}
+        self.output = src.wpmarkupparser.output.OutputBuffer()
         self._restore()
         self._set_parser_elements()
         return
@@ -58,22 +129,153 @@ class Parser(object):
 
     def _set_parser_elements(self):
         """Set parser elements."""
-        self.wiki_markup = None
+        self.variants = {}
+        self.wiki_markup = self._get_variant(frozenset(OPTIONAL_ELEMENTS))
         return
 
+    def _get_wiki_markup(self, features):
+        """Get wiki markup parser element.
+
+        :param frozenset features: optional parser elements to keep
+
+        :returns: wiki markup parser element
+        :rtype: ParserElement
+        """
+        return None
+
+    def _get_triggers(self):
+        """Get optional parser element triggers.
+
+        :returns: trigger patterns (by optional parser element)
+        :rtype: dict
+        """
+        substrings = {
+            "behavior_switch": [
+                behavior_switch
+                for behavior_switch in self._get_behavior_switches()
+                if behavior_switch
+            ],
+            "param": ["{{{"],
+            "noinclude": ["<noinclude>"],
+            "comment": ["<!--"],
+            "parser_extension": [
+                "<" + parser_extension
+                for parser_extension in self._get_parser_extensions()
+            ],
+            "basic_table": ["{|"],
+            "abbr_tag": ["<abbr"],
+            "cite_tag": ["<cite>"]
+        }
+        triggers = {}
+        for name, substrings_ in substrings.items():
+            if substrings_:
+                pattern = "|".join(re.escape(sub) for sub in substrings_)
+            else:
+                # never matches
+                pattern = "(?!)"
+            triggers[name] = re.compile(pattern)
+        return triggers
+
+    def _get_features(self, text):
+        """Get optional parser elements triggered in text.
+
+        :param str text: text
+
+        :returns: optional parser elements
+        :rtype: frozenset
+        """
+        features = frozenset(
+            name for name, trigger in self.triggers.items()
+            if trigger.search(text)
+        )
+        return features
+
+    def _get_variant(self, features):
+        """Get (cached) wiki markup parser element variant.
+
+        :param frozenset features: optional parser elements to keep
+
+        :returns: wiki markup parser element
+        :rtype: ParserElement
+        """
+        try:
+            return self.variants[features]
+        except KeyError:
+            pass
+        variant = self._get_wiki_markup(features)
+        self.variants[features] = variant
+        return variant
+
+    def _prune(self, elements, features):
+        """Prune optional parser elements.
+
+        :param list elements: (name, parser element)
+        :param frozenset features: optional parser elements to keep
+
+        :returns: parser elements
+        :rtype: list
+        """
+        kept = features | self.text_elements
+        pruned = [
+            element for name, element in elements
+            if name in kept
+            or (name not in OPTIONAL_ELEMENTS and name not in TEXT_ELEMENTS)
+        ]
+        return pruned
+
+    def _get_balanced(self, opener, parser_element):
+        """Get parser element matching at balanced openers only.
+
+        :param str opener: opener
+        :param ParserElement parser_element: parser element
+
+        :returns: parser element
+        :rtype: ParserElement
+        """
+        balanced = pyparsing.Empty().addCondition(
+            lambda s, loc, toks: self.brackets.is_balanced(s, loc, opener),
+            callDuringTry=True
+        )
+        balanced.setName("balanced")
+        return balanced + parser_element
+
+    def _get_linear_wiki_markup(
+            self, features=None, parse_actions=False, original_text=False
+    ):
+        """Get linear-time wiki markup parser element.
+
+        :param frozenset features: optional parser elements to keep
+        :param bool parse_actions: toggle parse actions
+        :param bool original_text: toggle original text
+
+        :returns: wiki markup parser element
+        :rtype: WikiMarkup
+        """
+        if features is not None:
+            features |= self.text_elements
+        wiki_markup = src.wpmarkupparser.engine.WikiMarkup(
+            self._get_behavior_switches(),
+            self._get_parser_extensions(),
+            self._get_language_codes(),
+            self._get_projects(),
+            self._get_namespaces(),
+            self._get_variables(),
+            self._get_parser_functions(),
+            self._get_modifiers(),
+            localization=self.localization,
+            parse_actions=parse_actions,
+            original_text=original_text,
+            features=features
+        )
+        return wiki_markup
+
     def _get_behavior_switches(self):
         """Get behavior switches.
 
         :returns: behavior switches
         :rtype: list
         """
-        behavior_switches = list(src.wpdata.BEHAVIOR_SWITCHES)
-        if self.localization is not None:
-            behavior_switches += list(
-                behavior_switch
-                for value in self.localization["BEHAVIOR_SWITCHES"].values()
-                for behavior_switch in value.split(",")
-            )
+        behavior_switches = list(self.localization.behavior_switches)
         return behavior_switches
 
     def _get_parser_extensions(self):
@@ -82,7 +284,7 @@ class Parser(object):
         :returns: parser extensions
         :rtype: list
         """
-        parser_extensions = list(src.wpdata.PARSER_EXTENSIONS)
+        parser_extensions = list(self.localization.parser_extensions)
         return parser_extensions
 
     def _get_language_codes(self):
@@ -91,7 +293,7 @@ class Parser(object):
         :returns: language codes
         :rtype: list
         """
-        language_codes = list(src.wpdata.LANGUAGE_CODES)
+        language_codes = list(self.localization.language_codes)
         return language_codes
 
     def _get_projects(self):
@@ -100,7 +302,7 @@ class Parser(object):
         :returns: projects
         :rtype: list
         """
-        projects = list(src.wpdata.PROJECTS)
+        projects = list(self.localization.projects)
         return projects
 
     def _get_namespaces(self):
@@ -109,13 +311,7 @@ class Parser(object):
         :returns: namespaces
         :rtype: list
         """
-        namespaces = list(src.wpdata.NAMESPACES)
-        if self.localization is not None:
-            namespaces += list(
-                namespace
-                for value in self.localization["NAMESPACES"].values()
-                for namespace in value.split(",")
-            )
+        namespaces = list(self.localization.namespaces)
         return namespaces
 
     def _get_variables(self):
@@ -124,13 +320,7 @@ class Parser(object):
         :returns: variables
         :rtype: list
         """
-        variables = list(src.wpdata.VARIABLES)
-        if self.localization is not None:
-            variables += list(
-                variable
-                for value in self.localization["VARIABLES"].values()
-                for variable in value.split(",")
-            )
+        variables = list(self.localization.variables)
         return variables
 
     def _get_parser_functions(self):
@@ -139,13 +329,7 @@ class Parser(object):
         :returns: parser functions
         :rtype: list
         """
-        parser_functions = list(src.wpdata.PARSER_FUNCTIONS)
-        if self.localization is not None:
-            parser_functions += list(
-                parser_function
-                for value in self.localization["PARSER_FUNCTIONS"].values()
-                for parser_function in value.split(",")
-            )
+        parser_functions = list(self.localization.parser_functions)
         return parser_functions
 
     def _get_modifiers(self):
@@ -154,13 +338,7 @@ class Parser(object):
         :returns: modifiers
         :rtype: list
         """
-        modifiers = list(src.wpdata.MODIFIERS)
-        if self.localization is not None:
-            modifiers += list(
-                modifier
-                for value in self.localization["MODIFIERS"].values()
-                for modifier in value.split(",")
-            )
+        modifiers = list(self.localization.modifiers)
         return modifiers
 
     def _transform_text(self, text):
@@ -183,6 +361,8 @@ class Parser(object):
         :returns: text
         :rtype: str
         """
+        if "<onlyinclude>" not in text:
+            return text
         onlyinclude = tags.get_onlyinclude()
         matches = onlyinclude.searchString(text)
         if matches:
@@ -197,15 +377,11 @@ class Parser(object):
         :returns: text
         :rtype: str
         """
-        matches = list(self.wiki_markup.scanString(text))
-        text = ""
-        delta = 0
-        for toks, start, end in matches:
-            substring_len = end - start
-            sub = toks[0]
-            text += sub
-            delta += (substring_len - len(sub))
-        return text
+        wiki_markup = self._get_variant(self._get_features(text))
+        self.output = src.wpmarkupparser.output.OutputBuffer()
+        for toks, start, end in wiki_markup.scanString(text):
+            self.output.append(toks[0], start, end)
+        return self.output.getvalue()
 
 
 class TemplateParser(Parser):
@@ -219,19 +395,35 @@ class TemplateParser(Parser):
         self.params = []
         return
 
-    def _set_parser_elements(self):
-        """Set parser elements."""
+    def _get_wiki_markup(self, features):
+        """Get wiki markup parser element.
+
+        :param frozenset features: optional parser elements to keep
+
+        :returns: wiki markup parser element
+        :rtype: ParserElement
+        """
+        if self.engine == "linear":
+            wiki_markup = self._get_linear_wiki_markup(
+                features=features, original_text=True
+            )
+            return wiki_markup
         # wiki markup parser element
-        self.wiki_markup = pyparsing.Forward()
-        self.wiki_markup.setName("wiki_markup")
-        self.wiki_markup.parseWithTabs()
+        wiki_markup = pyparsing.Forward()
+        wiki_markup.setName("wiki_markup")
+        wiki_markup.parseWithTabs()
         # behavior switch parser element
         behavior_switches = self._get_behavior_switches()
         behavior_switch = pyparsing.originalTextFor(
             magic_words.get_behaviour_switch(behavior_switches)
         )
         # param parser element
-        param = pyparsing.originalTextFor(template.get_param(self.wiki_markup))
+        param = pyparsing.originalTextFor(
+            self._get_balanced(
+                src.wpmarkupparser.brackets.PARAM,
+                template.get_param(wiki_markup)
+            )
+        )
         # noinclude parser element
         noinclude = tags.get_noinclude(parse_actions=True)
         # comment parser element
@@ -252,7 +444,10 @@ class TemplateParser(Parser):
         projects = self._get_projects()
         namespaces = self._get_namespaces()
         internal_link = pyparsing.originalTextFor(
-            link.get_link(language_codes, projects, namespaces)
+            self._get_balanced(
+                src.wpmarkupparser.brackets.LINK,
+                link.get_link(language_codes, projects, namespaces)
+            )
         )
         # abbr tag parser element
         abbr_tag = pyparsing.originalTextFor(text_formatting.get_abbr_tag())
@@ -271,110 +466,116 @@ class TemplateParser(Parser):
         # magic words variable parser element
         variables = self._get_variables()
         mw_variable = pyparsing.originalTextFor(
-            magic_words.get_mw_variable(variables, self.wiki_markup)
+            magic_words.get_mw_variable(variables, wiki_markup)
         )
         # magic words parser function parser element
         parser_functions = self._get_parser_functions()
         mw_parser_function = pyparsing.originalTextFor(
             magic_words.get_mw_parser_function(
-                parser_functions, self.wiki_markup
+                parser_functions, wiki_markup
             )
         )
         # inclusion parser element
         modifiers = self._get_modifiers()
         inclusion = pyparsing.originalTextFor(
-            template.get_inclusion(modifiers, namespaces, self.wiki_markup)
+            self._get_balanced(
+                src.wpmarkupparser.brackets.INCLUSION,
+                template.get_inclusion(modifiers, namespaces, wiki_markup)
+            )
         )
         # header6 parser element
         header6 = pyparsing.originalTextFor(
-            sections.get_header6(self.wiki_markup)
+            sections.get_header6(wiki_markup)
         )
         # header5 parser element
         header5 = pyparsing.originalTextFor(
-            sections.get_header5(self.wiki_markup)
+            sections.get_header5(wiki_markup)
         )
         # header4 parser element
         header4 = pyparsing.originalTextFor(
-            sections.get_header4(self.wiki_markup)
+            sections.get_header4(wiki_markup)
         )
         # header3 parser element
         header3 = pyparsing.originalTextFor(
-            sections.get_header3(self.wiki_markup)
+            sections.get_header3(wiki_markup)
         )
         # header2 parser element
         header2 = pyparsing.originalTextFor(
-            sections.get_header2(self.wiki_markup)
+            sections.get_header2(wiki_markup)
         )
         # header1 parser element
         header1 = pyparsing.originalTextFor(
-            sections.get_header1(self.wiki_markup)
+            sections.get_header1(wiki_markup)
         )
         # paragraph tag parser element
-        p_tag = pyparsing.originalTextFor(sections.get_p_tag(self.wiki_markup))
+        p_tag = pyparsing.originalTextFor(sections.get_p_tag(wiki_markup))
         # italics parser element
         italics = pyparsing.originalTextFor(
-            text_formatting.get_italics(self.wiki_markup)
+            text_formatting.get_italics(wiki_markup)
         )
         # bold parser element
         bold = pyparsing.originalTextFor(
-            text_formatting.get_bold(self.wiki_markup)
+            text_formatting.get_bold(wiki_markup)
         )
         # bold italics parser element
         bold_italics = pyparsing.originalTextFor(
-            text_formatting.get_bold_italics(self.wiki_markup)
+            text_formatting.get_bold_italics(wiki_markup)
         )
         # cite parser element
         cite = pyparsing.originalTextFor(
-            text_formatting.get_cite_tag(self.wiki_markup)
+            text_formatting.get_cite_tag(wiki_markup)
         )
         # assign parser element(s)
-        self.wiki_markup << (
+        elements = [
             # terminal magic words parser element(s)
-            behavior_switch
+            ("behavior_switch", behavior_switch),
             # terminal inclusion parser element(s)
-            | param
+            ("param", param),
             # terminal tag parser element(s)
-            | noinclude
-            | comment
-            | parser_extension
+            ("noinclude", noinclude),
+            ("comment", comment),
+            ("parser_extension", parser_extension),
             # terminal table parser element(s)
-            | basic_table
+            ("basic_table", basic_table),
             # terminal section parser element(s)
-            | br_tag
-            | horizontal
+            ("br_tag", br_tag),
+            ("horizontal", horizontal),
             # terminal link parser element(s)
-            | internal_link
+            ("internal_link", internal_link),
             # terminal text formatting parser element(s)
-            | abbr_tag
+            ("abbr_tag", abbr_tag),
             # terminal external link parser element(s)
-            | url
-            | external_link
+            ("url", url),
+            ("external_link", external_link),
             # terminal lists parser element(s)
-            | list_item
-            | indent
+            ("list_item", list_item),
+            ("indent", indent),
             # non-terminal magic words parser element(s)
-            | mw_variable
-            | mw_parser_function
+            ("mw_variable", mw_variable),
+            ("mw_parser_function", mw_parser_function),
             # non-terminal inclusion parser element(s)
-            | inclusion
+            ("inclusion", inclusion),
             # non-terminal section parser element(s)
-            | header6
-            | header5
-            | header4
-            | header3
-            | header2
-            | header1
-            | p_tag
+            ("header6", header6),
+            ("header5", header5),
+            ("header4", header4),
+            ("header3", header3),
+            ("header2", header2),
+            ("header1", header1),
+            ("p_tag", p_tag),
             # non-terminal text formatting parser element(s)
-            | italics
-            | bold
-            | bold_italics
-            | cite
+            ("italics", italics),
+            ("bold", bold),
+            ("bold_italics", bold_italics),
+            ("cite_tag", cite),
             # terminal fundamental parser element(s)
-            | plaintext
-            | special
+            ("plaintext", plaintext),
+            ("special", special)
+        ]
+        wiki_markup << pyparsing.MatchFirst(
+            self._prune(elements, features)
         )
-        return
+        return wiki_markup
 
     def parse(self, page):
         """Parse Wikipedia page.
@@ -397,18 +598,15 @@ class TemplateParser(Parser):
         :returns: text
         :rtype: str
         """
-        matches = list(self.wiki_markup.scanString(text))
-        text = ""
-        delta = 0
-        for toks, start, end in matches:
-            substring_len = end - start
+        wiki_markup = self._get_variant(self._get_features(text))
+        self.output = src.wpmarkupparser.output.OutputBuffer()
+        for toks, start, end in wiki_markup.scanString(text):
             if "param" in toks:
-                sub = self._collect_param(start - delta, toks)
+                sub = self._collect_param(self.output.length, toks)
             else:
                 sub = toks[0]
-            text += sub
-            delta += (substring_len - len(sub))
-        return text
+            self.output.append(sub, start, end)
+        return self.output.getvalue()
 
     def _collect_param(self, loc, toks):
         """Collect param.
@@ -437,48 +635,164 @@ class TemplateParser(Parser):
         return covered_text
 
 
+#: article parser of the section processes
+_section_parser = None
+
+
+def _init_section_parser(
+        args, localization, engine, expander, extract, collectors
+):
+    """Initialize article parser of a section process.
+
+    :param Namespace args: command-line arguments
+    :param LocalizationProfile localization: localization profile
+    :param str engine: parser engine
+    :param TemplateExpander expander: template expander
+    :param frozenset extract: outputs to extract
+    :param list collectors: collector hooks
+    """
+    global _section_parser
+    _section_parser = ArticleParser(
+        args, localization=localization, engine=engine, expander=expander,
+        extract=extract, collectors=collectors
+    )
+    return
+
+
+def _parse_section(text):
+    """Parse section (in a section process).
+
+    :param str text: pre-stripped text
+
+    :returns: inclusions, links, categories, output buffer, collector
+        records and expanded templates
+    :rtype: tuple
+    """
+    return _section_parser._parse_section(text)
+
+
 class ArticleParser(Parser):
     """Run time parser.
 
     :ivar Namespace args: command-line arguments
     :ivar ParserElement wiki_markup: wiki markup parser element
     :ivar list inclusions: inclusions
-    :ivar int delta: delta
     :ivar list links: links
     :ivar list categories: categories
+    :ivar list stripped: stripped spans (start, end, substitute length)
+        of the last page
+    :ivar NowikiRestorer restorer: nowiki restorer of the last page
+    :ivar int section_size: size above which pages are split into
+        sections parsed in parallel (0 disables section parsing)
+    :ivar int section_processes: number of section processes
+    :ivar Pool pool: section processes
+    :ivar bool incremental: toggle incremental parsing
+    :ivar OrderedDict revisions: parsed sections (by text) of the last
+        revisions (by revision ID)
+    :ivar TemplateExpander expander: template expander (None disables
+        template expansion)
+    :ivar int depth: inclusion nesting depth
+    :ivar set templates: expanded templates
+    :ivar frozenset expanded: templates expanded while parsing the last
+        page
+    :ivar frozenset extract: outputs to extract (outputs not extracted
+        are set to None)
+    :ivar list collectors: collector hooks
+    :ivar InternTable interns: intern table of link targets, templates
+        and categories (None disables interning)
+    :cvar int MAX_REVISIONS: maximum number of revisions kept
     """
+    MAX_REVISIONS = 4
 
-    def __init__(self, args, localization=None):
+    def __init__(
+            self, args, localization=None, engine="pyparsing",
+            section_size=0, section_processes=2, incremental=False,
+            expander=None, extract=None, collectors=None, interns=None
+    ):
         """Initialize run time article parser.
 
         :param Namespace args: command-line arguments
-        :param ConfigParser localization: localization
+        :param LocalizationProfile localization: localization profile
+        :param str engine: parser engine (pyparsing or linear)
+        :param int section_size: size above which pages are split into
+            sections parsed in parallel (0 disables section parsing)
+        :param int section_processes: number of section processes
+        :param bool incremental: toggle incremental parsing (reuse the
+            unchanged sections of the parent revision)
+        :param TemplateExpander expander: template expander (None
+            disables template expansion)
+        :param extract: outputs to extract (None extracts all of them)
+        :type extract: frozenset or None
+        :param list collectors: collector hooks
+        :param InternTable interns: intern table of link targets,
+            templates and categories (None disables interning)
         """
-        super().__init__(localization=localization)
+        if extract is None:
+            extract = src.wpmarkupparser.constants.OUTPUTS
+        unknown = set(extract) - set(src.wpmarkupparser.constants.OUTPUTS)
+        if unknown:
+            raise ValueError(
+                "unknown outputs {}".format(", ".join(sorted(unknown)))
+            )
+        super().__init__(localization=localization, engine=engine)
+        self.extract = frozenset(extract)
+        if "text" not in self.extract:
+            # reduced grammar
+            self.text_elements = frozenset()
+            self._set_parser_elements()
         self.args = args
+        self.section_size = section_size
+        self.section_processes = section_processes
+        self.pool = None
+        self.incremental = incremental
+        self.revisions = collections.OrderedDict()
+        self.expander = expander
+        self.depth = 0
+        self.collectors = list(collectors or [])
+        self.interns = interns
+        self.prestripper = src.wpmarkupparser.prestrip.Prestripper(
+            self._get_parser_extensions()
+        )
+        self.stripped = []
+        self.restorer = None
+        self.expanded = frozenset()
         return
 
     def _restore(self):
         """Restore state."""
         self.inclusions = []
-        self.delta = 0
         self.links = []
         self.categories = []
+        self.templates = set()
         return
 
-    def _set_parser_elements(self):
-        """Set parser elements."""
+    def _get_wiki_markup(self, features):
+        """Get wiki markup parser element.
+
+        :param frozenset features: optional parser elements to keep
+
+        :returns: wiki markup parser element
+        :rtype: ParserElement
+        """
+        if self.engine == "linear":
+            wiki_markup = self._get_linear_wiki_markup(
+                features=features, parse_actions=True
+            )
+            return wiki_markup
         # wiki markup parser element
-        self.wiki_markup = pyparsing.Forward()
-        self.wiki_markup.setName("wiki_markup")
-        self.wiki_markup.parseWithTabs()
+        wiki_markup = pyparsing.Forward()
+        wiki_markup.setName("wiki_markup")
+        wiki_markup.parseWithTabs()
         # behavior switch parser element
         behavior_switches = self._get_behavior_switches()
         behavior_switch = magic_words.get_behaviour_switch(
             behavior_switches, parse_actions=True
         )
         # param parser element
-        param = template.get_param(self.wiki_markup)
+        param = self._get_balanced(
+            src.wpmarkupparser.brackets.PARAM,
+            template.get_param(wiki_markup, parse_actions=True)
+        )
         # noinclude parser element
         noinclude = tags.get_noinclude(parse_actions=True)
         # comment parser element
@@ -498,8 +812,9 @@ class ArticleParser(Parser):
         language_codes = self._get_language_codes()
         projects = self._get_projects()
         namespaces = self._get_namespaces()
-        internal_link = link.get_link(
-            language_codes, projects, namespaces
+        internal_link = self._get_balanced(
+            src.wpmarkupparser.brackets.LINK,
+            link.get_link(language_codes, projects, namespaces)
         )
         # abbr tag parser element
         abbr_tag = text_formatting.get_abbr_tag()
@@ -518,92 +833,99 @@ class ArticleParser(Parser):
         # magic words variable parser element
         variables = self._get_variables()
         mw_variable = magic_words.get_mw_variable(
-            variables, self.wiki_markup, parse_actions=True
+            variables, wiki_markup, parse_actions=True
         )
         # magic words parser function parser element
         parser_functions = self._get_parser_functions()
         mw_parser_function = magic_words.get_mw_parser_function(
-            parser_functions, self.wiki_markup, parse_actions=True
+            parser_functions, wiki_markup, parse_actions=True
         )
         # inclusion parser element
         modifiers = self._get_modifiers()
-        inclusion = template.get_inclusion(
-            modifiers, namespaces, self.wiki_markup, parse_actions=True
+        inclusion = self._get_balanced(
+            src.wpmarkupparser.brackets.INCLUSION,
+            template.get_inclusion(
+                modifiers, namespaces, wiki_markup,
+                localization=self.localization, parse_actions=True
+            )
         )
         # header6 parser element
-        header6 = sections.get_header6(self.wiki_markup, parse_actions=True)
+        header6 = sections.get_header6(wiki_markup, parse_actions=True)
         # header5 parser element
-        header5 = sections.get_header5(self.wiki_markup, parse_actions=True)
+        header5 = sections.get_header5(wiki_markup, parse_actions=True)
         # header4 parser element
-        header4 = sections.get_header4(self.wiki_markup, parse_actions=True)
+        header4 = sections.get_header4(wiki_markup, parse_actions=True)
         # header3 parser element
-        header3 = sections.get_header3(self.wiki_markup, parse_actions=True)
+        header3 = sections.get_header3(wiki_markup, parse_actions=True)
         # header2 parser element
-        header2 = sections.get_header2(self.wiki_markup, parse_actions=True)
+        header2 = sections.get_header2(wiki_markup, parse_actions=True)
         # header1 parser element
-        header1 = sections.get_header1(self.wiki_markup, parse_actions=True)
+        header1 = sections.get_header1(wiki_markup, parse_actions=True)
         # paragraph tag parser element
-        p_tag = sections.get_p_tag(self.wiki_markup, parse_actions=True)
+        p_tag = sections.get_p_tag(wiki_markup, parse_actions=True)
         # italics parser element
         italics = text_formatting.get_italics(
-            self.wiki_markup, parse_actions=True
+            wiki_markup, parse_actions=True
         )
         # bold parser element
-        bold = text_formatting.get_bold(self.wiki_markup, parse_actions=True)
+        bold = text_formatting.get_bold(wiki_markup, parse_actions=True)
         # bold italics parser element
         bold_italics = text_formatting.get_bold_italics(
-            self.wiki_markup, parse_actions=True
+            wiki_markup, parse_actions=True
         )
         # cite parser element
-        cite = text_formatting.get_cite_tag(self.wiki_markup)
+        cite = text_formatting.get_cite_tag(wiki_markup)
         # assign parser element(s)
-        self.wiki_markup << (
+        elements = [
             # terminal magic words parser element(s)
-            behavior_switch
+            ("behavior_switch", behavior_switch),
             # terminal inclusion parser element(s)
-            | param
+            ("param", param),
             # terminal tag parser element(s)
-            | noinclude
-            | comment
-            | parser_extension
+            ("noinclude", noinclude),
+            ("comment", comment),
+            ("parser_extension", parser_extension),
             # terminal table parser element(s)
-            | basic_table
+            ("basic_table", basic_table),
             # terminal section parser element(s)
-            | br_tag
-            | horizontal
+            ("br_tag", br_tag),
+            ("horizontal", horizontal),
             # terminal link parser element(s)
-            | internal_link
+            ("internal_link", internal_link),
             # terminal text formatting parser element(s)
-            | abbr_tag
+            ("abbr_tag", abbr_tag),
             # terminal external link parser element(s)
-            | url
-            | external_link
+            ("url", url),
+            ("external_link", external_link),
             # terminal lists parser element(s)
-            | list_item
-            | indent
+            ("list_item", list_item),
+            ("indent", indent),
             # non-terminal magic words parser element(s)
-            | mw_variable
-            | mw_parser_function
+            ("mw_variable", mw_variable),
+            ("mw_parser_function", mw_parser_function),
             # non-terminal inclusion parser element(s)
-            | inclusion
+            ("inclusion", inclusion),
             # non-terminal section parser element(s)
-            | header6
-            | header5
-            | header4
-            | header3
-            | header2
-            | header1
-            | p_tag
+            ("header6", header6),
+            ("header5", header5),
+            ("header4", header4),
+            ("header3", header3),
+            ("header2", header2),
+            ("header1", header1),
+            ("p_tag", p_tag),
             # non-terminal text formatting parser element(s)
-            | italics
-            | bold
-            | bold_italics
-            | cite
+            ("italics", italics),
+            ("bold", bold),
+            ("bold_italics", bold_italics),
+            ("cite_tag", cite),
             # terminal fundamental parser element(s)
-            | plaintext
-            | special
+            ("plaintext", plaintext),
+            ("special", special)
+        ]
+        wiki_markup << pyparsing.MatchFirst(
+            self._prune(elements, features)
         )
-        return
+        return wiki_markup
 
     def parse(self, page):
         """Parse Wikipedia page.
@@ -613,25 +935,264 @@ class ArticleParser(Parser):
         :returns: page
         :rtype: Page
         """
-        page.text = self._transform_text(page.text)
-        page.inclusions = self.inclusions
-        page.links = self.links
-        page.categories = self.categories
+        text = self._transform_text(
+            page.text, revid=page.revid, parentid=page.parentid
+        )
+        outputs = {
+            "text": text,
+            "inclusions": self.inclusions,
+            "links": self.links,
+            "categories": self.categories
+        }
+        for output in src.wpmarkupparser.constants.OUTPUTS:
+            setattr(
+                page, output,
+                outputs[output] if output in self.extract else None
+            )
+        if self.collectors:
+            page.collected = {
+                collector.name: collector.reset()
+                for collector in self.collectors
+            }
+        self.expanded = frozenset(self.templates)
         self._restore()
         return page
 
-    def _transform_text(self, text):
+    def register_collector(self, collector):
+        """Register collector hook.
+
+        :param Collector collector: collector hook
+        """
+        self.collectors.append(collector)
+        # section processes are initialized with the collector hooks
+        self.close()
+        return
+
+    def _transform_text(self, text, revid=0, parentid=0):
         """Transform text.
 
         :param str text: text
+        :param int revid: revision ID
+        :param int parentid: parent revision ID
 
         :returns: text
         :rtype: str
         """
         text = self._strip_text(text)
-        text = self._parse(text)
+        text, self.stripped, nowikis = self.prestripper.strip(text)
+        if self.incremental:
+            text = self._parse_incremental(text, revid, parentid)
+        elif 0 < self.section_size < len(text):
+            text = self._parse_sections(text)
+        else:
+            text = self._parse(text)
+        self.restorer = None
+        if nowikis:
+            text = self._restore_nowikis(text, nowikis)
         return text
 
+    def _parse_sections(self, text):
+        """Parse wiki markup section-wise in parallel.
+
+        :param str text: text
+
+        :returns: text
+        :rtype: str
+        """
+        chunk_size = len(text) // (2 * self.section_processes)
+        chunks = src.wpmarkupparser.splitter.split_sections(
+            text, chunk_size, is_header=self._is_header
+        )
+        if len(chunks) == 1:
+            return self._parse(text)
+        sections = self._get_sections([chunk for _, chunk in chunks], {})
+        return self._merge_sections(chunks, sections)
+
+    def _parse_incremental(self, text, revid, parentid):
+        """Parse wiki markup reusing the sections of the parent revision.
+
+        :param str text: text
+        :param int revid: revision ID
+        :param int parentid: parent revision ID
+
+        :returns: text
+        :rtype: str
+        """
+        chunks = src.wpmarkupparser.splitter.split_sections(
+            text, 0, is_header=self._is_header
+        )
+        texts = [chunk for _, chunk in chunks]
+        sections = self._get_sections(texts, self.revisions.get(parentid, {}))
+        if revid:
+            self.revisions[revid] = dict(zip(texts, sections))
+            self.revisions.move_to_end(revid)
+            while len(self.revisions) > self.MAX_REVISIONS:
+                self.revisions.popitem(last=False)
+        return self._merge_sections(chunks, sections)
+
+    def _is_header(self, line):
+        """Check whether header line is matched as a whole.
+
+        :param str line: header line (including its line break)
+
+        :returns: toggle
+        :rtype: bool
+        """
+        wiki_markup = self._get_variant(self._get_features(line))
+        for _, start, end in wiki_markup.scanString(line):
+            return start == 0 and end == len(line)
+        return False
+
+    def _get_sections(self, texts, parsed):
+        """Get parsed sections.
+
+        Sections not parsed yet are parsed by the section processes if
+        they exceed the section size, by the parser itself otherwise.
+
+        :param list texts: section texts
+        :param dict parsed: parsed sections (by text)
+
+        :returns: parsed sections
+        :rtype: list
+        """
+        missing = [
+            text for text in collections.OrderedDict.fromkeys(texts)
+            if text not in parsed
+        ]
+        if (
+                len(missing) > 1
+                and 0 < self.section_size < sum(map(len, missing))
+        ):
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(
+                    self.section_processes,
+                    initializer=_init_section_parser,
+                    initargs=(
+                        self.args, self.localization, self.engine,
+                        self.expander, self.extract, self.collectors
+                    )
+                )
+            sections = self.pool.map(_parse_section, missing)
+        else:
+            sections = [self._parse_section(text) for text in missing]
+        parsed = dict(parsed)
+        parsed.update(zip(missing, sections))
+        return [parsed[text] for text in texts]
+
+    def _parse_section(self, text):
+        """Parse section.
+
+        :param str text: pre-stripped text
+
+        :returns: inclusions, links, categories, output buffer,
+            collector records and expanded templates
+        :rtype: tuple
+        """
+        inclusions, links, categories, templates = (
+            self.inclusions, self.links, self.categories, self.templates
+        )
+        records = [collector.reset() for collector in self.collectors]
+        self._restore()
+        self._parse(text)
+        section = (
+            self.inclusions, self.links, self.categories, self.output,
+            [collector.reset() for collector in self.collectors],
+            frozenset(self.templates)
+        )
+        self.inclusions, self.links, self.categories, self.templates = (
+            inclusions, links, categories, templates
+        )
+        for collector, records_ in zip(self.collectors, records):
+            collector.records = records_
+        return section
+
+    def _merge_sections(self, chunks, sections):
+        """Merge parsed sections.
+
+        :param list chunks: chunks (location, text)
+        :param list sections: parsed sections
+
+        :returns: text
+        :rtype: str
+        """
+        self.output = src.wpmarkupparser.output.OutputBuffer()
+        for (loc, _), section in zip(chunks, sections):
+            inclusions, links, categories, output, records, templates = (
+                section
+            )
+            self.templates.update(templates)
+            # parsed sections may be reused, shift copies
+            self.inclusions.extend(
+                self._shift(inclusion) for inclusion in inclusions
+            )
+            self.links.extend(self._shift(link_) for link_ in links)
+            self.categories.extend(
+                self._intern(category) for category in categories
+            )
+            for collector, records_ in zip(self.collectors, records):
+                collector.records.extend(
+                    self._shift(record) for record in records_
+                )
+            self.output.extend(output, loc)
+        return self.output.getvalue()
+
+    def _shift(self, item):
+        """Shift inclusion, link or collector record by output length.
+
+        :param dict item: inclusion, link or collector record
+
+        :returns: inclusion, link or collector record
+        :rtype: dict
+        """
+        item = dict(item)
+        for key in ("start_doc", "end_doc"):
+            if key in item:
+                item[key] += self.output.length
+        # section processes do not share the intern table
+        for key in ("target", "template"):
+            if key in item:
+                item[key] = self._intern(item[key])
+        return item
+
+    def _intern(self, string):
+        """Get shared string (if interning is enabled).
+
+        :param str string: link target, template or category
+
+        :returns: shared string
+        :rtype: str
+        """
+        if self.interns is None:
+            return string
+        return self.interns.intern(string)
+
+    def close(self):
+        """Close section processes."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        return
+
+    def get_source_location(self, loc):
+        """Map location in the last parsed text to location in wikitext.
+
+        Locations are relative to the wikitext after onlyinclude
+        stripping.
+
+        :param int loc: location in parsed text
+
+        :returns: location in wikitext
+        :rtype: int
+        """
+        if self.restorer is not None:
+            loc = self.restorer.get_parsed_location(loc)
+        loc = self.output.get_source_location(loc)
+        loc = src.wpmarkupparser.prestrip.get_source_location(
+            self.stripped, loc
+        )
+        return loc
+
     def _parse(self, text):
         """Parse wiki markup.
 
@@ -640,20 +1201,155 @@ class ArticleParser(Parser):
         :returns: text
         :rtype: str
         """
-        matches = list(self.wiki_markup.scanString(text))
-        text = ""
-        delta = 0
+        output = src.wpmarkupparser.output.OutputBuffer()
+        for sub, start, end in self._iter_parse(text):
+            output.append(sub, start, end)
+        self.output = output
+        return self.output.getvalue()
+
+    def _iter_parse(self, text):
+        """Parse wiki markup match by match.
+
+        Inclusions, links, categories and collector records of a match
+        are collected before its substitute is yielded.
+
+        :param str text: text
+
+        :returns: substitutes (substitute, start location, end location)
+        :rtype: generator
+        """
+        wiki_markup = self._get_variant(self._get_features(text))
+        matches = wiki_markup.scanString(text)
+        if self.expander is not None:
+            # expansions are parsed while collecting inclusions
+            matches = list(matches)
+        loc = 0
         for toks, start, end in matches:
-            substring_len = end - start
+            if self.collectors and not self.depth:
+                self._call_collectors(loc, toks)
             if "inclusion" in toks:
-                sub = self._collect_inclusion(start-delta, toks)
+                sub = self._collect_inclusion(loc, toks)
             elif "link" in toks:
-                sub = self._collect_link(start-delta, toks)
+                sub = self._collect_link(loc, toks)
             else:
                 sub = toks[0]
-            text += sub
-            delta += (substring_len - len(sub))
-        return text
+            yield sub, start, end
+            loc += len(sub)
+        return
+
+    def iter_events(self, page):
+        """Parse Wikipedia page into events.
+
+        Events (event, value) are yielded as the wiki markup pass
+        produces matches: text chunks ("text"), links ("link"),
+        inclusions ("inclusion"), categories ("category") and collector
+        records (by collector name). Links, inclusions and collector
+        records are those of :meth:`parse`, their locations refer to the
+        concatenated text chunks. Neither text nor records are kept,
+        memory does not grow with page size. Pages are parsed in one
+        pass (neither section-wise nor incrementally), outputs not
+        extracted yield no events.
+
+        :param Page page: page
+
+        :returns: events
+        :rtype: generator
+        """
+        text = self._strip_text(page.text)
+        text, self.stripped, nowikis = self.prestripper.strip(text)
+        restorer = src.wpmarkupparser.prestrip.NowikiRestorer("", nowikis)
+        # location in parsed text and in restored text
+        loc = restored_loc = 0
+        try:
+            for sub, _, _ in self._iter_parse(text):
+                restored_sub = restorer.restore(sub)
+                records = [
+                    ("inclusion", self.inclusions), ("link", self.links)
+                ]
+                records.extend(
+                    (collector.name, collector.reset())
+                    for collector in self.collectors
+                )
+                for event, items in records:
+                    for item in items:
+                        item = {
+                            key: (
+                                restorer.restore(value)
+                                if isinstance(value, str) else value
+                            )
+                            for key, value in item.items()
+                        }
+                        if event == "inclusion":
+                            item["args"] = {
+                                restorer.restore(name): restorer.restore(value)
+                                for name, value in item["args"].items()
+                            }
+                        for key in ("start_doc", "end_doc"):
+                            if key in item:
+                                # location in sub
+                                sub_loc = item[key] - loc
+                                item[key] = restored_loc + len(
+                                    restorer.restore(sub[:sub_loc])
+                                )
+                        yield event, item
+                for category in self.categories:
+                    yield "category", restorer.restore(category)
+                self._restore()
+                if "text" in self.extract and restored_sub:
+                    yield "text", restored_sub
+                loc += len(sub)
+                restored_loc += len(restored_sub)
+        finally:
+            self._restore()
+            for collector in self.collectors:
+                collector.reset()
+        return
+
+    def _call_collectors(self, loc, toks):
+        """Pass match on to collector hooks.
+
+        :param int loc: location of the matching substring
+        :param ParseResults toks: parse results
+        """
+        element = src.wpmarkupparser.collectors.get_element(toks)
+        for collector in self.collectors:
+            collector.collect(element, toks, loc)
+        return
+
+    def _restore_nowikis(self, text, nowikis):
+        """Restore nowiki contents.
+
+        :param str text: text
+        :param dict nowikis: nowiki contents by placeholder
+
+        :returns: text
+        :rtype: str
+        """
+        restorer = src.wpmarkupparser.prestrip.NowikiRestorer(text, nowikis)
+        self.restorer = restorer
+        for inclusion in self.inclusions:
+            inclusion["template"] = restorer.restore(inclusion["template"])
+            inclusion["args"] = {
+                restorer.restore(name): restorer.restore(value)
+                for name, value in inclusion["args"].items()
+            }
+        for link_ in self.links:
+            link_["covered_text"] = restorer.restore(link_["covered_text"])
+            link_["target"] = restorer.restore(link_["target"])
+        for item in self.inclusions + self.links:
+            item["start_doc"] = restorer.restore_location(item["start_doc"])
+            item["end_doc"] = restorer.restore_location(item["end_doc"])
+        self.categories = [
+            restorer.restore(category) for category in self.categories
+        ]
+        for collector in self.collectors:
+            for record in collector.records:
+                for key, value in record.items():
+                    if key in ("start_doc", "end_doc"):
+                        record[key] = restorer.restore_location(value)
+                    elif isinstance(value, str):
+                        record[key] = restorer.restore(value)
+        return restorer.restore(text)
 
     def _collect_inclusion(self, loc, toks):
         """Collect inclusion.
@@ -661,32 +1357,112 @@ class ArticleParser(Parser):
         :param int loc: location of the matching substring
         :param ParseResults toks: parse results
 
-        :returns: template
+        :returns: template (expansion if template expansion is enabled)
         :rtype: str
         """
+        if "pagename" not in toks[0]:
+            # no template, e.g. {{}}
+            return ""
         i = 0
         args = {}
+        # arguments numbered like params
+        params = {}
         if "arg" in toks[0]:
             for arg in toks[0]["arg"]:
-                if "name" in arg:
-                    name = arg["name"]
-                else:
+                name, value = (
+                    src.wpmarkupparser.parse_actions.template.get_arg(arg)
+                )
+                if name is None:
                     name = str(i)
                     i += 1
-                if arg["value"] is not None:
-                    args[name] = arg["value"]
+                    params[str(i)] = value
                 else:
-                    args[name] = ""
-        template_ = "{}:{}".format(toks[0]["namespace"], toks[0]["pagename"])
+                    # named arguments are stripped, positional ones are not
+                    params[name.strip()] = value.strip()
+                args[name] = value
+        template_ = self._intern(
+            "{}:{}".format(toks[0]["namespace"], toks[0]["pagename"])
+        )
         inclusion = {
             "template": template_,
             "args": args,
             "start_doc": loc,
             "end_doc": loc + len(template_)
         }
-        self.inclusions.append(inclusion)
+        if "inclusions" in self.extract:
+            self.inclusions.append(inclusion)
+        if (
+                self.expander is not None
+                and self.depth < self.expander.max_depth
+        ):
+            expansion = self._expand(loc, template_.strip(), params)
+            if expansion is not None:
+                inclusion["end_doc"] = loc + len(expansion)
+                return expansion
         return template_
 
+    def _expand(self, loc, template_, params):
+        """Expand template.
+
+        :param int loc: location of the matching substring
+        :param str template_: template
+        :param dict params: arguments (numbered like params)
+
+        :returns: expansion (None if there is no template)
+        :rtype: str
+        """
+        # absent templates are kept as well, they may be added later
+        self.templates.add(template_)
+        expansion = self.expander.get_expansion(
+            template_, params, self.depth
+        )
+        if expansion is None:
+            text = self.expander.substitute(template_, params)
+            if text is None:
+                return None
+            expansion = self._parse_expansion(text)
+            self.expander.set_expansion(
+                template_, params, self.depth, expansion
+            )
+        text, links, categories, templates = expansion
+        self.templates.update(templates)
+        for link_ in links:
+            link_ = dict(link_)
+            link_["start_doc"] += loc
+            link_["end_doc"] += loc
+            self.links.append(link_)
+        self.categories.extend(categories)
+        return text
+
+    def _parse_expansion(self, text):
+        """Parse expansion (one inclusion nesting level deeper).
+
+        Inclusions of the expansion are not collected.
+
+        :param str text: expansion
+
+        :returns: text, links, categories and expanded templates
+        :rtype: tuple
+        """
+        inclusions, links, categories = (
+            self.inclusions, self.links, self.categories
+        )
+        templates, output = self.templates, self.output
+        self._restore()
+        self.depth += 1
+        try:
+            text = self._parse(text)
+            expansion = (
+                text, self.links, self.categories, frozenset(self.templates)
+            )
+        finally:
+            self.depth -= 1
+            self.inclusions, self.links, self.categories = (
+                inclusions, links, categories
+            )
+            self.templates, self.output = templates, output
+        return expansion
+
     def _collect_link(self, loc, toks):
         """Collect link.
 
@@ -702,12 +1478,13 @@ class ArticleParser(Parser):
             is_category = self._collect_category(toks)
         link_ = {
             "covered_text": label,
-            "target": toks["pagename"].strip(),
+            "target": self._intern(toks["pagename"].strip()),
             "start_doc": loc,
             "end_doc": loc + len(label)
         }
         if not is_category:
-            self.links.append(link_)
+            if "links" in self.extract:
+                self.links.append(link_)
         else:
             if not self.args.categories:
                 label = ""
@@ -722,12 +1499,8 @@ class ArticleParser(Parser):
         :rtype: bool
         """
         is_category = False
-        namespace = toks["namespace"]
-        if namespace in src.wpdata.NAMESPACES["14"]:
-            self.categories.append(toks["pagename"])
+        if toks["namespace"] in self.localization.category_namespaces:
+            if "categories" in self.extract:
+                self.categories.append(self._intern(toks["pagename"]))
             is_category = True
-        elif self.localization is not None:
-            if namespace in self.localization["NAMESPACES"].getlist("14"):
-                self.categories.append(toks["pagename"])
-                is_category = True
         return is_category
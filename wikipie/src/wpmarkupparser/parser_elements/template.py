@@ -123,16 +123,21 @@ def _get_namespace_prefix(namespaces, parse_actions=False):
     return namespace_prefix
 
 
-def _get_pagename(parse_actions=False):
+def _get_pagename(localization=None, parse_actions=False):
     """Get pagename parser element.
 
+    :param LocalizationProfile localization: localization profile
+
     :returns: pagename parser element
     :rtype: ParserElement
     """
     pagename = src.wpmarkupparser.parser_elements.fundamental.get_pagename()
     if parse_actions:
         pagename.setParseAction(
-            src.wpmarkupparser.parse_actions.template.normalize_template
+            lambda toks:
+            src.wpmarkupparser.parse_actions.template.normalize_template(
+                toks, localization=localization
+            )
         )
     return pagename
 
@@ -144,13 +149,16 @@ def _get_full_template(
 
     :param list modifiers: modifiers
     :param list namespaces: namespaces
+    :param LocalizationProfile localization: localization profile
 
     full_template = [ modifier_prefix ], [ namespace_prefix ], pagename;
 
     :returns: full template parser element
     :rtype: ParserElement
     """
-    pagename = _get_pagename(parse_actions=parse_actions)
+    pagename = _get_pagename(
+        localization=localization, parse_actions=parse_actions
+    )
     modifier_prefix = _get_modifier_prefix(
         modifiers, parse_actions=parse_actions
     )
@@ -201,12 +209,12 @@ def _get_named_arg(wiki_markup, parse_actions=False):
 
     :param ParserElement wiki_markup: wiki markup
 
-    named_arg = { any Unicode character without "|=" }, "=", value;
+    named_arg = { any Unicode character without "|={}" }, "=", value;
 
     :returns: named argument parser element
     :rtype: ParserElement
     """
-    name = pyparsing.CharsNotIn("|=").setResultsName("name")
+    name = pyparsing.CharsNotIn("|={}").setResultsName("name")
     name.setName("name")
     name.parseWithTabs()
     value = _get_value(wiki_markup)
@@ -249,6 +257,7 @@ def get_inclusion(
     :param list modifiers: modifiers
     :param list namespaces: namespaces
     :param ParserElement wiki_markup: wiki markup
+    :param LocalizationProfile localization: localization profile
 
     inclusion = "{{", full_template, { arg }, "}}";
     """
@@ -298,5 +307,7 @@ def get_param(wiki_markup, parse_actions=False):
     param.setName("param")
     param.parseWithTabs()
     if parse_actions:
-        pass
+        param.setParseAction(
+            src.wpmarkupparser.parse_actions.template.sub_param
+        )
     return param
@@ -0,0 +1,264 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+.. _`Help:Wikitext`: https://en.wikipedia.org/wiki/Help:Wikitext#Nowiki
+
+:synopsis: Pre-strip comments, nowiki and parser extension tags.
+
+Comments are removed before the wiki markup is parsed (the article
+parser substitutes them with an empty string anyway). The contents of
+nowiki tags (see `Help:Wikitext`_) are replaced with placeholder
+characters, which pass through the parser as plaintext, and are put
+back afterwards. Empty nowiki tags and parser extension tags are
+replaced with a placeholder that is restored as an empty string, so
+they still separate e.g. links from their link trails.
+"""
+
+
+# standard library imports
+import bisect
+import re
+
+# third party imports
+
+# library specific imports
+
+
+# placeholders (supplementary private use area A)
+PLACEHOLDER = 0xF0000
+MAX_PLACEHOLDERS = 0xFFFFE - PLACEHOLDER
+PLACEHOLDER_PATTERN = re.compile("[\U000F0000-\U000FFFFD]")
+
+
+def _get_pattern(parser_extensions):
+    """Get comment, nowiki and parser extension pattern.
+
+    :param list parser_extensions: parser extensions
+
+    :returns: pattern
+    :rtype: SRE_Pattern
+    """
+    tags = sorted(set(parser_extensions) | {"nowiki"}, key=len, reverse=True)
+    tags = "|".join(re.escape(tag) for tag in tags)
+    pattern = re.compile(
+        r"(?P<comment><!--.*?-->)"
+        r"|<(?P<empty>{0})\b[^<>]*?/>"
+        r"|<(?P<tag>{0})\b[^<>]*?>(?P<content>.*?)</(?P=tag)\s*>".format(tags),
+        re.DOTALL | re.IGNORECASE
+    )
+    return pattern
+
+
+class Prestripper(object):
+    """Pre-stripper.
+
+    :ivar list parser_extensions: parser extensions
+    """
+
+    def __init__(self, parser_extensions):
+        """Initialize pre-stripper.
+
+        :param list parser_extensions: parser extensions
+        """
+        self.parser_extensions = parser_extensions
+        self._pattern = _get_pattern(parser_extensions)
+        return
+
+    def strip(self, text):
+        """Strip comments, nowiki and parser extension tags.
+
+        :param str text: text
+
+        :returns: text, stripped spans and nowiki contents by placeholder
+        :rtype: tuple
+        """
+        segments = []
+        spans = []
+        nowikis = {}
+        # placeholder of empty nowiki and parser extension tags
+        empty = ""
+        pos = 0
+        # placeholders have to be unambiguous
+        protect = PLACEHOLDER_PATTERN.search(text) is None
+        for match in self._pattern.finditer(text):
+            tag = match.group("tag")
+            if tag is not None and tag.lower() == "nowiki":
+                if not protect or len(nowikis) == MAX_PLACEHOLDERS:
+                    continue
+                sub = chr(PLACEHOLDER + len(nowikis))
+                nowikis[sub] = match.group("content")
+            elif match.group("comment") is not None:
+                sub = ""
+            else:
+                if (
+                        not empty and protect
+                        and len(nowikis) < MAX_PLACEHOLDERS
+                ):
+                    empty = chr(PLACEHOLDER + len(nowikis))
+                    nowikis[empty] = ""
+                sub = empty
+            segments.append(text[pos:match.start()])
+            segments.append(sub)
+            spans.append((match.start(), match.end(), len(sub)))
+            pos = match.end()
+        if not spans:
+            return text, spans, nowikis
+        segments.append(text[pos:])
+        return "".join(segments), spans, nowikis
+
+
+def get_source_location(spans, loc):
+    """Map location in stripped text to location in source text.
+
+    :param list spans: stripped spans (start, end, substitute length)
+    :param int loc: location in stripped text
+
+    :returns: location in source text
+    :rtype: int
+    """
+    delta = 0
+    for start, end, length in spans:
+        if start - delta > loc:
+            break
+        if start - delta + length > loc:
+            # inside substitute
+            return start
+        delta += end - start - length
+    return loc + delta
+
+
+class SourceMap(object):
+    """Map locations in stripped text to locations in source text.
+
+    Equivalent to :func:`get_source_location`, but the cumulative shifts
+    are computed once, so every lookup is a binary search.
+    """
+
+    def __init__(self, spans):
+        """Initialize source map.
+
+        :param list spans: stripped spans (start, end, substitute length)
+        """
+        # stripped span locations, source span locations, substitute
+        # lengths and cumulative shifts
+        self._locs = []
+        self._source_locs = []
+        self._lengths = []
+        self._shifts = []
+        shift = 0
+        for start, end, length in spans:
+            self._locs.append(start - shift)
+            self._source_locs.append(start)
+            self._lengths.append(length)
+            shift += end - start - length
+            self._shifts.append(shift)
+        return
+
+    def get_source_location(self, loc):
+        """Map location in stripped text to location in source text.
+
+        Locations inside substitutes are mapped to the span start.
+
+        :param int loc: location in stripped text
+
+        :returns: location in source text
+        :rtype: int
+        """
+        i = bisect.bisect_right(self._locs, loc)
+        if i == 0:
+            return loc
+        if loc < self._locs[i-1] + self._lengths[i-1]:
+            return self._source_locs[i-1]
+        return loc + self._shifts[i-1]
+
+
+class NowikiRestorer(object):
+    """Restore nowiki contents in parsed text.
+
+    :ivar dict nowikis: nowiki contents by placeholder
+    """
+
+    def __init__(self, text, nowikis):
+        """Initialize nowiki restorer.
+
+        :param str text: parsed text (with placeholders)
+        :param dict nowikis: nowiki contents by placeholder
+        """
+        self.nowikis = nowikis
+        self._table = {
+            ord(placeholder): content
+            for placeholder, content in nowikis.items()
+        }
+        # placeholder locations, restored locations, content lengths and
+        # cumulative shifts
+        self._locs = []
+        self._restored_locs = []
+        self._lengths = []
+        self._shifts = []
+        shift = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.group() not in nowikis:
+                continue
+            self._locs.append(match.start())
+            self._restored_locs.append(match.start() + shift)
+            self._lengths.append(len(nowikis[match.group()]))
+            shift += self._lengths[-1] - 1
+            self._shifts.append(shift)
+        return
+
+    def restore(self, text):
+        """Restore nowiki contents.
+
+        :param str text: text
+
+        :returns: text
+        :rtype: str
+        """
+        if not self._table:
+            return text
+        return text.translate(self._table)
+
+    def restore_location(self, loc):
+        """Map location in parsed text to location in restored text.
+
+        :param int loc: location
+
+        :returns: location
+        :rtype: int
+        """
+        i = bisect.bisect_left(self._locs, loc)
+        if i == 0:
+            return loc
+        return loc + self._shifts[i-1]
+
+    def get_parsed_location(self, loc):
+        """Map location in restored text to location in parsed text.
+
+        Locations inside nowiki contents are mapped to the placeholder.
+
+        :param int loc: location
+
+        :returns: location
+        :rtype: int
+        """
+        i = bisect.bisect_right(self._restored_locs, loc)
+        if i == 0:
+            return loc
+        if loc < self._restored_locs[i-1] + self._lengths[i-1]:
+            return self._locs[i-1]
+        return loc - self._shifts[i-1]
@@ -0,0 +1,134 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+.. _`Help:Section`: https://en.wikipedia.org/wiki/Help:Section
+
+:synopsis: Split wiki markup at top-level header boundaries.
+
+Headers (see `Help:Section`_) are top-level if they are not enclosed
+by an inclusion, a link, a table or a multi-line tag. Text is split
+after top-level header lines, so that each chunk parses exactly like
+the corresponding part of the whole text on well-formed pages. Header
+lines the parser does not match as a whole (e.g. headers containing
+links) are skipped, since the match following them may own their line
+break, and so are header lines opening enclosing wiki markup.
+Splitting is done on pre-stripped text (no comments or parser
+extensions left).
+"""
+
+
+# standard library imports
+import re
+
+# third party imports
+
+# library specific imports
+
+
+# enclosing wiki markup (opening, closing)
+_ENCLOSING = [
+    ("{{", "}}"), ("[[", "]]"), ("{|", "|}"),
+    ("<noinclude>", "</noinclude>"), ("<p>", "</p>"),
+    ("<cite>", "</cite>"), ("<abbr", "</abbr>")
+]
+
+_DELIMITERS = sorted(
+    (delimiter for delimiters in _ENCLOSING for delimiter in delimiters),
+    key=len, reverse=True
+)
+
+# header lines and enclosing wiki markup
+_PATTERN = re.compile(
+    r"(?P<header>(?<=\n)"
+    r"(?:(?P<level>={1,6})[^=\n][^\n]*(?<=[^=])(?P=level)"
+    r"|<h(?P<tag>[1-6])>[^\n]*</h(?P=tag)>)\n)"
+    r"|(?P<enclosing>"
+    + "|".join(re.escape(delimiter) for delimiter in _DELIMITERS)
+    + ")"
+)
+
+_DELIMITER = re.compile(
+    "|".join(re.escape(delimiter) for delimiter in _DELIMITERS)
+)
+
+_OPENING = {opening: i for i, (opening, _) in enumerate(_ENCLOSING)}
+_CLOSING = {closing: i for i, (_, closing) in enumerate(_ENCLOSING)}
+
+
+def get_boundaries(text, is_header=None):
+    """Get top-level header boundaries.
+
+    :param str text: text
+    :param function is_header: checks whether a header line (including
+        its line break) is matched as a whole (None accepts all of them)
+
+    :returns: locations following top-level header lines
+    :rtype: list
+    """
+    boundaries = []
+    depths = [0] * len(_ENCLOSING)
+    for match in _PATTERN.finditer(text):
+        if match.group("header") is not None:
+            enclosed = any(depths)
+            # header lines may open enclosing wiki markup themselves
+            for delimiter in _DELIMITER.findall(match.group("header")):
+                _update(depths, delimiter)
+            if not enclosed and not any(depths) and (
+                    is_header is None or is_header(match.group("header"))
+            ):
+                boundaries.append(match.end())
+            continue
+        _update(depths, match.group("enclosing"))
+    return boundaries
+
+
+def _update(depths, delimiter):
+    """Update depths of enclosing wiki markup.
+
+    :param list depths: depths
+    :param str delimiter: opening or closing delimiter
+    """
+    if delimiter in _OPENING:
+        depths[_OPENING[delimiter]] += 1
+    elif depths[_CLOSING[delimiter]] > 0:
+        depths[_CLOSING[delimiter]] -= 1
+    return
+
+
+def split_sections(text, chunk_size, is_header=None):
+    """Split text at top-level header boundaries.
+
+    Adjacent sections are merged into chunks of at least chunk size
+    characters (except for the last one).
+
+    :param str text: text
+    :param int chunk_size: chunk size
+    :param function is_header: checks whether a header line (including
+        its line break) is matched as a whole (None accepts all of them)
+
+    :returns: chunks (location, text)
+    :rtype: list
+    """
+    chunks = []
+    start = 0
+    for boundary in get_boundaries(text, is_header=is_header):
+        if boundary - start >= chunk_size:
+            chunks.append((start, text[start:boundary]))
+            start = boundary
+    chunks.append((start, text[start:]))
+    return chunks
@@ -21,14 +21,133 @@
 
 
 # standard library imports
+import os
+import time
+import uuid
+import random
 import multiprocessing
 
 # third party imports
+import bson
+import bson.raw_bson
 import pymongo
 
 # library specific imports
 
 
+#: duplicate key error code
+DUPLICATE_KEY = 11000
+#: secondary indexes (collection, field) queried downstream and during
+#: template expansion (article titles)
+INDEXES = [
+    ("article", "title"),
+    ("inclusion", "WP_page_id"),
+    ("inclusion", "template"),
+    ("IWL", "WP_page_id"),
+    ("IWL", "target")
+]
+
+#: default dead-letter directory
+DEAD_LETTER = "dead_letter"
+#: client options (by config key): option and type
+CLIENT_OPTIONS = {
+    "max_pool_size": ("maxPoolSize", int),
+    "min_pool_size": ("minPoolSize", int),
+    "max_idle_time": ("maxIdleTimeMS", int),
+    "compressors": ("compressors", str),
+    "zlib_compression_level": ("zlibCompressionLevel", int),
+    "connect_timeout": ("connectTimeoutMS", int),
+    "socket_timeout": ("socketTimeoutMS", int),
+    "server_selection_timeout": ("serverSelectionTimeoutMS", int),
+    "wait_queue_timeout": ("waitQueueTimeoutMS", int)
+}
+
+
+def _is_retryable(exception):
+    """Check whether error is transient (e.g. primary stepdown, network
+    error).
+
+    :param PyMongoError exception: error
+
+    :returns: toggle
+    :rtype: bool
+    """
+    if isinstance(exception, pymongo.errors.AutoReconnect):
+        return True
+    return exception.has_error_label("RetryableWriteError")
+
+
+def _get_spool(pid):
+    """Get unique dead-letter file name suffix.
+
+    :param int pid: process ID
+
+    :returns: dead-letter file name suffix
+    :rtype: str
+    """
+    return "{}.{}.{}".format(pid, int(time.time()), uuid.uuid4().hex[:8])
+
+
+def get_client_options(section):
+    """Get client options (empty or missing keys keep the defaults).
+
+    :param SectionProxy section: mongoDB config section
+
+    :returns: client options
+    :rtype: dict
+    """
+    options = {}
+    for key, (option, type_) in CLIENT_OPTIONS.items():
+        value = section.get(key, fallback="")
+        if value:
+            options[option] = type_(value)
+    return options
+
+
+def get_retry_options(section):
+    """Get retry options.
+
+    :param SectionProxy section: mongoDB config section
+
+    :returns: maximum number of retries and dead-letter directory
+    :rtype: dict
+    """
+    options = {
+        "max_retries": int(section.get("max_retries", fallback="") or 5),
+        "dead_letter": section.get("dead_letter", fallback="") or DEAD_LETTER
+    }
+    return options
+
+
+def get_write_concern(w="", journal=None, bulk_load=False):
+    """Get write concern.
+
+    :param str w: write concern (number of acknowledging members or tag,
+        empty string for the server default)
+    :param journal: toggle journal acknowledgement (None for the server
+        default)
+    :type journal: bool or None
+    :param bool bulk_load: toggle bulk-load defaults (acknowledged by
+        the primary only, without journaling)
+
+    :returns: write concern (None for the server default)
+    :rtype: WriteConcern
+    """
+    if bulk_load:
+        if not w:
+            w = "1"
+        if journal is None:
+            journal = False
+    if not w and journal is None:
+        return None
+    kwargs = {}
+    if w:
+        kwargs["w"] = int(w) if w.isdigit() else w
+    if journal is not None:
+        kwargs["j"] = journal
+    return pymongo.WriteConcern(**kwargs)
+
+
 def _get_page_record(page):
     """Get page record.
 
@@ -39,12 +158,13 @@ def _get_page_record(page):
     """
     record = {                      # article OR template
         "title": page.title,
-        "_id": int(page.pageid),
+        "_id": page.pageid,
         "redirect": page.redirect,
-        "revid": int(page.revid),
-        "content": page.text,
+        "revid": page.revid,
     }
-    if hasattr(page, "categories"):   # article
+    if page.text is not None:       # not extracted otherwise
+        record["content"] = page.text
+    if getattr(page, "categories", None) is not None:   # article
         record["category"] = page.categories
     if hasattr(page, "params"):     # template
         record["params"] = page.params
@@ -54,47 +174,294 @@ def _get_page_record(page):
 def _get_inclusion_record(pageid, inclusion):
     """Get inclusion record.
 
-    :param str pageid: Wikipedia page ID
+    :param int pageid: Wikipedia page ID
     :param dict inclusion: inclusion
 
     :returns: inclusion record
     :rtype: dict
     """
-    record = inclusion
-    record["WP_page_id"] = int(pageid)
+    record = _get_buffered_inclusion_record(
+        pageid, inclusion["template"], inclusion["args"],
+        inclusion["start_doc"], inclusion["end_doc"]
+    )
+    return record
+
+
+def _get_buffered_inclusion_record(pageid, template, args, start, end):
+    """Get inclusion record (from inclusion buffer fields).
+
+    :param int pageid: Wikipedia page ID
+    :param str template: template
+    :param dict args: arguments
+    :param int start: start location
+    :param int end: end location
+
+    :returns: inclusion record
+    :rtype: dict
+    """
+    record = {
+        "template": template,
+        "args": args,
+        "start_doc": start,
+        "end_doc": end,
+        "WP_page_id": pageid
+    }
     return record
 
 
 def _get_link_record(pageid, link):
     """Get link record.
 
-    :param str pageid: Wikipedia page ID
+    :param int pageid: Wikipedia page ID
     :param dict link: link
 
     :returns: link record
     :rtype: dict
     """
-    record = link
-    record["WP_page_id"] = int(pageid)
-    record["sen_id"] = -1
-    record["start_sen"] = -1
-    record["end_sen"] = -1
+    record = _get_buffered_link_record(
+        pageid, link["covered_text"], link["target"],
+        link["start_doc"], link["end_doc"]
+    )
     return record
 
 
+def _get_buffered_link_record(pageid, covered_text, target, start, end):
+    """Get link record (from link buffer fields).
+
+    :param int pageid: Wikipedia page ID
+    :param str covered_text: covered text
+    :param str target: target
+    :param int start: start location
+    :param int end: end location
+
+    :returns: link record
+    :rtype: dict
+    """
+    record = {
+        "covered_text": covered_text,
+        "target": target,
+        "start_doc": start,
+        "end_doc": end,
+        "WP_page_id": pageid,
+        "sen_id": -1,
+        "start_sen": -1,
+        "end_sen": -1
+    }
+    return record
+
+
+class WriteBuffer(object):
+    """Write buffer (of one collection).
+
+    Records are encoded once, when they are buffered. The buffer is due
+    once it holds batch size records or MAX_BATCH_BYTES bytes, or once
+    its oldest record is older than the flush interval. The batch size
+    is halved when an insert takes longer than the target latency and
+    grows by a quarter when a full batch takes less than half of it.
+    Page record buffers are keyed (by page ID and revision ID) and taken
+    in key order, so that batches are appended to the _id index.
+
+    :cvar int MIN_BATCH_SIZE: minimum batch size
+    :cvar int MAX_BATCH_SIZE: maximum batch size
+    :cvar int MAX_BATCH_BYTES: maximum batch size (in bytes)
+    :ivar list records: encoded records
+    :ivar list keys: record keys (page ID and revision ID, None if the
+        records are not keyed)
+    :ivar int size: size of the encoded records (in bytes)
+    :ivar float time: time the oldest record was buffered (None if the
+        buffer is empty)
+    :ivar int batch_size: batch size
+    :ivar float flush_interval: flush interval (in sec)
+    :ivar float target_latency: target insert latency (in sec)
+    :ivar bool replace: toggle replacing records with the same ID (and
+        an older or the same revision) instead of inserting them
+    """
+    MIN_BATCH_SIZE = 100
+    # https://docs.mongodb.com/manual/reference/limits/#operations
+    MAX_BATCH_SIZE = 100000
+    # well below the message size limit (maxMessageSizeBytes, 48,000,000
+    # bytes), leaving room for the command and per-document overhead
+    MAX_BATCH_BYTES = 40 * 1000 * 1000
+
+    def __init__(
+            self, batch_size=1000, flush_interval=5.0, target_latency=1.0,
+            replace=False
+    ):
+        """Initialize write buffer.
+
+        :param int batch_size: initial batch size
+        :param float flush_interval: flush interval (in sec)
+        :param float target_latency: target insert latency (in sec)
+        :param bool replace: toggle replacing records with the same ID
+            (and an older or the same revision) instead of inserting them
+        """
+        self.records = []
+        self.keys = []
+        self.size = 0
+        self.time = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.target_latency = target_latency
+        self.replace = replace
+        return
+
+    def __len__(self):
+        """Get number of buffered records.
+
+        :returns: number of buffered records
+        :rtype: int
+        """
+        return len(self.records)
+
+    def fits(self, record):
+        """Check whether encoded record fits into the buffer.
+
+        :param RawBSONDocument record: encoded record
+
+        :returns: toggle
+        :rtype: bool
+        """
+        return self.size + len(record.raw) <= self.MAX_BATCH_BYTES
+
+    def append(self, record, key=None):
+        """Append encoded record.
+
+        :param RawBSONDocument record: encoded record
+        :param tuple key: page ID and revision ID (None if the records
+            are not keyed)
+        """
+        if self.time is None:
+            self.time = time.monotonic()
+        self.records.append(record)
+        self.keys.append(key)
+        self.size += len(record.raw)
+        return
+
+    def is_full(self):
+        """Check whether buffer holds batch size records.
+
+        :returns: toggle
+        :rtype: bool
+        """
+        return len(self.records) >= self.batch_size
+
+    def is_due(self, now=None):
+        """Check whether buffer is due.
+
+        :param float now: current time (monotonic clock)
+
+        :returns: toggle
+        :rtype: bool
+        """
+        if not self.records:
+            return False
+        if self.is_full() or self.size >= self.MAX_BATCH_BYTES:
+            return True
+        if now is None:
+            now = time.monotonic()
+        return now - self.time >= self.flush_interval
+
+    def take(self):
+        """Take buffered records (empties buffer).
+
+        :returns: keys and encoded records (in key order if keyed)
+        :rtype: tuple
+        """
+        keys, records = self.keys, self.records
+        if keys and keys[0] is not None:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            keys = [keys[i] for i in order]
+            records = [records[i] for i in order]
+        self.keys = []
+        self.records = []
+        self.size = 0
+        self.time = None
+        return keys, records
+
+    def adapt(self, latency, count):
+        """Adapt batch size to insert latency.
+
+        :param float latency: insert latency (in sec)
+        :param int count: number of inserted records
+        """
+        if latency > self.target_latency:
+            self.batch_size = max(self.MIN_BATCH_SIZE, self.batch_size // 2)
+        elif latency < self.target_latency / 2 and count >= self.batch_size:
+            self.batch_size = min(
+                self.MAX_BATCH_SIZE, self.batch_size + self.batch_size // 4
+            )
+        return
+
+
 class WPMongo(object):
     """mongoDB interface.
 
-    :cvar int MAX_BULK_SIZE: maximum bulk operation size
+    Records are written through per-collection write buffers, which
+    combine the records of many pages; buffers are flushed when they are
+    due (checked on every write) and when the connection is closed.
+    Unordered writes (bulk-load mode) insert all records of a batch but
+    the failing ones, which are reported one by one.
+
+    In upsert mode, writes are idempotent: page records replace the
+    stored ones with the same page ID unless those are of a later
+    revision, and the inclusion and link records of a page replace its
+    stored ones (deleted before the first record of the page is
+    inserted). Given its revision ID, the records of a page wait for the
+    upsert of its page record (written after them); they are dropped
+    (and the stored ones kept) if the stored page record is of a later
+    revision.
+
+    Transient errors are retried with exponential backoff and full
+    jitter; the records of batches that still fail, and the records a
+    bulk write rejects, are spooled to a dead-letter file per
+    collection and connection (concatenated BSON documents), which
+    :meth:`replay` reinserts. Dead-letter file names are unique (process
+    ID and a random suffix), so that no file is appended to by two
+    connections or while it is replayed.
+
+    :cvar int MAX_BULK_SIZE: initial bulk operation size
+    :cvar float RETRY_DELAY: base retry delay (in sec)
+    :cvar float MAX_RETRY_DELAY: maximum retry delay (in sec)
     :ivar int pid: process ID
     :ivar str db: mongoDB
     :ivar str host: host
     :ivar str port: port
+    :ivar dict buffers: write buffers (by collection)
+    :ivar float flush_interval: write buffer flush interval (in sec)
+    :ivar float target_latency: target insert latency (in sec)
+    :ivar bool ordered: toggle ordered writes
+    :ivar WriteConcern write_concern: write concern (None for the server
+        default)
+    :ivar bool bypass_validation: toggle bypassing document validation
+    :ivar bool upsert: toggle upsert mode
+    :ivar dict deletes: IDs of the pages whose stored records are to be
+        deleted (by collection)
+    :ivar set indexed: collections whose page ID index was created
+    :ivar dict pending: collections to delete the stored records of and
+        records (by collection) waiting for the upsert of a page record
+        (by page ID and revision ID)
+    :ivar set lost: page IDs and revision IDs of flushed page records
+        skipped in favor of stored later revisions (until resolved)
+    :ivar int errors: number of records that failed to be inserted
+    :ivar int skipped: number of page records skipped (in favor of
+        stored later revisions)
+    :ivar int max_retries: maximum number of retries
+    :ivar str dead_letter: dead-letter directory (None disables
+        spooling)
+    :ivar int spooled: number of records spooled
+    :ivar str spool: dead-letter file name suffix
     """
     # https://docs.mongodb.com/manual/reference/limits/#operations
     MAX_BULK_SIZE = 1000
+    RETRY_DELAY = 0.5
+    MAX_RETRY_DELAY = 30.0
 
-    def __init__(self, pid, db, host, port, username="", password=""):
+    def __init__(
+            self, pid, db, host, port, username="", password="",
+            flush_interval=5.0, target_latency=1.0, ordered=True,
+            write_concern=None, bypass_validation=False, upsert=False,
+            client_options=None, max_retries=5, dead_letter=None
+    ):
         """Connect to mongoDB.
 
         :param int pid: process ID
@@ -103,7 +470,38 @@ class WPMongo(object):
         :param int port: port
         :param str username: username
         :param str password: password
+        :param float flush_interval: write buffer flush interval (in sec)
+        :param float target_latency: target insert latency (in sec)
+        :param bool ordered: toggle ordered writes (stop at the first
+            failing record of a batch)
+        :param WriteConcern write_concern: write concern (None for the
+            server default)
+        :param bool bypass_validation: toggle bypassing document
+            validation
+        :param bool upsert: toggle upsert mode
+        :param dict client_options: client options (pool size, wire
+            compression, timeouts)
+        :param int max_retries: maximum number of retries
+        :param str dead_letter: dead-letter directory (None disables
+            spooling)
         """
+        self.buffers = {}
+        self.flush_interval = flush_interval
+        self.target_latency = target_latency
+        self.ordered = ordered
+        self.write_concern = write_concern
+        self.bypass_validation = bypass_validation
+        self.upsert = upsert
+        self.deletes = {}
+        self.indexed = set()
+        self.pending = {}
+        self.lost = set()
+        self.errors = 0
+        self.skipped = 0
+        self.max_retries = max_retries
+        self.dead_letter = dead_letter
+        self.spooled = 0
+        self.spool = _get_spool(pid)
         try:
             logger = multiprocessing.get_logger().getChild(__name__)
             logger.info(
@@ -114,12 +512,13 @@ class WPMongo(object):
             self.db = db
             self.host = host
             self.port = port
+            client_options = dict(client_options or {})
             if username and password:
-                self.client = pymongo.MongoClient(
-                    host=host, port=port, username=username, password=password
-                )
-            else:
-                self.client = pymongo.MongoClient(host=host, port=port)
+                client_options["username"] = username
+                client_options["password"] = password
+            self.client = pymongo.MongoClient(
+                host=host, port=port, **client_options
+            )
         except:
             logger.exception(
                 "worker %s failed to connect to mongoDB %s (%s, %s)",
@@ -129,57 +528,592 @@ class WPMongo(object):
         return
 
     def insert_pages(self, pages, collection="article"):
-        """Insert page record.
+        """Insert page records.
 
         :param list pages: pages
         :param str collection: collection
         """
-        try:
-            logger = multiprocessing.get_logger().getChild(__name__)
-            records = [_get_page_record(page) for page in pages]
-            logger.debug("insert %d pages", len(records))
-            self.client[self.db][collection].insert_many(records)
-        except pymongo.errors.PyMongoError:
-            logger.error("failed to insert pages")
+        self._write(
+            collection, (_get_page_record(page) for page in pages),
+            replace=self.upsert, keyed=True
+        )
+        return
+
+    def delete_records(self, pageid, collection, revid=None):
+        """Delete stored records of page (before its first record is
+        inserted).
+
+        Given the revision ID, stored records are only deleted (and the
+        new ones of the same revision only inserted) once the upsert of
+        the page record wins, so the page record has to be written after
+        its records.
+
+        :param int pageid: Wikipedia page ID
+        :param str collection: collection
+        :param int revid: revision ID
+        """
+        self._get_buffer(collection)
+        if revid is not None:
+            collections, _ = self.pending.setdefault(
+                (pageid, revid), (set(), {})
+            )
+            collections.add(collection)
+            return
+        pageids = self.deletes.setdefault(collection, set())
+        pageids.add(pageid)
+        if len(pageids) >= self.MAX_BULK_SIZE:
+            self._delete(collection)
         return
 
-    def insert_inclusions(self, pageid, inclusions, collection="inclusion"):
+    def insert_inclusions(
+            self, pageid, inclusions, collection="inclusion", revid=None
+    ):
         """Insert inclusion records.
 
-        :param str pageid: Wikipedia page ID
+        :param int pageid: Wikipedia page ID
         :param dict inclusions: inclusions
         :param str collection: collection
+        :param int revid: revision ID (see :meth:`delete_records`)
         """
-        try:
-            logger = multiprocessing.get_logger().getChild(__name__)
-            records = [
+        self._write(
+            collection,
+            (
                 _get_inclusion_record(pageid, inclusion)
                 for inclusion in inclusions
-            ]
-            logger.debug("insert %d inclusions (%s)", len(records), pageid)
-            self.client[self.db][collection].insert_many(records)
-        except pymongo.errors.PyMongoError:
-            logger.error("failed to insert inclusions (%s)", pageid)
+            ),
+            revid=revid
+        )
         return
 
-    def insert_links(self, pageid, links, collection="IWL"):
+    def insert_links(self, pageid, links, collection="IWL", revid=None):
         """Insert links.
 
-        :param str pageid: Wikipedia page ID
+        :param int pageid: Wikipedia page ID
         :param dict links: links
+        :param str collection: collection
+        :param int revid: revision ID (see :meth:`delete_records`)
+        """
+        self._write(
+            collection, (_get_link_record(pageid, link) for link in links),
+            revid=revid
+        )
+        return
+
+    def insert_inclusion_buffer(
+            self, inclusions, collection="inclusion", revid=None
+    ):
+        """Insert buffered inclusion records.
+
+        :param InclusionBuffer inclusions: inclusion buffer
+        :param str collection: collection
+        :param int revid: revision ID (see :meth:`delete_records`, the
+            buffer holds the records of one page only then)
+        """
+        self._write(
+            collection,
+            (_get_buffered_inclusion_record(*fields) for fields in inclusions),
+            revid=revid
+        )
+        return
+
+    def insert_link_buffer(self, links, collection="IWL", revid=None):
+        """Insert buffered link records.
+
+        :param LinkBuffer links: link buffer
+        :param str collection: collection
+        :param int revid: revision ID (see :meth:`delete_records`, the
+            buffer holds the records of one page only then)
+        """
+        self._write(
+            collection,
+            (_get_buffered_link_record(*fields) for fields in links),
+            revid=revid
+        )
+        return
+
+    def _get_buffer(self, collection, replace=False):
+        """Get write buffer.
+
+        :param str collection: collection
+        :param bool replace: toggle replacing records
+
+        :returns: write buffer
+        :rtype: WriteBuffer
+        """
+        if collection not in self.buffers:
+            self.buffers[collection] = WriteBuffer(
+                batch_size=self.MAX_BULK_SIZE,
+                flush_interval=self.flush_interval,
+                target_latency=self.target_latency,
+                replace=replace
+            )
+        return self.buffers[collection]
+
+    def _get_collection(self, collection):
+        """Get collection (with write concern).
+
+        :param str collection: collection
+
+        :returns: collection
+        :rtype: Collection
+        """
+        return self.client[self.db].get_collection(
+            collection, write_concern=self.write_concern
+        )
+
+    def _write(
+            self, collection, records, replace=False, keyed=False,
+            revid=None
+    ):
+        """Write records (through write buffer).
+
+        :param str collection: collection
+        :param iterable records: records
+        :param bool replace: toggle replacing records
+        :param bool keyed: toggle keying records by page ID and revision
+            ID (page records only)
+        :param int revid: revision ID of the records (None if they do
+            not wait for the upsert of their page record)
+        """
+        buffer_ = self._get_buffer(collection, replace=replace)
+        for record in records:
+            if keyed:
+                key = (record["_id"], record["revid"])
+                if replace:
+                    self.pending.setdefault(key, (set(), {}))
+            else:
+                key = None
+                if revid is not None and self._defer(
+                        collection, record, (record["WP_page_id"], revid)
+                ):
+                    continue
+            if "_id" not in record:
+                # like insert_many, retried inserts are then detected
+                record["_id"] = bson.ObjectId()
+            record = bson.raw_bson.RawBSONDocument(bson.encode(record))
+            if not buffer_.fits(record):
+                self._flush(collection, buffer_)
+            buffer_.append(record, key=key)
+            if buffer_.is_full():
+                self._flush(collection, buffer_)
+        now = time.monotonic()
+        for name, buffer_ in list(self.buffers.items()):
+            if buffer_.is_due(now=now):
+                self._flush(name, buffer_)
+        return
+
+    def _defer(self, collection, record, key):
+        """Defer record until the upsert of its page record.
+
+        :param str collection: collection
+        :param dict record: record
+        :param tuple key: page ID and revision ID of the page record
+
+        :returns: toggle (deferred)
+        :rtype: bool
+        """
+        if key not in self.pending:
+            return False
+        records = self.pending[key][1]
+        records.setdefault(collection, []).append(record)
+        return True
+
+    def _resolve(self, keys):
+        """Replace the records of pages whose page record upserts won
+        (drop those of pages whose upserts lost).
+
+        :param list keys: page IDs and revision IDs of the page records
+        """
+        for key in keys:
+            collections, records = self.pending.pop(key, ((), {}))
+            if key in self.lost:
+                self.lost.discard(key)
+                continue
+            for collection in collections:
+                self.delete_records(key[0], collection)
+            for collection, records_ in records.items():
+                self._write(collection, records_)
+        return
+
+    def _retry(self, operation):
+        """Run operation, retrying transient errors.
+
+        :param callable operation: operation (called with the number of
+            the attempt)
+
+        :returns: result
+        """
+        logger = multiprocessing.get_logger().getChild(__name__)
+        attempt = 0
+        while True:
+            try:
+                return operation(attempt)
+            except pymongo.errors.BulkWriteError:
+                raise
+            except pymongo.errors.PyMongoError as exception:
+                if (
+                        attempt >= self.max_retries
+                        or not _is_retryable(exception)
+                ):
+                    raise
+                # exponential backoff, full jitter
+                delay = random.uniform(
+                    0, min(self.MAX_RETRY_DELAY, self.RETRY_DELAY * 2**attempt)
+                )
+                attempt += 1
+                logger.warning(
+                    "retry %d of %d in %f sec (%s)",
+                    attempt, self.max_retries, delay, exception
+                )
+                time.sleep(delay)
+
+    def _delete(self, collection):
+        """Delete stored records of pages.
+
         :param str collection: collection
         """
+        pageids = self.deletes.pop(collection, None)
+        if not pageids:
+            return
+
+        def delete(attempt):
+            collection_ = self._get_collection(collection)
+            if collection not in self.indexed:
+                collection_.create_index("WP_page_id")
+                self.indexed.add(collection)
+            return collection_.delete_many(
+                {"WP_page_id": {"$in": list(pageids)}}
+            )
         try:
             logger = multiprocessing.get_logger().getChild(__name__)
-            records = [_get_link_record(pageid, link) for link in links]
-            logger.debug("insert %d links (%s)", len(records), pageid)
-            self.client[self.db][collection].insert_many(records)
+            result = self._retry(delete)
         except pymongo.errors.PyMongoError:
-            logger.error("failed to insert links (%s)", pageid)
+            logger.error(
+                "failed to delete records of %d pages (%s)",
+                len(pageids), collection
+            )
+            return
+        if result.acknowledged:
+            logger.debug(
+                "delete %d records of %d pages (%s)",
+                result.deleted_count, len(pageids), collection
+            )
         return
 
+    def _flush(self, collection, buffer_, replay=False):
+        """Flush write buffer.
+
+        :param str collection: collection
+        :param WriteBuffer buffer_: write buffer
+        :param bool replay: toggle replayed records (unordered writes,
+            records may have been inserted before they were spooled)
+
+        :returns: number of records written
+        :rtype: int
+        """
+        # stored records are deleted before the first new one is inserted
+        self._delete(collection)
+        if not buffer_:
+            return 0
+        size = buffer_.size
+        keys, records = buffer_.take()
+        attempts = []
+
+        def write(attempt):
+            attempts.append(attempt)
+            if buffer_.replace:
+                # the revision guard makes the order irrelevant
+                return self._get_collection(collection).bulk_write(
+                    [
+                        pymongo.ReplaceOne(
+                            {"_id": pageid, "revid": {"$lte": revid}},
+                            record, upsert=True
+                        )
+                        for (pageid, revid), record in zip(keys, records)
+                    ],
+                    ordered=False,
+                    bypass_document_validation=self.bypass_validation
+                )
+            # retried and replayed inserts get past the records inserted
+            # by earlier attempts
+            return self._get_collection(collection).insert_many(
+                records, ordered=self.ordered and not (attempt or replay),
+                bypass_document_validation=self.bypass_validation
+            )
+        try:
+            logger = multiprocessing.get_logger().getChild(__name__)
+            time0 = time.monotonic()
+            self._retry(write)
+            latency = time.monotonic() - time0
+        except pymongo.errors.BulkWriteError as exception:
+            latency = time.monotonic() - time0
+            self._report(
+                collection, buffer_, records, exception.details,
+                retried=attempts[-1] > 0 or replay, keys=keys
+            )
+            written = (
+                exception.details["nInserted"]
+                + exception.details["nUpserted"]
+                + exception.details["nMatched"]
+            )
+        except pymongo.errors.PyMongoError:
+            logger.error(
+                "failed to insert %d records (%s)", len(records), collection
+            )
+            self.errors += len(records)
+            self._spool(collection, records)
+            if buffer_.replace:
+                # replayed later
+                self._resolve(keys)
+            return 0
+        else:
+            written = len(records)
+        if buffer_.replace:
+            self._resolve(keys)
+        buffer_.adapt(latency, len(records))
+        logger.debug(
+            "insert %d records (%s, %d bytes) in %f sec",
+            written, collection, size, latency
+        )
+        return written
+
+    def _report(
+            self, collection, buffer_, records, details, retried=False,
+            keys=None
+    ):
+        """Report per-record errors of a bulk write.
+
+        Records rejected and records not attempted (ordered writes stop
+        at the first error) are spooled.
+
+        :param str collection: collection
+        :param WriteBuffer buffer_: write buffer
+        :param list records: encoded records
+        :param dict details: bulk write result
+        :param bool retried: toggle retried write (records may have been
+            inserted by an earlier attempt)
+        :param list keys: record keys (page ID and revision ID, None if
+            the records are not keyed)
+        """
+        logger = multiprocessing.get_logger().getChild(__name__)
+        skipped = 0
+        rejected = []
+        for error in details["writeErrors"]:
+            record = records[error["index"]]
+            if error["code"] == DUPLICATE_KEY and (buffer_.replace or retried):
+                # the stored record is of a later revision or was
+                # inserted by an earlier attempt
+                skipped += 1
+                if buffer_.replace and keys:
+                    self.lost.add(keys[error["index"]])
+                continue
+            logger.warning(
+                "failed to insert record %d (%s, _id %s): %s (%s)",
+                error["index"], collection, record.get("_id"),
+                error["errmsg"], error["code"]
+            )
+            rejected.append(record)
+        if buffer_.replace:
+            self.skipped += skipped
+        failed = (
+            len(records) - details["nInserted"] - details["nUpserted"]
+            - details["nMatched"] - skipped
+        )
+        ordered = self.ordered and not (buffer_.replace or retried)
+        if ordered and details["writeErrors"]:
+            # not attempted
+            first = details["writeErrors"][0]["index"]
+            rejected.extend(records[first + 1:])
+        self._spool(collection, rejected)
+        if failed:
+            self.errors += failed
+            logger.error(
+                "failed to insert %d of %d records (%s)",
+                failed, len(records), collection
+            )
+        return
+
+    def _spool(self, collection, records):
+        """Spool records to dead-letter file.
+
+        :param str collection: collection
+        :param list records: encoded records
+        """
+        if self.dead_letter is None or not records:
+            return
+        logger = multiprocessing.get_logger().getChild(__name__)
+        os.makedirs(self.dead_letter, exist_ok=True)
+        path = os.path.join(
+            self.dead_letter, "{}.{}.bson".format(collection, self.spool)
+        )
+        with open(path, "ab") as file_:
+            for record in records:
+                file_.write(record.raw)
+        self.spooled += len(records)
+        logger.warning(
+            "spooled %d records (%s) to %s", len(records), collection, path
+        )
+        return
+
+    def replay(self):
+        """Reinsert records of dead-letter files.
+
+        Records are written unordered, records already stored (e.g. by
+        the partly failed write that spooled them) are skipped. Dead-letter
+        files are removed once their records are written (records failing
+        again are spooled to new ones).
+
+        :returns: number of records written
+        :rtype: int
+        """
+        logger = multiprocessing.get_logger().getChild(__name__)
+        if self.dead_letter is None or not os.path.isdir(self.dead_letter):
+            return 0
+        count = 0
+        # listed before new dead-letter files are spooled
+        names = sorted(os.listdir(self.dead_letter))
+        # records failing again are not appended to replayed files
+        self.spool = _get_spool(self.pid)
+        for name in names:
+            if not name.endswith(".bson"):
+                continue
+            collection = name.split(".")[0]
+            path = os.path.join(self.dead_letter, name)
+            with open(path, "rb") as file_:
+                records = list(bson.decode_file_iter(file_))
+            if records:
+                # page records are keyed (and replaced in upsert mode)
+                keyed = "revid" in records[0]
+                logger.info(
+                    "replay %d records (%s) of %s",
+                    len(records), collection, path
+                )
+                written = self._replay(
+                    collection, records, replace=self.upsert and keyed,
+                    keyed=keyed
+                )
+                logger.info(
+                    "replayed %d of %d records (%s) of %s",
+                    written, len(records), collection, path
+                )
+                count += written
+            os.remove(path)
+        return count
+
+    def _replay(self, collection, records, replace=False, keyed=False):
+        """Reinsert records (through a write buffer of their own).
+
+        :param str collection: collection
+        :param list records: records
+        :param bool replace: toggle replacing records
+        :param bool keyed: toggle keying records by page ID and revision
+            ID (page records only)
+
+        :returns: number of records written
+        :rtype: int
+        """
+        buffer_ = WriteBuffer(
+            batch_size=self.MAX_BULK_SIZE,
+            flush_interval=self.flush_interval,
+            target_latency=self.target_latency,
+            replace=replace
+        )
+        written = 0
+        for record in records:
+            key = (record["_id"], record["revid"]) if keyed else None
+            record = bson.raw_bson.RawBSONDocument(bson.encode(record))
+            if not buffer_.fits(record):
+                written += self._flush(collection, buffer_, replay=True)
+            buffer_.append(record, key=key)
+            if buffer_.is_full():
+                written += self._flush(collection, buffer_, replay=True)
+        written += self._flush(collection, buffer_, replay=True)
+        return written
+
+    def flush(self):
+        """Flush all write buffers (and pending deletes)."""
+        # page records first, records waiting for their upserts follow
+        buffers = sorted(
+            self.buffers.items(), key=lambda item: not item[1].replace
+        )
+        for collection, buffer_ in buffers:
+            self._flush(collection, buffer_)
+        return
+
+    def drop_indexes(self, keep=()):
+        """Drop secondary indexes (before bulk loading).
+
+        :param keep: indexes (collection, field) needed while loading
+        :type keep: tuple or frozenset
+        """
+        logger = multiprocessing.get_logger().getChild(__name__)
+        for collection, field in INDEXES:
+            if (collection, field) in keep:
+                continue
+            try:
+                self.client[self.db][collection].drop_index(
+                    [(field, pymongo.ASCENDING)]
+                )
+            except pymongo.errors.OperationFailure:
+                # no such index
+                continue
+            except pymongo.errors.PyMongoError:
+                logger.error(
+                    "failed to drop index %s.%s", collection, field
+                )
+                raise
+            logger.info("dropped index %s.%s", collection, field)
+        return
+
+    def build_indexes(self):
+        """Build secondary indexes (after loading)."""
+        logger = multiprocessing.get_logger().getChild(__name__)
+        for i, (collection, field) in enumerate(INDEXES, start=1):
+            logger.info(
+                "build index %s.%s (%d of %d, %d records)",
+                collection, field, i, len(INDEXES),
+                self.client[self.db][collection].estimated_document_count()
+            )
+            time0 = time.monotonic()
+            try:
+                self.client[self.db][collection].create_index(field)
+            except pymongo.errors.PyMongoError:
+                logger.error(
+                    "failed to build index %s.%s", collection, field
+                )
+                raise
+            logger.info(
+                "built index %s.%s in %f sec",
+                collection, field, time.monotonic() - time0
+            )
+        return
+
+    def find_template(self, title, collection="article"):
+        """Find template body.
+
+        :param str title: template title
+        :param str collection: collection
+
+        :returns: template body (None if there is no template)
+        :rtype: str
+        """
+        try:
+            logger = multiprocessing.get_logger().getChild(__name__)
+            # template records are the ones with params
+            record = self.client[self.db][collection].find_one(
+                {"title": title, "params": {"$exists": True}},
+                projection={"content": True}
+            )
+        except pymongo.errors.PyMongoError:
+            logger.error("failed to find template %s", title)
+            return None
+        if record is None:
+            return None
+        return record["content"]
+
     def close(self):
-        """Close connection to mongoDB."""
+        """Close connection to mongoDB (flushes write buffers)."""
+        self.flush()
         try:
             logger = multiprocessing.get_logger().getChild(__name__)
             self.client.close()
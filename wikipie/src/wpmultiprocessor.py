@@ -29,8 +29,13 @@ import multiprocessing
 # third party imports
 
 # library specific imports
+import src.wpcache
 import src.wpmongo
+import src.wpbuffer
+import src.wpintern
 import src.wpmarkupparser
+import src.wpmarkupparser.expansion
+import src.wpmarkupparser.fastparser
 
 
 class Multiprocessor(object):
@@ -42,6 +47,13 @@ class Multiprocessor(object):
     :ivar str db: mongoDB
     :ivar str username: username
     :ivar str password: password
+    :ivar WriteConcern write_concern: write concern (None for the server
+        default)
+    :ivar bool bypass_validation: toggle bypassing document validation
+    :ivar dict client_options: client options (pool size, wire
+        compression, timeouts)
+    :ivar dict retry_options: maximum number of retries and dead-letter
+        directory
     :ivar Parser parser: parser
     :ivar Queue queue: queue
     """
@@ -62,6 +74,22 @@ class Multiprocessor(object):
         self.db = config["mongoDB"]["db"]
         self.username = config["mongoDB"]["username"]
         self.password = config["mongoDB"]["password"]
+        journal = None
+        if config["mongoDB"].get("journal", fallback=""):
+            journal = config["mongoDB"].getboolean("journal")
+        self.write_concern = src.wpmongo.get_write_concern(
+            w=config["mongoDB"].get("write_concern", fallback=""),
+            journal=journal,
+            bulk_load=args.bulk_load
+        )
+        self.bypass_validation = bool(
+            config["mongoDB"].get("bypass_validation", fallback="")
+            and config["mongoDB"].getboolean("bypass_validation")
+        )
+        self.client_options = src.wpmongo.get_client_options(
+            config["mongoDB"]
+        )
+        self.retry_options = src.wpmongo.get_retry_options(config["mongoDB"])
         self.queue = multiprocessing.JoinableQueue()
         for page in pages:
             self.queue.put(page)
@@ -74,14 +102,96 @@ class Multiprocessor(object):
         """Worker."""
         raise NotImplementedError
 
+    def _get_wpmongo(self, pid):
+        """Connect to mongoDB.
+
+        :param int pid: process ID
+
+        :returns: mongoDB interface
+        :rtype: WPMongo
+        """
+        wpmongo = src.wpmongo.WPMongo(
+            pid, self.db, self.host, self.port, self.username, self.password,
+            ordered=not self.args.bulk_load,
+            write_concern=self.write_concern,
+            bypass_validation=self.bypass_validation,
+            upsert=self.args.upsert,
+            client_options=self.client_options,
+            **self.retry_options
+        )
+        return wpmongo
+
+    def _close_wpmongo(self, wpmongo, pid):
+        """Close connection to mongoDB (flushes write buffers).
+
+        :param WPMongo wpmongo: mongoDB interface
+        :param int pid: process ID
+        """
+        logger = multiprocessing.get_logger().getChild(__name__)
+        wpmongo.close()
+        if wpmongo.errors:
+            logger.warning(
+                "worker %s failed to insert %d records", pid, wpmongo.errors
+            )
+        if wpmongo.spooled:
+            logger.warning(
+                "worker %s spooled %d records to %s",
+                pid, wpmongo.spooled, wpmongo.dead_letter
+            )
+        if wpmongo.skipped:
+            logger.info(
+                "worker %s skipped %d pages (later revisions stored)",
+                pid, wpmongo.skipped
+            )
+        return
+
+    def _get_cache(self, *options):
+        """Get parse cache.
+
+        :param options: options changing parse results
+
+        :returns: parse cache (None if disabled)
+        :rtype: WPCache
+        """
+        if not self.args.cache:
+            return None
+        namespace = src.wpcache.get_namespace(
+            src.wpmarkupparser.parser.get_version(), self.localization,
+            *options
+        )
+        cache = src.wpcache.WPCache(
+            self.args.cache, self.args.cache_size * 1024 * 1024, namespace
+        )
+        return cache
+
+    def _close_cache(self, cache, pid):
+        """Close parse cache.
+
+        :param WPCache cache: parse cache (None if disabled)
+        :param int pid: process ID
+        """
+        if cache is None:
+            return
+        logger = multiprocessing.get_logger().getChild(__name__)
+        logger.info(
+            "worker %s parse cache hit rate %.2f (%d hits, %d misses)",
+            pid, cache.hit_rate, cache.hits, cache.misses
+        )
+        cache.close()
+        return
+
     def process(self):
         """Process pages."""
         try:
             logger = multiprocessing.get_logger().getChild(__name__)
             workers = []
             for _ in range(self.processes):
+                # daemonic processes cannot start section processes
                 workers.append(
-                    multiprocessing.Process(target=self._worker, daemon=True)
+                    multiprocessing.Process(
+                        target=self._worker,
+                        daemon=not self.args.section_size
+                    )
                 )
                 workers[-1].start()
             self.queue.join()
@@ -94,7 +204,38 @@ class Multiprocessor(object):
 
 
 class TemplateMultiprocessor(Multiprocessor):
-    """Parallel processing (templates)."""
+    """Parallel processing (templates).
+
+    :ivar TemplateRegistry registry: template registry
+    """
+
+    def __init__(self, args, config, pages, localization=None, registry=None):
+        """Initialize parallel processor.
+
+        :param Namespace args: command-line arguments
+        :param ConfigParser config: config
+        :param generator pages: pages
+        :param LocalizationProfile localization: localization profile
+        :param TemplateRegistry registry: template registry (filled
+            while the pages are put on the queue)
+        """
+        self.registry = registry
+        if registry is not None:
+            pages = self._register(pages)
+        super().__init__(args, config, pages, localization=localization)
+        return
+
+    def _register(self, pages):
+        """Register templates.
+
+        :param generator pages: pages
+
+        :returns: pages
+        :rtype: generator
+        """
+        for page in pages:
+            self.registry.register(page)
+            yield page
 
     def _worker(self):
         """Worker."""
@@ -102,35 +243,169 @@ class TemplateMultiprocessor(Multiprocessor):
         logger.setLevel(logging.INFO)
         logger.addHandler(logging.StreamHandler(stream=sys.stdout))
         pid = os.getpid()
-        wpmongo = src.wpmongo.WPMongo(
-            pid, self.db, self.host, self.port, self.username, self.password
-        )
+        wpmongo = self._get_wpmongo(pid)
         parser = src.wpmarkupparser.parser.TemplateParser(
-            localization=self.localization
+            localization=self.localization, engine=self.args.engine
         )
-        pages = []
+        cache = self._get_cache()
         for page in iter(self.queue.get, None):
             logger.info(
                 "worker %s processes template %s", pid, page.title
             )
-            page = parser.parse(page)
-            pages.append(page)
-            # insert page records
-            if len(pages) == wpmongo.MAX_BULK_SIZE:
-                wpmongo.insert_pages(pages)
-                pages = []
+            if cache is None or not cache.get(page):
+                page = parser.parse(page)
+                if cache is not None:
+                    cache.put(page)
+            # buffered by the write buffer
+            wpmongo.insert_pages([page])
             self.queue.task_done()
-        # insert leftover page records
-        if pages:
-            wpmongo.insert_pages(pages)
+        self._close_cache(cache, pid)
         logger.info("worker %s emptied queue", pid)
         self.queue.task_done()
         logger.info("worker %s unblocked queue", pid)
+        # flushes leftover page records
+        self._close_wpmongo(wpmongo, pid)
         return
 
 
 class ArticleMultiprocessor(Multiprocessor):
-    """Parallel processing (articles)."""
+    """Parallel processing (articles).
+
+    :ivar TemplateRegistry registry: template registry (inherited
+        read-only by the workers)
+    """
+
+    def __init__(self, args, config, pages, localization=None, registry=None):
+        """Initialize parallel processor.
+
+        :param Namespace args: command-line arguments
+        :param ConfigParser config: config
+        :param generator pages: pages
+        :param LocalizationProfile localization: localization profile
+        :param TemplateRegistry registry: template registry
+        """
+        self.registry = registry
+        super().__init__(args, config, pages, localization=localization)
+        return
+
+    def _get_find_template(self, wpmongo):
+        """Get template body lookup.
+
+        Templates are looked up by the title of their redirect target,
+        unregistered templates are not looked up.
+
+        :param WPMongo wpmongo: mongoDB interface
+
+        :returns: template body lookup
+        :rtype: callable
+        """
+        if self.registry is None:
+            return wpmongo.find_template
+
+        def find_template(title):
+            title = self.registry.resolve(title)
+            if title is None:
+                return None
+            return wpmongo.find_template(title)
+        return find_template
+
+    def _flush(self, wpmongo, inclusions, links, size=1, revid=None):
+        """Flush record buffers.
+
+        Both buffers are flushed together, so that their string table
+        can be cleared.
+
+        :param WPMongo wpmongo: mongoDB connection
+        :param InclusionBuffer inclusions: inclusion buffer
+        :param LinkBuffer links: link buffer
+        :param int size: buffer size from which on buffers are flushed
+        :param int revid: revision ID (if the buffers hold the records of
+            one page waiting for the upsert of its page record)
+        """
+        if len(inclusions) < size and len(links) < size:
+            return
+        if inclusions:
+            wpmongo.insert_inclusion_buffer(inclusions, revid=revid)
+            inclusions.clear()
+        if links:
+            wpmongo.insert_link_buffer(links, revid=revid)
+            links.clear()
+        inclusions.strings.clear()
+        return
+
+    def _delete_records(self, parser, wpmongo, page):
+        """Delete stored inclusion and link records of article (upsert
+        mode only, outputs not extracted are kept).
+
+        Records are only replaced if the upsert of the page record wins.
+
+        :param ArticleParser parser: article parser
+        :param WPMongo wpmongo: mongoDB connection
+        :param Article page: article
+        """
+        if not wpmongo.upsert:
+            return
+        if "inclusions" in parser.extract:
+            wpmongo.delete_records(
+                page.pageid, "inclusion", revid=page.revid
+            )
+        if "links" in parser.extract:
+            wpmongo.delete_records(page.pageid, "IWL", revid=page.revid)
+        return
+
+    def _get_digests(self, parser):
+        """Get digests of the templates expanded while parsing the last
+        page.
+
+        :param ArticleParser parser: article parser
+
+        :returns: digests of the template bodies (by title, None if
+            templates are not expanded)
+        :rtype: dict
+        """
+        if getattr(parser, "expander", None) is None:
+            return None
+        digests = {
+            template: parser.expander.get_digest(template)
+            for template in parser.expanded
+        }
+        return digests
+
+    def _stream(self, parser, wpmongo, page, inclusions, links):
+        """Stream parse events of article to the database.
+
+        Inclusions and links are buffered as they are parsed, the page
+        record is inserted once the article is parsed.
+
+        :param ArticleParser parser: article parser
+        :param WPMongo wpmongo: mongoDB connection
+        :param Article page: article
+        :param InclusionBuffer inclusions: inclusion buffer
+        :param LinkBuffer links: link buffer
+        """
+        self._delete_records(parser, wpmongo, page)
+        buffers = {"inclusion": inclusions, "link": links}
+        text = []
+        categories = []
+        for event, value in parser.iter_events(page):
+            if event == "text":
+                text.append(value)
+            elif event == "category":
+                categories.append(value)
+            elif event in buffers:
+                buffers[event].append(page.pageid, value)
+                self._flush(
+                    wpmongo, inclusions, links, size=wpmongo.MAX_BULK_SIZE
+                )
+        page.text = "".join(text) if "text" in parser.extract else None
+        page.inclusions = []
+        page.links = []
+        if "categories" in parser.extract:
+            page.categories = categories
+        else:
+            page.categories = None
+        wpmongo.insert_pages([page])
+        return
 
     def _worker(self):
         """Worker."""
@@ -138,33 +413,102 @@ class ArticleMultiprocessor(Multiprocessor):
         logger.setLevel(logging.INFO)
         logger.addHandler(logging.StreamHandler(stream=sys.stdout))
         pid = os.getpid()
-        wpmongo = src.wpmongo.WPMongo(
-            pid, self.db, self.host, self.port, self.username, self.password
-        )
-        parser = src.wpmarkupparser.parser.ArticleParser(
-            self.args, localization=self.localization
+        wpmongo = self._get_wpmongo(pid)
+        if self.args.expand:
+            expander = src.wpmarkupparser.expansion.TemplateExpander(
+                self._get_find_template(wpmongo),
+                max_depth=self.args.expansion_depth,
+                cache_size=self.args.expansion_cache
+            )
+        else:
+            expander = None
+        if self.args.intern:
+            interns = src.wpintern.InternTable()
+            if self.registry is not None:
+                interns.seed_registry(self.registry)
+        else:
+            interns = None
+        if self.args.fast:
+            parser = src.wpmarkupparser.fastparser.FastArticleParser(
+                self.args,
+                localization=self.localization,
+                extract=self.args.extract,
+                interns=interns
+            )
+        else:
+            parser = src.wpmarkupparser.parser.ArticleParser(
+                self.args,
+                localization=self.localization,
+                engine=self.args.engine,
+                section_size=self.args.section_size,
+                section_processes=self.args.section_processes,
+                incremental=self.args.incremental,
+                expander=expander,
+                extract=self.args.extract,
+                interns=interns
+            )
+        cache = self._get_cache(
+            self.args.categories, self.args.expand, self.args.expansion_depth,
+            self.args.fast, sorted(self.args.extract or [])
         )
-        pages = []
+        if expander is not None and not self.args.fast:
+            get_digest = expander.get_digest
+        else:
+            get_digest = None
+        strings = src.wpbuffer.StringTable()
+        inclusions = src.wpbuffer.InclusionBuffer(strings=strings)
+        links = src.wpbuffer.LinkBuffer(strings=strings)
         for page in iter(self.queue.get, None):
             logger.info(
                 "worker %s processes article %s", pid, page.title
             )
-            page = parser.parse(page)
-            pages.append(page)
-            # insert page records
-            if len(pages) == wpmongo.MAX_BULK_SIZE:
-                wpmongo.insert_pages(pages)
-                pages = []
+            # page records are inserted after streaming (too late for
+            # upserts)
+            if (
+                    0 < self.args.stream_size < len(page.text)
+                    and not self.args.fast and not wpmongo.upsert
+            ):
+                self._stream(parser, wpmongo, page, inclusions, links)
+                self.queue.task_done()
+                continue
+            if cache is None or not cache.get(page, get_digest=get_digest):
+                page = parser.parse(page)
+                if cache is not None:
+                    cache.put(page, templates=self._get_digests(parser))
+            self._delete_records(parser, wpmongo, page)
             if page.inclusions:
-                wpmongo.insert_inclusions(page.pageid, page.inclusions)
+                inclusions.extend(page.pageid, page.inclusions)
             if page.links:
-                wpmongo.insert_links(page.pageid, page.links)
+                links.extend(page.pageid, page.links)
+            if wpmongo.upsert:
+                # records are handed over page by page, they wait for the
+                # upsert of their page record
+                self._flush(wpmongo, inclusions, links, revid=page.revid)
+            else:
+                self._flush(
+                    wpmongo, inclusions, links, size=wpmongo.MAX_BULK_SIZE
+                )
+            # buffered by the write buffer (after the records of the page)
+            wpmongo.insert_pages([page])
             self.queue.task_done()
         # insert leftover records
-        if pages:
-            wpmongo.insert_pages(pages)
+        self._flush(wpmongo, inclusions, links)
+        self._close_cache(cache, pid)
+        if expander is not None:
+            logger.info(
+                "worker %s expansion cache %d hits, %d misses",
+                pid, expander.hits, expander.misses
+            )
+        if interns is not None:
+            logger.info(
+                "worker %s intern table %d strings, %d hits, %d misses, "
+                "%d bytes saved",
+                pid, len(interns), interns.hits, interns.misses,
+                interns.saved
+            )
         logger.info("worker %s emptied queue", pid)
         self.queue.task_done()
         logger.info("worker %s unblocked queue", pid)
-        wpmongo.close()
+        parser.close()
+        self._close_wpmongo(wpmongo, pid)
         return
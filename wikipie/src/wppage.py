@@ -21,21 +21,47 @@
 
 
 # standard library imports
+import functools
+
 # third party imports
 # library specific imports
 
 
+@functools.lru_cache(maxsize=None)
+def _get_slots(cls):
+    """Get slots of page class (including inherited ones).
+
+    :param type cls: page class
+
+    :returns: slots
+    :rtype: tuple
+    """
+    slots = ()
+    for cls_ in reversed(cls.__mro__):
+        slots += cls_.__dict__.get("__slots__", ())
+    return slots
+
+
 class Page(object):
     """Wikipedia page.
 
+    Page and revision IDs are converted to integers once on extraction.
+
     :ivar str title: title
-    :ivar str pageid: page ID
+    :ivar int pageid: page ID
     :ivar str redirect: title
-    :ivar str revid: revision ID
+    :ivar int revid: revision ID
     :ivar str text: text
+    :ivar int parentid: parent revision ID (0 if there is none)
+    :ivar str sha1: revision SHA-1
     """
+    __slots__ = (
+        "title", "pageid", "redirect", "revid", "text", "parentid", "sha1"
+    )
 
-    def __init__(self, title, pageid, redirect, revid, text):
+    def __init__(
+            self, title, pageid, redirect, revid, text, parentid="", sha1=""
+    ):
         """Initialize Wikipedia page.
 
         :param str title: title
@@ -43,12 +69,33 @@ class Page(object):
         :param str redirect: title
         :param str revid: revision ID
         :param str text: text
+        :param str parentid: parent revision ID
+        :param str sha1: revision SHA-1
         """
         self.title = title
-        self.pageid = pageid
+        self.pageid = int(pageid)
         self.redirect = redirect
-        self.revid = revid
+        self.revid = int(revid)
         self.text = text
+        self.parentid = int(parentid) if parentid else 0
+        self.sha1 = sha1
+        return
+
+    def __getstate__(self):
+        """Get state (slot values, without names) for pickling.
+
+        :returns: state
+        :rtype: tuple
+        """
+        return tuple(getattr(self, slot) for slot in _get_slots(type(self)))
+
+    def __setstate__(self, state):
+        """Set state.
+
+        :param tuple state: state
+        """
+        for slot, value in zip(_get_slots(type(self)), state):
+            setattr(self, slot, value)
         return
 
 
@@ -58,9 +105,14 @@ class Article(Page):
     :ivar list inclusions: inclusions
     :ivar list links: links
     :ivar list categories: categories
+    :ivar dict collected: collector hook records (by collector name, None
+        without collector hooks)
     """
+    __slots__ = ("inclusions", "links", "categories", "collected")
 
-    def __init__(self, title, pageid, redirect, revid, text):
+    def __init__(
+            self, title, pageid, redirect, revid, text, parentid="", sha1=""
+    ):
         """Initialize article.
 
         :param str title: title
@@ -68,11 +120,17 @@ class Article(Page):
         :param str redirect: title
         :param str revid: revision ID
         :param str text: text
+        :param str parentid: parent revision ID
+        :param str sha1: revision SHA-1
         """
-        super().__init__(title, pageid, redirect, revid, text)
+        super().__init__(
+            title, pageid, redirect, revid, text, parentid=parentid,
+            sha1=sha1
+        )
         self.inclusions = []
         self.links = []
         self.categories = []
+        self.collected = None
         return
 
 
@@ -81,8 +139,11 @@ class Template(Page):
 
     :ivar list params: parameters
     """
+    __slots__ = ("params",)
 
-    def __init__(self, title, pageid, redirect, revid, text):
+    def __init__(
+            self, title, pageid, redirect, revid, text, parentid="", sha1=""
+    ):
         """Initialize template.
 
         :param str title: title
@@ -90,7 +151,12 @@ class Template(Page):
         :param str redirect: title
         :param str revid: revision ID
         :param str text: text
+        :param str parentid: parent revision ID
+        :param str sha1: revision SHA-1
         """
-        super().__init__(title, pageid, redirect, revid, text)
+        super().__init__(
+            title, pageid, redirect, revid, text, parentid=parentid,
+            sha1=sha1
+        )
         self.params = []
         return
@@ -0,0 +1,230 @@
+#    This file is part of WikiPie 0.x.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie 0.x is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+.. _`Manual:Title.php`: \
+https://www.mediawiki.org/wiki/Manual:Title.php#Canonical_forms
+
+:synopsis: Template registry module, handles the template registry.
+
+The template pass registers each template by its canonical title (see
+`Manual:Title.php`_) with its redirect target and param names. Titles
+are canonicalized like the inclusions of the parser (template namespace
+aliases and first letter case of the localization profile). The
+registry is built in the main process, so that article workers inherit
+it read-only, and is persisted, so that article-only runs can reuse it.
+"""
+
+
+# standard library imports
+import os
+import re
+import sys
+import json
+
+# third party imports
+
+# library specific imports
+import src.wplocalization
+import src.wpmarkupparser.parse_actions.template
+
+
+# param names
+_PARAM_PATTERN = re.compile(r"\{\{\{([^|={}]+)")
+
+
+def get_canonical_title(title, localization=None):
+    """Get canonical title.
+
+    :param str title: title
+    :param LocalizationProfile localization: localization profile
+
+    :returns: canonical title
+    :rtype: str
+    """
+    if localization is None:
+        localization = src.wplocalization.DEFAULT_PROFILE
+    title = " ".join(title.replace("_", " ").split())
+    namespace, sep, pagename = title.partition(":")
+    if not sep:
+        namespace, pagename = "", namespace
+    namespace = namespace.strip()
+    pagename = pagename.strip()
+    # namespace names are case-insensitive in their first letter
+    if namespace[:1].upper() + namespace[1:] in (
+            localization.template_namespaces
+    ):
+        namespace = localization.template_namespace
+    if pagename:
+        pagename = (
+            src.wpmarkupparser.parse_actions.template.normalize_template(
+                {"pagename": pagename}, localization=localization
+            )
+        )
+    if sep:
+        return "{}:{}".format(namespace, pagename)
+    return pagename
+
+
+def get_param_names(text):
+    """Get param names.
+
+    :param str text: template text
+
+    :returns: param names (in order of appearance)
+    :rtype: tuple
+    """
+    names = {}
+    for name in _PARAM_PATTERN.findall(text):
+        names.setdefault(name.strip(), None)
+    return tuple(names)
+
+
+class TemplateRegistry(object):
+    """Template registry.
+
+    :cvar int MAX_REDIRECTS: maximum redirect chain length
+    :ivar dict templates: redirect target and param names (by canonical
+        title)
+    :ivar LocalizationProfile localization: localization profile
+    """
+    MAX_REDIRECTS = 8
+
+    def __init__(self, templates=None, localization=None):
+        """Initialize template registry.
+
+        :param dict templates: redirect target and param names (by
+            canonical title)
+        :param LocalizationProfile localization: localization profile
+        """
+        if templates is None:
+            templates = {}
+        self.templates = templates
+        self.localization = localization
+        return
+
+    def _get_canonical_title(self, title):
+        """Get canonical title.
+
+        :param str title: title
+
+        :returns: canonical title
+        :rtype: str
+        """
+        return get_canonical_title(title, localization=self.localization)
+
+    def __len__(self):
+        """Get number of templates.
+
+        :returns: number of templates
+        :rtype: int
+        """
+        return len(self.templates)
+
+    def __contains__(self, title):
+        """Check whether template is registered.
+
+        :param str title: title
+
+        :returns: toggle
+        :rtype: bool
+        """
+        return self._get_canonical_title(title) in self.templates
+
+    def register(self, template):
+        """Register template (later revisions replace earlier ones).
+
+        :param Template template: template
+        """
+        title = sys.intern(self._get_canonical_title(template.title))
+        if template.redirect:
+            target = sys.intern(self._get_canonical_title(template.redirect))
+        else:
+            target = ""
+        params = tuple(
+            sys.intern(name) for name in get_param_names(template.text)
+        )
+        self.templates[title] = (target, params)
+        return
+
+    def resolve(self, title):
+        """Resolve redirects.
+
+        :param str title: title
+
+        :returns: canonical title of the redirect target (None if there
+            is no template)
+        :rtype: str
+        """
+        title = self._get_canonical_title(title)
+        for _ in range(self.MAX_REDIRECTS):
+            if title not in self.templates:
+                return None
+            target, _ = self.templates[title]
+            if not target:
+                return title
+            title = target
+        return None
+
+    def get_params(self, title):
+        """Get param names (after resolving redirects).
+
+        :param str title: title
+
+        :returns: param names (None if there is no template)
+        :rtype: tuple
+        """
+        title = self.resolve(title)
+        if title is None:
+            return None
+        return self.templates[title][1]
+
+    def save(self, path):
+        """Save template registry.
+
+        :param str path: file
+        """
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, "w") as file_:
+            json.dump(self.templates, file_, separators=(",", ":"))
+        os.replace(tmp, path)
+        return
+
+    @classmethod
+    def load(cls, path, localization=None):
+        """Load template registry.
+
+        Titles are canonicalized again, so that registries saved with
+        another localization profile can be reused.
+
+        :param str path: file
+        :param LocalizationProfile localization: localization profile
+
+        :returns: template registry
+        :rtype: TemplateRegistry
+        """
+        with open(path) as file_:
+            templates = json.load(file_)
+        registry = cls(localization=localization)
+        for title, (target, params) in templates.items():
+            title = sys.intern(registry._get_canonical_title(title))
+            if target:
+                target = sys.intern(registry._get_canonical_title(target))
+            registry.templates[title] = (
+                target, tuple(sys.intern(name) for name in params)
+            )
+        return registry
@@ -77,6 +77,41 @@ class WPXMLParser(object):
             raise
         return language_attrib
 
+    def find_siteinfo(self):
+        """Find site information (siteinfo element).
+
+        :returns: site name, database name, case rule and namespaces
+            (name and case rule by key)
+        :rtype: dict
+        """
+        try:
+            logger = logging.getLogger().getChild(__name__)
+            logger.info("find siteinfo")
+            siteinfo = {
+                "sitename": "", "dbname": "", "case": "", "namespaces": {}
+            }
+            siteinfo_element = self.tree.find("{*}siteinfo")
+            if siteinfo_element is None:
+                return siteinfo
+            for tag in ("sitename", "dbname", "case"):
+                element = siteinfo_element.find("{{*}}{}".format(tag))
+                if element is not None and element.text is not None:
+                    siteinfo[tag] = element.text
+            for namespace_element in siteinfo_element.iterfind(
+                    "{*}namespaces/{*}namespace"
+            ):
+                key = namespace_element.attrib["key"]
+                siteinfo["namespaces"][key] = {
+                    "name": namespace_element.text or "",
+                    "case": namespace_element.attrib.get(
+                        "case", siteinfo["case"]
+                    )
+                }
+        except:
+            logger.exception("failed to find siteinfo")
+            raise
+        return siteinfo
+
     def find_page_elements(self, prop=("title", "ns", "id")):
         """Find page elements.
 
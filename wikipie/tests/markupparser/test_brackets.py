@@ -0,0 +1,102 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Test brace and bracket matcher.
+"""
+
+
+# standard library imports
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wpmarkupparser.brackets
+import tests.wpdata
+
+
+class TestBrackets(unittest.TestCase):
+    """Test brace and bracket matcher.
+
+    :cvar list PARSER_EXTENSIONS: parser extensions
+    """
+    PARSER_EXTENSIONS = tests.wpdata.PARSER_EXTENSIONS
+
+    def _find_balanced(self, text):
+        """Find balanced openers.
+
+        :param str text: text
+
+        :returns: locations of balanced openers (by opener)
+        :rtype: dict
+        """
+        balanced = src.wpmarkupparser.brackets.find_balanced(
+            text, parser_extensions=self.PARSER_EXTENSIONS
+        )
+        return balanced
+
+    def test_find_balanced_00(self):
+        """Test nested inclusions, params and links."""
+        balanced = self._find_balanced("{{a|{{{b}}}|[[c]]}} [[d|{{e}}]]")
+        self.assertEqual({0, 24}, balanced["{{"])
+        self.assertEqual({4}, balanced["{{{"])
+        self.assertEqual({12, 20}, balanced["[["])
+        return
+
+    def test_find_balanced_01(self):
+        """Test brace runs."""
+        self.assertEqual(
+            {"{{": {0}, "{{{": {2}, "[[": set()},
+            self._find_balanced("{{{{{a}}}}}")
+        )
+        self.assertEqual(
+            {"{{": {1}, "{{{": set(), "[[": set()},
+            self._find_balanced("{{{a}}")
+        )
+        return
+
+    def test_find_balanced_02(self):
+        """Test unbalanced openers."""
+        balanced = self._find_balanced("{{a|[[b}} [[c]]")
+        self.assertEqual(set(), balanced["{{"])
+        self.assertEqual({10}, balanced["[["])
+        return
+
+    def test_find_balanced_03(self):
+        """Test comments and parser extensions."""
+        balanced = self._find_balanced(
+            "{{a|<!-- {{ -->b}} {{c|<ref>}}</ref>}} <ref name=x/>[[d]]"
+        )
+        self.assertEqual({0, 19}, balanced["{{"])
+        self.assertEqual({52}, balanced["[["])
+        return
+
+    def test_find_balanced_04(self):
+        """Test empty comments."""
+        balanced = self._find_balanced("<!---->{{a}}<!-- -->")
+        self.assertEqual({7}, balanced["{{"])
+        return
+
+    def test_bracket_matcher_00(self):
+        """Test bracket matcher."""
+        bracket_matcher = src.wpmarkupparser.brackets.BracketMatcher(
+            self.PARSER_EXTENSIONS
+        )
+        self.assertTrue(bracket_matcher.is_balanced("{{a}}", 0, "{{"))
+        self.assertFalse(bracket_matcher.is_balanced("{{a}", 0, "{{"))
+        return
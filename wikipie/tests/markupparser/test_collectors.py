@@ -0,0 +1,143 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+
+"""
+:synopsis: Test collector hooks.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.collectors
+
+
+TEXT = (
+    "Foo is a [[bar]] {{baz|qux}}.\n\n"
+    "See [http://example.org <nowiki>[[x]]</nowiki> example].\n\n"
+    "See also:\n* [[a]] [http://example.com b]\n"
+)
+# sections (inclusions followed by headers are not parsed)
+SECTIONS = (
+    "Foo is a [[bar]].\n== History ==\n"
+    "See [http://example.org <nowiki>[[x]]</nowiki> example].\n"
+    "== See also ==\n* [[a]] [http://example.com b]\n"
+)
+
+
+class ElementCollector(src.wpmarkupparser.collectors.Collector):
+    """Element collector hook."""
+    name = "elements"
+
+    def collect(self, element, toks, loc):
+        """Collect element.
+
+        :param str element: element
+        :param ParseResults toks: parse results
+        :param int loc: location in the output
+        """
+        if element != src.wpmarkupparser.collectors.TEXT:
+            self.records.append({"element": element, "start_doc": loc})
+        return
+
+
+class TestCollectors(unittest.TestCase):
+    """Test collector hooks."""
+
+    def setUp(self):
+        """Set up article parsers."""
+        self.args = argparse.Namespace(categories=False)
+        return
+
+    def _get_parser(self, engine, **kwargs):
+        """Get article parser with collector hooks.
+
+        :param str engine: parser engine
+
+        :returns: article parser
+        :rtype: ArticleParser
+        """
+        parser = src.wpmarkupparser.parser.ArticleParser(
+            self.args, engine=engine,
+            collectors=[src.wpmarkupparser.collectors.ExternalLinkCollector()],
+            **kwargs
+        )
+        parser.register_collector(ElementCollector())
+        return parser
+
+    def _parse(self, parser, text):
+        """Parse article.
+
+        :param ArticleParser parser: article parser
+        :param str text: text
+
+        :returns: article
+        :rtype: Article
+        """
+        article = src.wppage.Article("Foo", "1", False, "1", text)
+        return parser.parse(article)
+
+    def test_collect(self):
+        """Test collecting matches of the wiki markup pass."""
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            parser = self._get_parser(engine)
+            article = self._parse(parser, TEXT)
+            self.assertEqual(
+                ["link", "inclusion", "external_link", "link",
+                 "external_link"],
+                [
+                    record["element"]
+                    for record in article.collected["elements"]
+                ]
+            )
+            self.assertEqual(
+                ["[[x]] example", "b"],
+                [
+                    article.text[
+                        external_link["start_doc"]:external_link["end_doc"]
+                    ]
+                    for external_link in article.collected["external_links"]
+                ]
+            )
+            # records are reset
+            article = self._parse(parser, "no links")
+            self.assertEqual([], article.collected["elements"])
+            self.assertEqual([], article.collected["external_links"])
+            parser.close()
+        return
+
+    def test_collect_sections(self):
+        """Test collecting matches of sections parsed in parallel."""
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            parser = self._get_parser(engine)
+            expected = self._parse(parser, SECTIONS)
+            parser = self._get_parser(
+                engine, section_size=16, section_processes=2
+            )
+            article = self._parse(parser, SECTIONS)
+            parser.close()
+            self.assertEqual(expected.text, article.text)
+            self.assertEqual(expected.collected, article.collected)
+        return
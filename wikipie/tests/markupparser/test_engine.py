@@ -0,0 +1,172 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Test linear-time wiki markup engine against pyparsing.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+import hypothesis
+import hypothesis.strategies
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+
+
+# wiki markup fragments
+FRAGMENTS = [
+    "a", "b c", "foo", "é", " ", "\t", "\n", "\r", "|", "=", "==", "===",
+    "[[", "]]", "[", "]", "{{", "}}", "{{{", "}}}", "subst:", "{|", "|}",
+    "''", "'''", "'''''",
+    "<!--", "-->", "<ref>", "</ref>", "<ref name=x/>", "<nowiki>",
+    "</nowiki>", "<noinclude>", "</noinclude>", "<br>", "<br />", "----",
+    "<hr>", "<p>", "</p>", "<i>", "</i>", "<b>", "</b>", "<cite>",
+    "</cite>", "<abbr>", "</abbr>", "<h2>", "</h2>", "*", "#", ":", ";",
+    "http://example.org/a%20b", "Note:", "de:", ":de:", "wikt:",
+    "Wikipedia:", "Category:", "Template:", "File:", "#s", "__NOTOC__",
+    "PAGENAME", "{{PAGENAME}}", "{{#if:", "<", ">", "~", "\\", "%41", "-"
+]
+
+
+def _fragments():
+    """Get wiki markup strategy.
+
+    :returns: wiki markup strategy
+    :rtype: SearchStrategy
+    """
+    return hypothesis.strategies.lists(
+        hypothesis.strategies.sampled_from(FRAGMENTS), min_size=1, max_size=24
+    ).map("".join)
+
+
+class TestEngine(unittest.TestCase):
+    """Test linear-time wiki markup engine.
+
+    Both engines have to produce the same text, inclusions, links,
+    categories and params.
+    """
+
+    def setUp(self):
+        """Set up parsers."""
+        args = argparse.Namespace(categories=False)
+        self.article_parsers = {
+            engine: src.wpmarkupparser.parser.ArticleParser(
+                args, engine=engine
+            )
+            for engine in src.wpmarkupparser.parser.ENGINES
+        }
+        self.template_parsers = {
+            engine: src.wpmarkupparser.parser.TemplateParser(engine=engine)
+            for engine in src.wpmarkupparser.parser.ENGINES
+        }
+        return
+
+    def _assert_article(self, text):
+        """Assert both engines parse article alike.
+
+        :param str text: text
+        """
+        results = []
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            page = src.wppage.Article("title", "0", "", "0", text)
+            page = self.article_parsers[engine].parse(page)
+            results.append(
+                (page.text, page.inclusions, page.links, page.categories)
+            )
+        self.assertEqual(results[0], results[1])
+        return
+
+    def _assert_template(self, text):
+        """Assert both engines parse template alike.
+
+        :param str text: text
+        """
+        results = []
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            page = src.wppage.Template("title", "0", "", "0", text)
+            page = self.template_parsers[engine].parse(page)
+            results.append((page.text, page.params))
+        self.assertEqual(results[0], results[1])
+        return
+
+    def test_unknown_engine_00(self):
+        """Test unknown engine."""
+        with self.assertRaises(ValueError):
+            src.wpmarkupparser.parser.TemplateParser(engine="unknown")
+        return
+
+    def test_article_00(self):
+        """Test article (inclusions)."""
+        self._assert_article(
+            "{{Infobox|name=Foo|[[Bar]]|x}} {{a|{{b|c}}|d=e}}\n"
+            "{{Template:Foo}} {{foo bar}} {{a\n|b=1\n|c=2\n}}"
+        )
+        return
+
+    def test_article_01(self):
+        """Test article (links)."""
+        self._assert_article(
+            "[[Foo|bar]]s and [[Category:Y]] [[de:Foo]] [[wikt:fr:x]] "
+            "[[:de:Foo#s|l]] ''[[a]]'' <i>[[b|c]]</i>"
+        )
+        return
+
+    def test_article_02(self):
+        """Test article (sections, lists and tags)."""
+        self._assert_article(
+            "== H [[a]] ==\n* item\n# x\n;t\n:d\n<p>''x''</p><h3>y</h3>\n"
+            "{| t\n|}\n----\n<ref name=x/>a</ref> <!-- c -->"
+            "<nowiki>x</nowiki>"
+        )
+        return
+
+    def test_article_03(self):
+        """Test article (magic words and external links)."""
+        self._assert_article(
+            "{{PAGENAME}} {{#if:x|y}} {{lc:[[a]]}} __NOTOC__ "
+            "[http://example.org label] [http://example.org]"
+        )
+        return
+
+    @hypothesis.given(_fragments())
+    def test_article_04(self, text):
+        """Test article.
+
+        :param str text: text
+        """
+        self._assert_article(text)
+        return
+
+    def test_article_05(self):
+        """Test article (params and empty inclusions)."""
+        self._assert_article("a{{{p}}}b {{{q|[[c]]}}} {{{}}} {{}} {{\t}}")
+        return
+
+    @hypothesis.given(_fragments())
+    def test_template_00(self, text):
+        """Test template.
+
+        :param str text: text
+        """
+        self._assert_template(text)
+        return
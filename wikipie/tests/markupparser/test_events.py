@@ -0,0 +1,121 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+
+"""
+:synopsis: Test event-streaming parsing.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+import hypothesis
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.collectors
+import tests.markupparser.test_engine
+
+
+TEXT = (
+    "'''Foo''' is a [[bar]] {{baz|<nowiki>[[x]]</nowiki>}}.\n"
+    "See <nowiki>''y''</nowiki> [[qux|<nowiki>[z]</nowiki>]]s and "
+    "[http://example.org example].\n* [[a]]\n"
+)
+
+
+class TestEvents(unittest.TestCase):
+    """Test event-streaming parsing."""
+
+    def setUp(self):
+        """Set up article parsers."""
+        args = argparse.Namespace(categories=False)
+        self.parsers = [
+            src.wpmarkupparser.parser.ArticleParser(
+                args, engine=engine,
+                collectors=[
+                    src.wpmarkupparser.collectors.ExternalLinkCollector()
+                ]
+            )
+            for engine in src.wpmarkupparser.parser.ENGINES
+        ]
+        return
+
+    def _get_events(self, parser, text):
+        """Get events.
+
+        :param ArticleParser parser: article parser
+        :param str text: text
+
+        :returns: text, inclusions, links, categories and external links
+        :rtype: tuple
+        """
+        page = src.wppage.Article("Foo", "1", False, "1", text)
+        events = {
+            "text": [], "inclusion": [], "link": [], "category": [],
+            "external_links": []
+        }
+        for event, value in parser.iter_events(page):
+            events[event].append(value)
+        return (
+            "".join(events["text"]), events["inclusion"], events["link"],
+            events["category"], events["external_links"]
+        )
+
+    def _parse(self, parser, text):
+        """Parse article.
+
+        :param ArticleParser parser: article parser
+        :param str text: text
+
+        :returns: text, inclusions, links, categories and external links
+        :rtype: tuple
+        """
+        page = src.wppage.Article("Foo", "1", False, "1", text)
+        page = parser.parse(page)
+        return (
+            page.text, page.inclusions, page.links, page.categories,
+            page.collected["external_links"]
+        )
+
+    def test_iter_events_00(self):
+        """Test events against parse results."""
+        for parser in self.parsers:
+            expected = self._parse(parser, TEXT)
+            self.assertTrue(all(expected[1:3]) and expected[4])
+            self.assertEqual(expected, self._get_events(parser, TEXT))
+        return
+
+    @hypothesis.given(tests.markupparser.test_engine._fragments())
+    def test_iter_events_01(self, text):
+        """Test events against parse results.
+
+        :param str text: text
+        """
+        for parser in self.parsers:
+            try:
+                expected = self._parse(parser, text)
+            except Exception:
+                parser._restore()
+                hypothesis.assume(False)
+            self.assertEqual(expected, self._get_events(parser, text))
+        return
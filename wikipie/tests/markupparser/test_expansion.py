@@ -0,0 +1,166 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test template expansion.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.expansion
+
+
+# template bodies (by title)
+TEMPLATES = {
+    "Template:Main": "Main article: [[{{{1}}}]]",
+    "Template:Born": "born {{{date|{{{1|unknown}}}}}}{{{place}}}",
+    "Template:Loop": "loop {{Loop}}",
+    "Template:See": "see {{Main|{{{1}}}}}"
+}
+
+
+class TestExpansion(unittest.TestCase):
+    """Test template expansion."""
+
+    def setUp(self):
+        """Set up article parsers."""
+        args = argparse.Namespace(categories=False)
+        self.expander = src.wpmarkupparser.expansion.TemplateExpander(
+            TEMPLATES.get, max_depth=2
+        )
+        self.parsers = {
+            engine: src.wpmarkupparser.parser.ArticleParser(
+                args, engine=engine, expander=self.expander
+            )
+            for engine in src.wpmarkupparser.parser.ENGINES
+        }
+        return
+
+    def _parse(self, parser, text):
+        """Parse article.
+
+        :param ArticleParser parser: article parser
+        :param str text: text
+
+        :returns: article
+        :rtype: Article
+        """
+        article = src.wppage.Article("Foo", "1", False, "1", text)
+        return parser.parse(article)
+
+    def test_substitute(self):
+        """Test substituting arguments for params."""
+        content = TEMPLATES["Template:Born"]
+        self.assertEqual(
+            "born 1900",
+            src.wpmarkupparser.expansion.substitute(content, {"1": "1900"})
+        )
+        self.assertEqual(
+            "born 1900 in Foo",
+            src.wpmarkupparser.expansion.substitute(
+                content, {"1": "1800", "date": "1900", "place": " in Foo"}
+            )
+        )
+        self.assertEqual(
+            "born unknown",
+            src.wpmarkupparser.expansion.substitute(content, {})
+        )
+        self.assertEqual(
+            "{{{1", src.wpmarkupparser.expansion.substitute("{{{1", {})
+        )
+        return
+
+    def test_expansion(self):
+        """Test expanding inclusions."""
+        for engine, parser in self.parsers.items():
+            article = self._parse(
+                parser, "{{Main|Foo bar}} was {{Born| date = 1900 }}."
+            )
+            self.assertEqual(
+                "Main article: Foo bar was born 1900.", article.text, engine
+            )
+            self.assertEqual(
+                ["Template:Main", "Template:Born"],
+                [inclusion["template"] for inclusion in article.inclusions]
+            )
+            self.assertEqual(
+                "Main article: Foo bar",
+                article.text[
+                    article.inclusions[0]["start_doc"]:
+                    article.inclusions[0]["end_doc"]
+                ]
+            )
+            self.assertEqual(1, len(article.links))
+            self.assertEqual("Foo bar", article.links[0]["target"])
+            self.assertEqual(
+                "Foo bar",
+                article.text[
+                    article.links[0]["start_doc"]:
+                    article.links[0]["end_doc"]
+                ]
+            )
+        return
+
+    def test_missing_template(self):
+        """Test inclusions of missing templates."""
+        for engine, parser in self.parsers.items():
+            article = self._parse(parser, "{{Qux|a}}")
+            self.assertEqual("Template:Qux", article.text, engine)
+        return
+
+    def test_depth(self):
+        """Test maximum nesting depth."""
+        for engine, parser in self.parsers.items():
+            article = self._parse(parser, "{{Loop}}")
+            self.assertEqual("loop loop Template:Loop", article.text, engine)
+            self.assertEqual(1, len(article.inclusions))
+        return
+
+    def test_cache(self):
+        """Test expansion cache."""
+        parser = self.parsers["pyparsing"]
+        self._parse(parser, "{{Main|Foo}} {{Main|Foo}} {{Main|Bar}}")
+        self.assertEqual(1, self.expander.hits)
+        self.assertEqual(2, self.expander.misses)
+        self.assertEqual(1, self.expander.get_body.cache_info().misses)
+        return
+
+    def test_expanded(self):
+        """Test expanded templates (including nested and cached ones)."""
+        for engine, parser in self.parsers.items():
+            self._parse(parser, "{{Loop}} {{Qux}}")
+            self.assertEqual(
+                frozenset(["Template:Loop", "Template:Qux"]),
+                parser.expanded, engine
+            )
+            # the second time from the expansion cache
+            for _ in range(2):
+                self._parse(parser, "{{See|Foo}}")
+                self.assertEqual(
+                    frozenset(["Template:See", "Template:Main"]),
+                    parser.expanded, engine
+                )
+        return
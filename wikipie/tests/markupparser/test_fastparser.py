@@ -0,0 +1,116 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test regex-only fast extraction.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.fastparser
+
+
+class TestFastParser(unittest.TestCase):
+    """Test regex-only fast extraction."""
+
+    def setUp(self):
+        """Set up article parsers."""
+        args = argparse.Namespace(categories=False)
+        self.parser = src.wpmarkupparser.parser.ArticleParser(args)
+        self.fast_parser = src.wpmarkupparser.fastparser.FastArticleParser(
+            args
+        )
+        return
+
+    def _parse(self, parser, text):
+        """Parse article.
+
+        :param parser: article parser
+        :param str text: text
+
+        :returns: article
+        :rtype: Article
+        """
+        article = src.wppage.Article("Foo", "1", False, "1", text)
+        return parser.parse(article)
+
+    def _strip_locations(self, records):
+        """Strip locations off records.
+
+        :param list records: link or inclusion records
+
+        :returns: records without locations
+        :rtype: list
+        """
+        return [
+            {
+                key: value for key, value in record.items()
+                if key not in ("start_doc", "end_doc")
+            }
+            for record in records
+        ]
+
+    def test_records(self):
+        """Test records against those of the full parser."""
+        texts = [
+            "Foo [[bar|baz]]s and [[ qux ]]. [[a#b|c]]",
+            "'''[[bold link]]''' in a {{cite|a=1|b}} and {{ foo }}",
+            "{{outer|{{inner|q}}|n=[[l|m]]}} [[Talk:Foo]]",
+            "{{subst:foo|a}} {{Template:Bar| k = v }} {{lc:X}} {{PAGENAME}}",
+            "<!-- [[no]] --> <nowiki>[[not]]</nowiki> <ref>[[r]]</ref>",
+            "[[File:X.jpg|thumb|A [[caption link]]]]"
+        ]
+        for text in texts:
+            expected = self._parse(self.parser, text)
+            article = self._parse(self.fast_parser, text)
+            self.assertEqual(
+                self._strip_locations(expected.links),
+                self._strip_locations(article.links)
+            )
+            self.assertEqual(
+                self._strip_locations(expected.inclusions),
+                self._strip_locations(article.inclusions)
+            )
+            self.assertEqual(expected.categories, article.categories)
+        return
+
+    def test_locations(self):
+        """Test locations refer to the wikitext."""
+        text = "<!-- {{x}} --><nowiki>{{</nowiki> [[a|b]]c {{d|[[e]]}}"
+        article = self._parse(self.fast_parser, text)
+        self.assertEqual(text, article.text)
+        self.assertEqual(
+            ["[[a|b]]c"],
+            [text[link["start_doc"]:link["end_doc"]] for link in article.links]
+        )
+        self.assertEqual(
+            ["{{d|[[e]]}}"],
+            [
+                text[inclusion["start_doc"]:inclusion["end_doc"]]
+                for inclusion in article.inclusions
+            ]
+        )
+        return
@@ -0,0 +1,170 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test incremental parsing of revisions.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+import unittest.mock
+
+# third party imports
+import hypothesis
+import hypothesis.strategies
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+
+
+# revisions (revision ID, parent revision ID, text)
+REVISIONS = [
+    (
+        "1", "",
+        "'''Foo''' is a [[bar]].\n== History ==\n{{Main|History}}\n"
+        "Foo was [[Qux]].\n== See also ==\n* [[a]]\n[[Category:Foo]]\n"
+    ),
+    (
+        "2", "1",
+        "'''Foo''' is a [[bar]].\n== History ==\n{{Main|History}}\n"
+        "Foo was [[Qux|qux]] <nowiki>[[x]]</nowiki>.\n== See also ==\n"
+        "* [[a]]\n[[Category:Foo]]\n"
+    ),
+    (
+        "3", "2",
+        "'''Foo''' is a [[baz]].\n== History ==\n{{Main|History}}\n"
+        "Foo was [[Qux|qux]] <nowiki>[[x]]</nowiki>.\n== See also ==\n"
+        "* [[a]]\n[[Category:Foo]]\n"
+    )
+]
+
+# wiki markup fragments
+FRAGMENTS = [
+    "a", "b c", "é", " ", "|", "=", "==", "[[", "]]", "{{", "}}", "{|",
+    "|}", "''", "'''", "<ref>", "</ref>", "<nowiki>", "</nowiki>", "<p>",
+    "</p>", "<h2>", "</h2>", "*", "#", ":", "Category:", "{{PAGENAME}}"
+]
+
+
+def _lines():
+    """Get wiki markup lines strategy.
+
+    :returns: wiki markup lines strategy
+    :rtype: SearchStrategy
+    """
+    content = hypothesis.strategies.lists(
+        hypothesis.strategies.sampled_from(FRAGMENTS), max_size=5
+    ).map("".join)
+    header = content.map(lambda content: "== " + content + " ==")
+    return hypothesis.strategies.lists(
+        hypothesis.strategies.one_of(content, header), max_size=4
+    )
+
+
+class TestIncremental(unittest.TestCase):
+    """Test incremental parsing of revisions."""
+
+    def setUp(self):
+        """Set up parsers."""
+        args = argparse.Namespace(categories=False)
+        self.parsers = {
+            engine: [
+                src.wpmarkupparser.parser.ArticleParser(args, engine=engine),
+                src.wpmarkupparser.parser.ArticleParser(
+                    args, engine=engine, incremental=True
+                )
+            ]
+            for engine in src.wpmarkupparser.parser.ENGINES
+        }
+        return
+
+    def _parse(self, parser, revid, parentid, text):
+        """Parse revision.
+
+        :param ArticleParser parser: article parser
+        :param str revid: revision ID
+        :param str parentid: parent revision ID
+        :param str text: text
+
+        :returns: text, inclusions, links, categories and source locations
+        :rtype: tuple
+        """
+        page = src.wppage.Article(
+            "title", "0", "", revid, text, parentid=parentid
+        )
+        page = parser.parse(page)
+        return (
+            page.text, page.inclusions, page.links, page.categories,
+            [parser.get_source_location(loc) for loc in range(len(page.text))]
+        )
+
+    def test_parse_incremental_00(self):
+        """Test incremental parsing against parsing from scratch."""
+        for parser, incremental_parser in self.parsers.values():
+            for revid, parentid, text in REVISIONS:
+                self.assertEqual(
+                    self._parse(parser, revid, parentid, text),
+                    self._parse(incremental_parser, revid, parentid, text)
+                )
+        return
+
+    def test_parse_incremental_01(self):
+        """Test reuse of unchanged sections."""
+        _, parser = self.parsers["linear"]
+        with unittest.mock.patch.object(
+                parser, "_parse", wraps=parser._parse
+        ) as parse:
+            for revid, parentid, text in REVISIONS:
+                self._parse(parser, revid, parentid, text)
+            # 3 sections, then 1 changed section each
+            self.assertEqual(5, parse.call_count)
+        self.assertEqual([1, 2, 3], list(parser.revisions))
+        return
+
+    def test_parse_incremental_02(self):
+        """Test bounded number of revisions."""
+        _, parser = self.parsers["linear"]
+        for revid in range(parser.MAX_REVISIONS + 2):
+            self._parse(parser, str(revid), "", "a\n== H ==\nb")
+        self.assertEqual(parser.MAX_REVISIONS, len(parser.revisions))
+        return
+
+    @hypothesis.settings(deadline=None)
+    @hypothesis.given(_lines(), _lines(), _lines())
+    def test_parse_incremental_03(self, prefix, suffix, edit):
+        """Test reusing sections against parsing from scratch.
+
+        :param list prefix: lines both revisions start with
+        :param list suffix: lines both revisions end with
+        :param list edit: lines inserted into the second revision
+        """
+        revisions = [
+            ("1", "", "\n".join(prefix + suffix)),
+            ("2", "1", "\n".join(prefix + edit + suffix))
+        ]
+        for parser, incremental_parser in self.parsers.values():
+            incremental_parser.revisions.clear()
+            for revid, parentid, text in revisions:
+                self.assertEqual(
+                    self._parse(parser, revid, parentid, text),
+                    self._parse(incremental_parser, revid, parentid, text)
+                )
+        return
@@ -0,0 +1,147 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test offset-tracking output buffer.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+import hypothesis
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.output
+import src.wpmarkupparser.parser
+import tests.markupparser.test_engine
+
+
+class TestOutputBuffer(unittest.TestCase):
+    """Test offset-tracking output buffer."""
+
+    def setUp(self):
+        """Set up output buffer."""
+        # source "ab{{c}}d|e", "|" is skipped
+        self.output = src.wpmarkupparser.output.OutputBuffer()
+        self.output.append("a", 0, 1)
+        self.output.append("b", 1, 2)
+        self.output.append("Template:C", 2, 7)
+        self.output.append("d", 7, 8)
+        self.output.append("e", 9, 10)
+        return
+
+    def test_getvalue_00(self):
+        """Test output."""
+        self.assertEqual("abTemplate:Cde", self.output.getvalue())
+        self.assertEqual(14, self.output.length)
+        output = src.wpmarkupparser.output.OutputBuffer()
+        self.assertEqual("", output.getvalue())
+        return
+
+    def test_get_source_location_00(self):
+        """Test mapping output to source locations."""
+        self.assertEqual(
+            [0, 1, 2, 2, 7, 9, 10],
+            [
+                self.output.get_source_location(loc)
+                for loc in (0, 1, 2, 11, 12, 13, 14)
+            ]
+        )
+        return
+
+    def test_get_output_location_00(self):
+        """Test mapping source to output locations."""
+        self.assertEqual(
+            [0, 1, 2, 2, 12, 13, 13, 14],
+            [
+                self.output.get_output_location(loc)
+                for loc in (0, 1, 2, 6, 7, 8, 9, 10)
+            ]
+        )
+        return
+
+
+class TestOffsets(unittest.TestCase):
+    """Test article parser offsets."""
+
+    def setUp(self):
+        """Set up parsers."""
+        args = argparse.Namespace(categories=False)
+        self.parsers = [
+            src.wpmarkupparser.parser.ArticleParser(args, engine=engine)
+            for engine in src.wpmarkupparser.parser.ENGINES
+        ]
+        return
+
+    def test_offsets_00(self):
+        """Test offsets after skipped characters and nowiki."""
+        text = "a | {{b}} <!-- c -->[[d|e]] <nowiki>''f''</nowiki> [[g]]"
+        for parser in self.parsers:
+            page = parser.parse(
+                src.wppage.Article("title", "0", "", "0", text)
+            )
+            self.assertEqual("a  Template:B e ''f'' g", page.text)
+            self.assertEqual(
+                [(3, 13)],
+                [
+                    (inclusion["start_doc"], inclusion["end_doc"])
+                    for inclusion in page.inclusions
+                ]
+            )
+            self.assertEqual(
+                [(14, 15), (22, 23)],
+                [
+                    (link_["start_doc"], link_["end_doc"])
+                    for link_ in page.links
+                ]
+            )
+            self.assertEqual(
+                [0, 4, 20, 28, 51],
+                [parser.get_source_location(loc) for loc in (0, 3, 14, 18, 22)]
+            )
+        return
+
+    @hypothesis.given(tests.markupparser.test_engine._fragments())
+    def test_offsets_01(self, text):
+        """Test offsets cover inclusions and links.
+
+        :param str text: text
+        """
+        for parser in self.parsers:
+            page = src.wppage.Article("title", "0", "", "0", text)
+            try:
+                page = parser.parse(page)
+            except KeyError:
+                # empty page names (both engines)
+                parser._restore()
+                continue
+            for inclusion in page.inclusions:
+                self.assertEqual(
+                    inclusion["template"],
+                    page.text[inclusion["start_doc"]:inclusion["end_doc"]]
+                )
+            for link_ in page.links:
+                self.assertEqual(
+                    link_["covered_text"],
+                    page.text[link_["start_doc"]:link_["end_doc"]]
+                )
+        return
@@ -0,0 +1,160 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test pre-strip of comments, nowiki and parser extension tags.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.prestrip
+import tests.wpdata
+
+
+class TestPrestrip(unittest.TestCase):
+    """Test pre-strip of comments, nowiki and parser extension tags.
+
+    :cvar list PARSER_EXTENSIONS: parser extensions
+    """
+    PARSER_EXTENSIONS = tests.wpdata.PARSER_EXTENSIONS
+
+    def setUp(self):
+        """Set up pre-stripper."""
+        self.prestripper = src.wpmarkupparser.prestrip.Prestripper(
+            self.PARSER_EXTENSIONS
+        )
+        return
+
+    def test_strip_00(self):
+        """Test comments and parser extensions."""
+        text, spans, nowikis = self.prestripper.strip(
+            "a<!-- b -->c<ref name=x/>d<REF>e</ref >f<math>g</math>"
+        )
+        self.assertEqual("ac\U000F0000d\U000F0000f\U000F0000", text)
+        self.assertEqual(
+            [(1, 11, 0), (12, 25, 1), (26, 39, 1), (40, 54, 1)], spans
+        )
+        self.assertEqual({"\U000F0000": ""}, nowikis)
+        return
+
+    def test_strip_01(self):
+        """Test nowiki."""
+        text, spans, nowikis = self.prestripper.strip(
+            "a<nowiki>[[b]]</nowiki>c<nowiki/>"
+        )
+        self.assertEqual("a\U000F0000c\U000F0001", text)
+        self.assertEqual([(1, 23, 1), (24, 33, 1)], spans)
+        self.assertEqual(
+            {"\U000F0000": "[[b]]", "\U000F0001": ""}, nowikis
+        )
+        return
+
+    def test_strip_02(self):
+        """Test text containing placeholder characters."""
+        text, _, nowikis = self.prestripper.strip(
+            "\U000F0000<nowiki>a</nowiki>"
+        )
+        self.assertEqual("\U000F0000<nowiki>a</nowiki>", text)
+        self.assertEqual({}, nowikis)
+        return
+
+    def test_get_source_location_00(self):
+        """Test mapping locations to source text."""
+        spans = [(1, 11, 0), (12, 34, 1)]
+        self.assertEqual(
+            [0, 11, 12, 34],
+            [
+                src.wpmarkupparser.prestrip.get_source_location(spans, loc)
+                for loc in range(4)
+            ]
+        )
+        return
+
+    def test_source_map_00(self):
+        """Test mapping locations with precomputed shifts."""
+        spans = [(1, 11, 0), (12, 34, 1), (34, 40, 0), (41, 44, 1)]
+        source_map = src.wpmarkupparser.prestrip.SourceMap(spans)
+        self.assertEqual(
+            [
+                src.wpmarkupparser.prestrip.get_source_location(spans, loc)
+                for loc in range(8)
+            ],
+            [source_map.get_source_location(loc) for loc in range(8)]
+        )
+        return
+
+    def test_article_parser_00(self):
+        """Test article parser."""
+        args = argparse.Namespace(categories=False)
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            parser = src.wpmarkupparser.parser.ArticleParser(
+                args, engine=engine
+            )
+            page = src.wppage.Article(
+                "title", "0", "", "0",
+                "<nowiki>''a''</nowiki> "
+                "[[b<!-- c -->d|<nowiki>[[e]]</nowiki>]]<ref>{{f}}</ref>"
+            )
+            page = parser.parse(page)
+            self.assertEqual("''a'' [[e]]", page.text)
+            self.assertEqual([], page.inclusions)
+            self.assertEqual(
+                [
+                    {
+                        "covered_text": "[[e]]", "target": "bd",
+                        "start_doc": 6, "end_doc": 11
+                    }
+                ],
+                page.links
+            )
+        return
+
+    def test_article_parser_01(self):
+        """Test link trails after empty nowiki and parser extension tags."""
+        args = argparse.Namespace(categories=False)
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            parser = src.wpmarkupparser.parser.ArticleParser(
+                args, engine=engine
+            )
+            page = src.wppage.Article(
+                "title", "0", "", "0", "[[a]]<nowiki/>s [[b]]<ref>c</ref>s"
+            )
+            page = parser.parse(page)
+            self.assertEqual("as bs", page.text)
+            self.assertEqual(
+                [
+                    {
+                        "covered_text": "a", "target": "a",
+                        "start_doc": 0, "end_doc": 1
+                    },
+                    {
+                        "covered_text": "b", "target": "b",
+                        "start_doc": 3, "end_doc": 4
+                    }
+                ],
+                page.links
+            )
+        return
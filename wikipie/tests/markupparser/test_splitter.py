@@ -0,0 +1,209 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test section-wise parsing.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+import hypothesis
+import hypothesis.strategies
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.splitter
+
+
+# wiki markup fragments
+FRAGMENTS = [
+    "a", "b c", "é", " ", "|", "=", "==", "[[", "]]", "{{", "}}", "{{{",
+    "}}}", "{|", "|}", "''", "'''", "<ref>", "</ref>", "<nowiki>",
+    "</nowiki>", "<br>", "----", "<p>", "</p>", "<h2>", "</h2>", "*", "#",
+    ":", ";", "http://example.org", "Category:", "de:", "{{PAGENAME}}",
+    "<cite>", "</cite>", "<noinclude>", "</noinclude>"
+]
+
+# header delimiters (opening, closing)
+HEADERS = [("=", "="), ("==", "=="), ("===", "==="), ("<h2>", "</h2>")]
+
+
+def _lines():
+    """Get wiki markup line strategy.
+
+    :returns: wiki markup line strategy
+    :rtype: SearchStrategy
+    """
+    content = hypothesis.strategies.lists(
+        hypothesis.strategies.sampled_from(FRAGMENTS), max_size=5
+    ).map("".join)
+    header = hypothesis.strategies.tuples(
+        hypothesis.strategies.sampled_from(HEADERS), content
+    ).map(lambda header: header[0][0] + header[1] + header[0][1])
+    return hypothesis.strategies.one_of(content, header)
+
+
+def _pages():
+    """Get wiki markup page strategy.
+
+    :returns: wiki markup page strategy
+    :rtype: SearchStrategy
+    """
+    return hypothesis.strategies.lists(
+        _lines(), min_size=1, max_size=8
+    ).map("\n".join)
+
+
+class TestSplitter(unittest.TestCase):
+    """Test section-wise parsing."""
+
+    def setUp(self):
+        """Set up whole page and section-wise parsers."""
+        args = argparse.Namespace(categories=False)
+        self.parsers = {
+            engine: [
+                src.wpmarkupparser.parser.ArticleParser(args, engine=engine),
+                src.wpmarkupparser.parser.ArticleParser(
+                    args, engine=engine, section_size=1, section_processes=2
+                )
+            ]
+            for engine in src.wpmarkupparser.parser.ENGINES
+        }
+        return
+
+    def tearDown(self):
+        """Close section processes."""
+        for parsers in self.parsers.values():
+            for parser in parsers:
+                parser.close()
+        return
+
+    def _assert_sections(self, text):
+        """Assert section-wise and whole page parsing agree.
+
+        :param str text: text
+        """
+        for parsers in self.parsers.values():
+            results = []
+            for parser in parsers:
+                page = src.wppage.Article("title", "0", "", "0", text)
+                page = parser.parse(page)
+                results.append(
+                    (
+                        page.text, page.inclusions, page.links,
+                        page.categories,
+                        [
+                            parser.get_source_location(loc)
+                            for loc in range(len(page.text))
+                        ]
+                    )
+                )
+            self.assertEqual(results[0], results[1])
+        return
+
+    def test_get_boundaries_00(self):
+        """Test top-level header boundaries."""
+        self.assertEqual(
+            [10, 52],
+            src.wpmarkupparser.splitter.get_boundaries(
+                "a\n== H ==\nb {{x\n== I ==\n}} {|\n== J ==\n|}\n<h2>K</h2>\n"
+                "== L\n==\n"
+            )
+        )
+        return
+
+    def test_get_boundaries_01(self):
+        """Test header lines not matched as a whole."""
+        self.assertEqual(
+            [10],
+            src.wpmarkupparser.splitter.get_boundaries(
+                "a\n== H ==\n== I [[b]] ==\n# c",
+                is_header=lambda line: "[[" not in line
+            )
+        )
+        return
+
+    def test_get_boundaries_02(self):
+        """Test header lines opening enclosing wiki markup."""
+        self.assertEqual(
+            [28],
+            src.wpmarkupparser.splitter.get_boundaries(
+                "\n== [[ ==\n==  ==\n]]\n== H ==\na"
+            )
+        )
+        return
+
+    def test_split_sections_00(self):
+        """Test chunks."""
+        text = "a\n== H ==\nb\n=== I ===\nc\n== J ==\nd"
+        self.assertEqual(
+            [
+                (0, "a\n== H ==\n"), (10, "b\n=== I ===\n"),
+                (22, "c\n== J ==\n"), (32, "d")
+            ],
+            src.wpmarkupparser.splitter.split_sections(text, 1)
+        )
+        self.assertEqual(
+            [(0, "a\n== H ==\nb\n=== I ===\n"), (22, "c\n== J ==\nd")],
+            src.wpmarkupparser.splitter.split_sections(text, 15)
+        )
+        return
+
+    def test_parse_sections_00(self):
+        """Test section-wise parsing against whole page parsing."""
+        self._assert_sections(
+            "'''Foo''' is a [[bar|baz]].<ref>{{cite|a=1}}</ref>\n"
+            "== History ==\n{{Main|History of foo}}\n"
+            "Foo<!-- comment --> was [[Qux]]. <nowiki>[[x]]</nowiki>\n"
+            "=== Early ===\n* [[a]]\n* {{b|c=[[d]]}}\n\n"
+            "== See also ==\n[[Category:Foo]]\n"
+        )
+        return
+
+    def test_parse_sections_01(self):
+        """Test header lines not matched as headers."""
+        self._assert_sections(
+            "'''Foo''' is a [[bar|baz]]s and {{cite}} with ''it'' "
+            "<ref>r</ref>.\n== H2 [[hl2]] ==\n# num {{x}}"
+        )
+        return
+
+    def test_parse_sections_02(self):
+        """Test inclusions followed by headers."""
+        self._assert_sections("{{a|b}}\n<h2>K</h2>\n==\n[[c]]")
+        return
+
+    def test_parse_sections_03(self):
+        """Test header lines opening links."""
+        self._assert_sections("\n== [[ ==\n==  ==\n]]")
+        return
+
+    @hypothesis.settings(deadline=None)
+    @hypothesis.given(_pages())
+    def test_parse_sections_04(self, text):
+        """Test section-wise parsing against whole page parsing.
+
+        :param str text: text
+        """
+        self._assert_sections(text)
+        return
@@ -0,0 +1,179 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test reduced wiki markup parser element variants.
+"""
+
+
+# standard library imports
+import argparse
+import unittest
+
+# third party imports
+import hypothesis
+
+# library specific imports
+import src.wppage
+import src.wpmarkupparser.parser
+import tests.markupparser.test_engine
+
+
+class TestVariants(unittest.TestCase):
+    """Test reduced wiki markup parser element variants.
+
+    Reduced variants have to parse pages alike the full grammar.
+    """
+
+    def setUp(self):
+        """Set up parsers."""
+        args = argparse.Namespace(categories=False)
+        self.parsers = [
+            src.wpmarkupparser.parser.ArticleParser(args, engine=engine)
+            for engine in src.wpmarkupparser.parser.ENGINES
+        ]
+        # reduced grammar (text is not extracted)
+        extract = frozenset(["inclusions", "links", "categories"])
+        self.reduced_parsers = [
+            src.wpmarkupparser.parser.ArticleParser(
+                args, engine=engine, extract=extract
+            )
+            for engine in src.wpmarkupparser.parser.ENGINES
+        ]
+        return
+
+    def _parse(self, parser, text, features=None):
+        """Parse article.
+
+        :param ArticleParser parser: article parser
+        :param str text: text
+        :param frozenset features: optional parser elements to keep
+            (None picks them by text)
+
+        :returns: text, inclusions and links
+        :rtype: tuple
+        """
+        if features is not None:
+            parser._get_features = lambda text: features
+        page = src.wppage.Article("title", "0", "", "0", text)
+        try:
+            page = parser.parse(page)
+        except Exception as exception:
+            parser._restore()
+            return type(exception)
+        finally:
+            if features is not None:
+                del parser._get_features
+        return page.text, page.inclusions, page.links
+
+    def test_get_features_00(self):
+        """Test optional parser elements triggered in text."""
+        parser = self.parsers[0]
+        self.assertEqual(frozenset(), parser._get_features("a [[b]] {{c}}"))
+        self.assertEqual(
+            frozenset(["param", "basic_table", "behavior_switch"]),
+            parser._get_features("{{{a}}} {|\n|} __NOTOC__")
+        )
+        self.assertEqual(
+            frozenset(["abbr_tag", "cite_tag", "comment", "noinclude"]),
+            parser._get_features(
+                "<abbr>a</abbr><cite>b</cite><!----><noinclude>c</noinclude>"
+            )
+        )
+        return
+
+    def test_get_variant_00(self):
+        """Test variant cache."""
+        parser = self.parsers[0]
+        variant = parser._get_variant(frozenset(["param"]))
+        self.assertIs(variant, parser._get_variant(frozenset(["param"])))
+        self.assertIs(
+            parser.wiki_markup,
+            parser._get_variant(
+                frozenset(src.wpmarkupparser.parser.OPTIONAL_ELEMENTS)
+            )
+        )
+        return
+
+    @hypothesis.given(tests.markupparser.test_engine._fragments())
+    def test_parse_00(self, text):
+        """Test reduced variants against full grammar.
+
+        :param str text: text
+        """
+        features = frozenset(src.wpmarkupparser.parser.OPTIONAL_ELEMENTS)
+        for parser in self.parsers:
+            self.assertEqual(
+                self._parse(parser, text, features=features),
+                self._parse(parser, text)
+            )
+        return
+
+    def _get_records(self, parsed):
+        """Get records without locations.
+
+        :param tuple parsed: text, inclusions and links
+
+        :returns: inclusions and links
+        :rtype: tuple
+        """
+        _, inclusions, links = parsed
+        inclusions = [
+            (inclusion["template"], inclusion["args"])
+            for inclusion in inclusions
+        ]
+        links = [(link_["covered_text"], link_["target"]) for link_ in links]
+        return inclusions, links
+
+    @hypothesis.given(tests.markupparser.test_engine._fragments())
+    def test_extract_00(self, text):
+        """Test records extracted without text against full grammar.
+
+        :param str text: text
+        """
+        for parser, reduced_parser in zip(self.parsers, self.reduced_parsers):
+            expected = self._parse(parser, text)
+            hypothesis.assume(isinstance(expected, tuple))
+            reduced = self._parse(reduced_parser, text)
+            self.assertIsNone(reduced[0])
+            self.assertEqual(
+                self._get_records(expected), self._get_records(reduced)
+            )
+        return
+
+    def test_extract_01(self):
+        """Test records extracted without text against full grammar
+        (markup nested in headers, tags and external links).
+        """
+        wrappers = [
+            "<p>{}</p>", "<h2>{}</h2>", "=={}==", "== {} ==\n",
+            "[http://example.org {}]", "----[http://example.org {}]",
+            "http://example.org[http://example.org {}]", "''{}''",
+            "* {}\n", ": {}\n", "a<br>{}"
+        ]
+        nested = ["[[i]]", "{{x}}", "[[i|j]]s", "{{x|[[y]]}}"]
+        for parser, reduced_parser in zip(self.parsers, self.reduced_parsers):
+            for wrapper in wrappers:
+                for markup in nested:
+                    text = wrapper.format(markup)
+                    self.assertEqual(
+                        self._get_records(self._parse(parser, text)),
+                        self._get_records(self._parse(reduced_parser, text)),
+                        text
+                    )
+        return
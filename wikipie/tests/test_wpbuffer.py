@@ -0,0 +1,120 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test column-oriented record buffers.
+"""
+
+
+# standard library imports
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wpmongo
+import src.wpbuffer
+
+
+# links (by page ID)
+LINKS = {
+    1: [
+        {"covered_text": "bar", "target": "Bar", "start_doc": 0, "end_doc": 3},
+        {"covered_text": "Bar", "target": "Bar", "start_doc": 9, "end_doc": 12}
+    ],
+    2: [
+        {"covered_text": "", "target": "Baz", "start_doc": 4, "end_doc": 4}
+    ]
+}
+# inclusions (by page ID)
+INCLUSIONS = {
+    1: [
+        {
+            "template": "Template:Cite", "args": {"a": "1", "0": "b"},
+            "start_doc": 0, "end_doc": 13
+        },
+        {"template": "Template:X", "args": {}, "start_doc": 20, "end_doc": 30}
+    ],
+    2: [
+        {
+            "template": "Template:Cite", "args": {"0": "b", "1": "1"},
+            "start_doc": 2, "end_doc": 15
+        }
+    ]
+}
+
+
+class TestWPBuffer(unittest.TestCase):
+    """Test column-oriented record buffers."""
+
+    def setUp(self):
+        """Set up record buffers."""
+        self.strings = src.wpbuffer.StringTable()
+        self.links = src.wpbuffer.LinkBuffer(strings=self.strings)
+        self.inclusions = src.wpbuffer.InclusionBuffer(strings=self.strings)
+        for pageid, links in LINKS.items():
+            self.links.extend(pageid, links)
+        for pageid, inclusions in INCLUSIONS.items():
+            self.inclusions.extend(pageid, inclusions)
+        return
+
+    def test_link_buffer(self):
+        """Test link records assembled from link buffer."""
+        self.assertEqual(3, len(self.links))
+        self.assertEqual(
+            [
+                src.wpmongo._get_link_record(pageid, dict(link_))
+                for pageid, links in LINKS.items() for link_ in links
+            ],
+            [
+                src.wpmongo._get_buffered_link_record(*fields)
+                for fields in self.links
+            ]
+        )
+        return
+
+    def test_inclusion_buffer(self):
+        """Test inclusion records assembled from inclusion buffer."""
+        self.assertEqual(3, len(self.inclusions))
+        self.assertEqual(
+            [
+                src.wpmongo._get_inclusion_record(pageid, dict(inclusion))
+                for pageid, inclusions in INCLUSIONS.items()
+                for inclusion in inclusions
+            ],
+            [
+                src.wpmongo._get_buffered_inclusion_record(*fields)
+                for fields in self.inclusions
+            ]
+        )
+        return
+
+    def test_string_table(self):
+        """Test strings are stored once."""
+        self.assertEqual(
+            ["bar", "Bar", "", "Baz", "Template:Cite", "a", "1", "0", "b",
+             "Template:X"],
+            self.strings.strings
+        )
+        self.links.clear()
+        self.inclusions.clear()
+        self.strings.clear()
+        self.assertEqual(0, len(self.links))
+        self.assertEqual([], list(self.inclusions))
+        self.assertEqual(0, len(self.strings))
+        return
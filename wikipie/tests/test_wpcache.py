@@ -0,0 +1,175 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test parse cache.
+"""
+
+
+# standard library imports
+import os
+import argparse
+import tempfile
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wpcache
+import src.wppage
+import src.wpconfig
+import src.wpmarkupparser.parser
+
+
+class TestWPCache(unittest.TestCase):
+    """Test parse cache."""
+
+    def setUp(self):
+        """Set up parse cache."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.db")
+        self.namespace = src.wpcache.get_namespace(
+            src.wpmarkupparser.parser.VERSION, None, False
+        )
+        self.cache = src.wpcache.WPCache(self.path, 1024, self.namespace)
+        return
+
+    def tearDown(self):
+        """Tear down parse cache."""
+        self.cache.close()
+        self.directory.cleanup()
+        return
+
+    def _get_article(self, sha1="0" * 40, text="[[a|b]] {{c|d}}"):
+        """Get parsed article.
+
+        :param str sha1: revision SHA-1
+        :param str text: text
+
+        :returns: article
+        :rtype: Article
+        """
+        args = argparse.Namespace(categories=False)
+        parser = src.wpmarkupparser.parser.ArticleParser(args)
+        page = src.wppage.Article("title", "0", "", "0", text, sha1=sha1)
+        return parser.parse(page)
+
+    def test_get_namespace_00(self):
+        """Test namespaces."""
+        localization = src.wpconfig.get_localization("conf/de.ini")
+        namespaces = {
+            self.namespace,
+            src.wpcache.get_namespace(
+                src.wpmarkupparser.parser.VERSION, None, True
+            ),
+            src.wpcache.get_namespace(
+                src.wpmarkupparser.parser.VERSION, localization, False
+            ),
+            src.wpcache.get_namespace("0", None, False)
+        }
+        self.assertEqual(4, len(namespaces))
+        return
+
+    def test_get_00(self):
+        """Test hits and misses."""
+        article = self._get_article()
+        page = src.wppage.Article("title", "0", "", "0", "", sha1="0" * 40)
+        self.assertFalse(self.cache.get(page))
+        self.cache.put(article)
+        self.assertTrue(self.cache.get(page))
+        self.assertEqual(
+            (article.text, article.inclusions, article.links),
+            (page.text, page.inclusions, page.links)
+        )
+        # other namespace, page type or no SHA-1
+        cache = src.wpcache.WPCache(self.path, 1024, "other")
+        self.assertFalse(cache.get(page))
+        cache.close()
+        template = src.wppage.Template(
+            "title", "0", "", "0", "", sha1="0" * 40
+        )
+        self.assertFalse(self.cache.get(template))
+        page.sha1 = ""
+        self.assertFalse(self.cache.get(page))
+        self.assertEqual((1, 2), (self.cache.hits, self.cache.misses))
+        self.assertAlmostEqual(1 / 3, self.cache.hit_rate)
+        return
+
+    def test_evict_00(self):
+        """Test eviction of least recently used entries."""
+        for i in range(8):
+            self.cache.put(
+                self._get_article(sha1=str(i), text=os.urandom(400).hex())
+            )
+        self.cache.evict()
+        size, count = self.cache.connection.execute(
+            "SELECT TOTAL(size), COUNT(*) FROM parse_cache"
+        ).fetchone()
+        self.assertLessEqual(size, 1024)
+        self.assertLess(0, count)
+        page = src.wppage.Article("title", "0", "", "0", "", sha1="7")
+        self.assertTrue(self.cache.get(page))
+        page.sha1 = "0"
+        self.assertFalse(self.cache.get(page))
+        return
+
+    def test_get_01(self):
+        """Test collector hook records."""
+        article = self._get_article()
+        article.collected = {"refs": [{"start_doc": 0, "end_doc": 1}]}
+        self.cache.put(article)
+        page = src.wppage.Article("title", "0", "", "0", "", sha1="0" * 40)
+        self.assertTrue(self.cache.get(page))
+        self.assertEqual(article.collected, page.collected)
+        return
+
+    def test_get_02(self):
+        """Test expanded templates."""
+        # Template:D does not exist
+        digests = {"Template:C": "1", "Template:D": ""}
+        self.cache.put(self._get_article(), templates=dict(digests))
+        page = src.wppage.Article("title", "0", "", "0", "", sha1="0" * 40)
+        self.assertTrue(self.cache.get(page, get_digest=digests.get))
+        digests["Template:D"] = "2"
+        self.assertFalse(self.cache.get(page, get_digest=digests.get))
+        return
+
+    def test_get_03(self):
+        """Test batched access times."""
+        self.cache.put(self._get_article())
+        page = src.wppage.Article("title", "0", "", "0", "", sha1="0" * 40)
+        query = "SELECT atime FROM parse_cache"
+        atime = self.cache.connection.execute(query).fetchone()[0]
+        self.assertTrue(self.cache.get(page))
+        self.assertEqual(
+            atime, self.cache.connection.execute(query).fetchone()[0]
+        )
+        self.cache.evict()
+        self.assertLess(
+            atime, self.cache.connection.execute(query).fetchone()[0]
+        )
+        return
+
+    def test_get_version_00(self):
+        """Test parser version."""
+        version = src.wpmarkupparser.parser.get_version()
+        self.assertTrue(
+            version.startswith(src.wpmarkupparser.parser.VERSION + "+")
+        )
+        self.assertEqual(version, src.wpmarkupparser.parser.get_version())
+        return
@@ -0,0 +1,126 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test intern table.
+"""
+
+
+# standard library imports
+import sys
+import argparse
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpintern
+import src.wpregistry
+import src.wpmarkupparser.parser
+import src.wpmarkupparser.fastparser
+
+
+# texts (sharing link targets and templates)
+TEXTS = [
+    "Foo [[bar|baz]] and {{cite web|a=1}}.",
+    "[[bar]] {{Cite web|b=2}} and [[qux]]."
+]
+
+
+class TestWPIntern(unittest.TestCase):
+    """Test intern table."""
+
+    def setUp(self):
+        """Set up article parsers."""
+        self.args = argparse.Namespace(categories=False)
+        return
+
+    def _parse(self, parser):
+        """Parse articles.
+
+        :param parser: article parser
+
+        :returns: articles
+        :rtype: list
+        """
+        return [
+            parser.parse(src.wppage.Article("Foo", str(i), False, "1", text))
+            for i, text in enumerate(TEXTS, start=1)
+        ]
+
+    def test_intern(self):
+        """Test shared strings and report."""
+        interns = src.wpintern.InternTable(strings=["Foo"])
+        foo = "".join(["F", "oo"])
+        self.assertIsNot("Foo", foo)
+        self.assertIs(interns.intern("Foo"), interns.intern(foo))
+        self.assertEqual(1, len(interns))
+        self.assertEqual(
+            {
+                "strings": 1, "hits": 2, "misses": 0,
+                "saved": sys.getsizeof(foo)
+            },
+            interns.get_report()
+        )
+        return
+
+    def test_seed_registry(self):
+        """Test seeding from template registry."""
+        registry = src.wpregistry.TemplateRegistry()
+        registry.register(
+            src.wppage.Template(
+                "Template:Cite", "1", "Template:Cite web", "1", ""
+            )
+        )
+        interns = src.wpintern.InternTable()
+        interns.seed_registry(registry)
+        self.assertIn("Template:Cite", interns)
+        self.assertIn("Template:Cite web", interns)
+        self.assertEqual(0, interns.misses)
+        return
+
+    def test_parsers(self):
+        """Test records of article parsers sharing strings."""
+        for parser_class in (
+                src.wpmarkupparser.parser.ArticleParser,
+                src.wpmarkupparser.fastparser.FastArticleParser
+        ):
+            with self.subTest(parser=parser_class.__name__):
+                interns = src.wpintern.InternTable()
+                first, second = self._parse(
+                    parser_class(self.args, interns=interns)
+                )
+                expected = self._parse(parser_class(self.args))
+                self.assertEqual(
+                    [article.links for article in expected],
+                    [first.links, second.links]
+                )
+                self.assertEqual(
+                    [article.inclusions for article in expected],
+                    [first.inclusions, second.inclusions]
+                )
+                self.assertIs(
+                    first.links[0]["target"], second.links[0]["target"]
+                )
+                self.assertIs(
+                    first.inclusions[0]["template"],
+                    second.inclusions[0]["template"]
+                )
+                self.assertEqual(2, interns.hits)
+        return
@@ -0,0 +1,156 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Test localization profiles.
+"""
+
+
+# standard library imports
+import os
+import shutil
+import argparse
+import tempfile
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpconfig
+import src.wpxmlparser
+import src.wplocalization
+import src.wpmarkupparser.parser
+
+
+# export file (siteinfo)
+XML = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" \
+xml:lang="fr">
+  <siteinfo>
+    <sitename>Wiktionnaire</sitename>
+    <dbname>frwiktionary</dbname>
+    <case>case-sensitive</case>
+    <namespaces>
+      <namespace key="0" case="case-sensitive" />
+      <namespace key="10" case="case-sensitive">Modèle</namespace>
+      <namespace key="14" case="case-sensitive">Catégorie</namespace>
+    </namespaces>
+  </siteinfo>
+</mediawiki>
+"""
+
+
+class TestWPLocalization(unittest.TestCase):
+    """Test localization profiles."""
+
+    def setUp(self):
+        """Set up localization file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_ = os.path.join(self.directory.name, "de.ini")
+        shutil.copy(src.wpconfig.LOCALIZATION.format("de"), self.file_)
+        self.cache = os.path.join(self.directory.name, "de.profile")
+        return
+
+    def tearDown(self):
+        """Tear down localization file."""
+        self.directory.cleanup()
+        return
+
+    def test_profile(self):
+        """Test building localization profile."""
+        profile = src.wplocalization.load_profile(self.file_)
+        self.assertEqual("Vorlage", profile.template_namespace)
+        self.assertIn("Kategorie", profile.category_namespaces)
+        self.assertIn("Category", profile.category_namespaces)
+        self.assertEqual("subst", profile.canonical_modifiers["ers"])
+        self.assertIn("Benutzerin", profile.namespaces)
+        with self.assertRaises(AttributeError):
+            profile.namespaces = ()
+        default = src.wplocalization.get_profile()
+        self.assertEqual("Template", default.template_namespace)
+        self.assertNotIn("Kategorie", default.category_namespaces)
+        return
+
+    def test_cache(self):
+        """Test caching localization profile."""
+        profile = src.wplocalization.load_profile(
+            self.file_, cache=self.cache
+        )
+        self.assertTrue(os.path.exists(self.cache))
+        cached = src.wplocalization.load_profile(self.file_, cache=self.cache)
+        self.assertEqual(profile.digest, cached.digest)
+        self.assertEqual(profile.namespaces, cached.namespaces)
+        with open(self.file_) as file_:
+            text = file_.read()
+        with open(self.file_, "w") as file_:
+            file_.write(text.replace("10=Vorlage", "10=Schablone"))
+        stale = src.wplocalization.load_profile(self.file_, cache=self.cache)
+        self.assertNotEqual(profile.digest, stale.digest)
+        self.assertEqual("Schablone", stale.template_namespace)
+        return
+
+    def test_parse(self):
+        """Test parsing with localization profile."""
+        profile = src.wplocalization.load_profile(self.file_)
+        args = argparse.Namespace(categories=False)
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            parser = src.wpmarkupparser.parser.ArticleParser(
+                args, localization=profile, engine=engine
+            )
+            article = src.wppage.Article(
+                "Foo", "1", False, "1", "{{ers:Foo}} [[Kategorie:Bar]]"
+            )
+            article = parser.parse(article)
+            self.assertEqual("Vorlage:Foo ", article.text, engine)
+            self.assertEqual(["Bar"], article.categories)
+        return
+
+    def test_siteinfo(self):
+        """Test localization profile from export file siteinfo."""
+        xml = os.path.join(self.directory.name, "frwiktionary.xml")
+        with open(xml, "w") as file_:
+            file_.write(XML)
+        siteinfo = src.wpxmlparser.WPXMLParser(xml).find_siteinfo()
+        self.assertEqual("frwiktionary", siteinfo["dbname"])
+        self.assertEqual(
+            {"name": "Modèle", "case": "case-sensitive"},
+            siteinfo["namespaces"]["10"]
+        )
+        profile = src.wplocalization.load_profile(
+            cache=self.cache, siteinfo=siteinfo
+        )
+        self.assertEqual("Modèle", profile.template_namespace)
+        self.assertIn("Catégorie", profile.category_namespaces)
+        self.assertFalse(profile.template_first_letter)
+        args = argparse.Namespace(categories=False)
+        for engine in src.wpmarkupparser.parser.ENGINES:
+            parser = src.wpmarkupparser.parser.ArticleParser(
+                args, localization=profile, engine=engine
+            )
+            article = src.wppage.Article(
+                "Foo", "1", False, "1", "{{foo}} [[Catégorie:Bar]]"
+            )
+            article = parser.parse(article)
+            self.assertEqual("Modèle:foo ", article.text, engine)
+            self.assertEqual(["Bar"], article.categories)
+        # localized names first
+        profile = src.wplocalization.load_profile(
+            self.file_, siteinfo=siteinfo
+        )
+        self.assertEqual("Vorlage", profile.template_namespace)
+        self.assertIn("Modèle", profile.template_namespaces)
+        return
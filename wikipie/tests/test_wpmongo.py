@@ -0,0 +1,392 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+"""
+:synopsis: Test mongoDB write buffer.
+"""
+
+
+# standard library imports
+import os
+import tempfile
+import unittest
+import unittest.mock
+import configparser
+
+# third party imports
+import bson
+import bson.raw_bson
+import pymongo.errors
+
+# library specific imports
+import src.wppage
+import src.wpmongo
+
+
+class TestWriteBuffer(unittest.TestCase):
+    """Test mongoDB write buffer."""
+
+    def setUp(self):
+        """Set up write buffer."""
+        self.buffer = src.wpmongo.WriteBuffer(
+            batch_size=200, flush_interval=5.0, target_latency=1.0
+        )
+        self.record = bson.raw_bson.RawBSONDocument(
+            bson.encode({"title": "Foo", "_id": 1})
+        )
+        return
+
+    def test_due(self):
+        """Test flushing on record count, size and elapsed time."""
+        self.assertFalse(self.buffer.is_due())
+        self.buffer.append(self.record)
+        self.assertEqual(len(self.record.raw), self.buffer.size)
+        self.assertFalse(self.buffer.is_due(now=self.buffer.time + 1.0))
+        self.assertTrue(self.buffer.is_due(now=self.buffer.time + 5.0))
+        for _ in range(199):
+            self.buffer.append(self.record)
+        self.assertTrue(self.buffer.is_full())
+        self.assertTrue(self.buffer.is_due(now=self.buffer.time))
+        self.assertEqual(200, len(self.buffer.take()[1]))
+        self.assertEqual(
+            (0, 0, None),
+            (len(self.buffer), self.buffer.size, self.buffer.time)
+        )
+        # below the message size limit
+        self.assertLess(self.buffer.MAX_BATCH_BYTES, 48000000)
+        self.buffer.size = self.buffer.MAX_BATCH_BYTES - len(self.record.raw)
+        self.assertTrue(self.buffer.fits(self.record))
+        self.buffer.size += 1
+        self.assertFalse(self.buffer.fits(self.record))
+        return
+
+    def test_keys(self):
+        """Test taking keyed records in page ID order."""
+        records = {}
+        for key in [(3, 1), (1, 2), (2, 1), (1, 1)]:
+            records[key] = bson.raw_bson.RawBSONDocument(
+                bson.encode({"_id": key[0], "revid": key[1]})
+            )
+            self.buffer.append(records[key], key=key)
+        keys, taken = self.buffer.take()
+        self.assertEqual([(1, 1), (1, 2), (2, 1), (3, 1)], keys)
+        self.assertEqual([records[key] for key in keys], taken)
+        self.buffer.append(self.record)
+        self.assertEqual(([None], [self.record]), self.buffer.take())
+        return
+
+    def test_adapt(self):
+        """Test adapting batch size to insert latency."""
+        self.buffer.adapt(0.1, 100)
+        self.assertEqual(200, self.buffer.batch_size)
+        self.buffer.adapt(0.1, 200)
+        self.assertEqual(250, self.buffer.batch_size)
+        self.buffer.adapt(0.75, 250)
+        self.assertEqual(250, self.buffer.batch_size)
+        self.buffer.adapt(2.0, 250)
+        self.assertEqual(125, self.buffer.batch_size)
+        self.buffer.adapt(2.0, 125)
+        self.assertEqual(
+            self.buffer.MIN_BATCH_SIZE, self.buffer.batch_size
+        )
+        return
+
+
+class TestWriteConcern(unittest.TestCase):
+    """Test write concern."""
+
+    def test_write_concern(self):
+        """Test write concerns (with and without bulk-load defaults)."""
+        self.assertIsNone(src.wpmongo.get_write_concern())
+        self.assertEqual(
+            {"w": "majority", "j": True},
+            src.wpmongo.get_write_concern(
+                w="majority", journal=True
+            ).document
+        )
+        self.assertEqual(
+            {"w": 1, "j": False},
+            src.wpmongo.get_write_concern(bulk_load=True).document
+        )
+        self.assertEqual(
+            {"w": 0, "j": False},
+            src.wpmongo.get_write_concern(w="0", bulk_load=True).document
+        )
+        return
+
+
+class TestUpsert(unittest.TestCase):
+    """Test upsert mode (without connecting to mongoDB)."""
+
+    def setUp(self):
+        """Set up mongoDB interface (connects lazily)."""
+        self.wpmongo = src.wpmongo.WPMongo(
+            0, "test", "localhost", 27017, upsert=True
+        )
+        self.records = [
+            bson.raw_bson.RawBSONDocument(
+                bson.encode({"_id": i, "revid": 1})
+            )
+            for i in range(3)
+        ]
+        return
+
+    def tearDown(self):
+        """Close client."""
+        self.wpmongo.client.close()
+        return
+
+    def test_delete_records(self):
+        """Test pending deletes."""
+        self.wpmongo.delete_records(1, "IWL")
+        self.wpmongo.delete_records(1, "IWL")
+        self.wpmongo.delete_records(2, "inclusion")
+        self.assertEqual(
+            {"IWL": {1}, "inclusion": {2}}, self.wpmongo.deletes
+        )
+        self.assertEqual({"IWL", "inclusion"}, set(self.wpmongo.buffers))
+        return
+
+    def test_replace_records(self):
+        """Test replacing records of pages whose upserts won only."""
+        collection = unittest.mock.MagicMock()
+        collection.bulk_write.side_effect = pymongo.errors.BulkWriteError(
+            {
+                "writeErrors": [
+                    {"index": 0, "code": 11000, "errmsg": "duplicate key"},
+                    {"index": 2, "code": 11000, "errmsg": "duplicate key"}
+                ],
+                "nInserted": 0, "nUpserted": 0, "nMatched": 1
+            }
+        )
+        with unittest.mock.patch.object(
+                self.wpmongo, "_get_collection", return_value=collection
+        ):
+            # page 1 is stored in revision 2, page 2 in a later revision
+            for pageid, revid in [(1, 1), (1, 2), (2, 1)]:
+                self.wpmongo.delete_records(pageid, "IWL", revid=revid)
+                link = {
+                    "covered_text": "a", "target": str(revid),
+                    "start_doc": 0, "end_doc": 1
+                }
+                self.wpmongo.insert_links(pageid, [link], revid=revid)
+                self.wpmongo.insert_pages(
+                    [src.wppage.Article("a", pageid, "", revid, "a")]
+                )
+            self.assertEqual({}, self.wpmongo.deletes)
+            self.assertEqual(0, len(self.wpmongo.buffers["IWL"]))
+            self.wpmongo.flush()
+            self.wpmongo.delete_records(3, "IWL")
+            self.wpmongo.flush()
+        self.assertEqual(
+            ({}, set(), 2),
+            (self.wpmongo.pending, self.wpmongo.lost, self.wpmongo.skipped)
+        )
+        self.assertEqual(
+            [
+                unittest.mock.call({"WP_page_id": {"$in": [1]}}),
+                unittest.mock.call({"WP_page_id": {"$in": [3]}})
+            ],
+            collection.delete_many.call_args_list
+        )
+        self.assertEqual(1, collection.create_index.call_count)
+        records = collection.insert_many.call_args[0][0]
+        self.assertEqual(
+            [(1, "2")],
+            [(record["WP_page_id"], record["target"]) for record in records]
+        )
+        self.assertEqual(1, collection.insert_many.call_count)
+        return
+
+    def test_report(self):
+        """Test skipped pages and per-record errors."""
+        buffer_ = self.wpmongo._get_buffer("article", replace=True)
+        details = {
+            "writeErrors": [
+                {"index": 0, "code": 11000, "errmsg": "duplicate key"},
+                {"index": 2, "code": 121, "errmsg": "validation failed"}
+            ],
+            "nInserted": 0, "nUpserted": 1, "nMatched": 0
+        }
+        self.wpmongo._report("article", buffer_, self.records, details)
+        self.assertEqual((1, 1), (self.wpmongo.skipped, self.wpmongo.errors))
+        buffer_ = self.wpmongo._get_buffer("IWL")
+        details["nUpserted"] = 0
+        details["nInserted"] = 1
+        self.wpmongo._report("IWL", buffer_, self.records, details)
+        self.assertEqual((1, 3), (self.wpmongo.skipped, self.wpmongo.errors))
+        return
+
+
+class TestClientOptions(unittest.TestCase):
+    """Test client options."""
+
+    def test_client_options(self):
+        """Test client options read from config."""
+        config = configparser.ConfigParser(allow_no_value=True)
+        config.read_string(
+            "[mongoDB]\nmax_pool_size=4\ncompressors=zlib\n"
+            "zlib_compression_level=\nsocket_timeout=60000\n"
+        )
+        options = src.wpmongo.get_client_options(config["mongoDB"])
+        self.assertEqual(
+            {
+                "maxPoolSize": 4, "compressors": "zlib",
+                "socketTimeoutMS": 60000
+            },
+            options
+        )
+        wpmongo = src.wpmongo.WPMongo(
+            0, "test", "localhost", 27017, client_options=options
+        )
+        try:
+            self.assertEqual(
+                4, wpmongo.client.options.pool_options.max_pool_size
+            )
+        finally:
+            wpmongo.client.close()
+        return
+
+
+class TestRetry(unittest.TestCase):
+    """Test retries and dead-letter spooling (without connecting to
+    mongoDB)."""
+
+    def setUp(self):
+        """Set up mongoDB interface (connects lazily)."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.wpmongo = src.wpmongo.WPMongo(
+            0, "test", "localhost", 27017,
+            max_retries=2, dead_letter=self.directory.name
+        )
+        self.wpmongo.RETRY_DELAY = 0
+        return
+
+    def tearDown(self):
+        """Close client, remove dead-letter directory."""
+        self.wpmongo.client.close()
+        self.directory.cleanup()
+        return
+
+    def test_retryable(self):
+        """Test transient errors."""
+        self.assertTrue(
+            src.wpmongo._is_retryable(pymongo.errors.NotPrimaryError("foo"))
+        )
+        self.assertTrue(
+            src.wpmongo._is_retryable(
+                pymongo.errors.OperationFailure(
+                    "foo", details={"errorLabels": ["RetryableWriteError"]}
+                )
+            )
+        )
+        self.assertFalse(
+            src.wpmongo._is_retryable(pymongo.errors.OperationFailure("foo"))
+        )
+        return
+
+    def test_retry(self):
+        """Test retrying transient errors."""
+        attempts = []
+
+        def operation(attempt, succeed=2):
+            attempts.append(attempt)
+            if attempt < succeed:
+                raise pymongo.errors.AutoReconnect("foo")
+            return attempt
+        self.assertEqual(2, self.wpmongo._retry(operation))
+        attempts.clear()
+        self.assertRaises(
+            pymongo.errors.AutoReconnect,
+            self.wpmongo._retry, lambda attempt: operation(attempt, succeed=3)
+        )
+        self.assertEqual([0, 1, 2], attempts)
+        return
+
+    def test_spool(self):
+        """Test spooling records to dead-letter file."""
+        records = [
+            bson.raw_bson.RawBSONDocument(bson.encode({"_id": i}))
+            for i in range(3)
+        ]
+        self.wpmongo._spool("IWL", records[:2])
+        self.wpmongo._spool("IWL", records[2:])
+        names = os.listdir(self.directory.name)
+        self.assertEqual(1, len(names))
+        self.assertRegex(names[0], r"^IWL\.0\.\d+\.[0-9a-f]{8}\.bson$")
+        path = os.path.join(self.directory.name, names[0])
+        with open(path, "rb") as file_:
+            self.assertEqual(
+                [{"_id": i} for i in range(3)],
+                list(bson.decode_file_iter(file_))
+            )
+        self.assertEqual(3, self.wpmongo.spooled)
+        return
+
+    def _replay(self, write_errors, inserted):
+        """Replay spooled records with a mocked collection.
+
+        :param list write_errors: write errors of the bulk write
+        :param int inserted: number of records inserted by the bulk write
+
+        :returns: number of records written and mocked collection
+        :rtype: tuple
+        """
+        records = [
+            bson.raw_bson.RawBSONDocument(bson.encode({"_id": i}))
+            for i in range(3)
+        ]
+        self.wpmongo._spool("IWL", records)
+        collection = unittest.mock.MagicMock()
+        collection.insert_many.side_effect = pymongo.errors.BulkWriteError(
+            {
+                "writeErrors": write_errors,
+                "nInserted": inserted, "nUpserted": 0, "nMatched": 0
+            }
+        )
+        with unittest.mock.patch.object(
+                self.wpmongo, "_get_collection", return_value=collection
+        ):
+            return self.wpmongo.replay(), collection
+
+    def test_replay_00(self):
+        """Test spooling rejected records to a new dead-letter file."""
+        written, collection = self._replay(
+            [{"index": 1, "code": 121, "errmsg": "validation failed"}], 2
+        )
+        self.assertEqual(2, written)
+        self.assertFalse(collection.insert_many.call_args[1]["ordered"])
+        names = os.listdir(self.directory.name)
+        self.assertEqual(1, len(names))
+        path = os.path.join(self.directory.name, names[0])
+        with open(path, "rb") as file_:
+            self.assertEqual(
+                [{"_id": 1}], list(bson.decode_file_iter(file_))
+            )
+        self.assertEqual((1, 4), (self.wpmongo.errors, self.wpmongo.spooled))
+        return
+
+    def test_replay_01(self):
+        """Test replaying records partly stored before they were spooled."""
+        written, _ = self._replay(
+            [{"index": 0, "code": 11000, "errmsg": "duplicate key"}], 2
+        )
+        self.assertEqual(2, written)
+        self.assertEqual([], os.listdir(self.directory.name))
+        self.assertEqual((0, 3), (self.wpmongo.errors, self.wpmongo.spooled))
+        return
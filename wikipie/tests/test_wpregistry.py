@@ -0,0 +1,129 @@
+#    This file is part of WikiPie.
+#    Copyright (C) 2017  Carine Dengler, Heidelberg University (DBS)
+#
+#    WikiPie is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+:synopsis: Test template registry.
+"""
+
+
+# standard library imports
+import os
+import tempfile
+import unittest
+
+# third party imports
+
+# library specific imports
+import src.wppage
+import src.wpregistry
+import src.wplocalization
+
+
+# templates (title, redirect, text)
+TEMPLATES = [
+    ("Template:Infobox person", "", "{{{name}}} ({{{ birth_date |}}})"),
+    ("Template:Infobox_person", "", "{{{name}}} {{{1}}} {{{name}}}"),
+    ("Template:Infobox human", "Template:Infobox person", ""),
+    ("Template:Loop", "Template:loop", "")
+]
+
+
+class TestWPRegistry(unittest.TestCase):
+    """Test template registry."""
+
+    def setUp(self):
+        """Set up template registry."""
+        self.registry = src.wpregistry.TemplateRegistry()
+        for i, (title, redirect, text) in enumerate(TEMPLATES):
+            self.registry.register(
+                src.wppage.Template(title, str(i), redirect, str(i), text)
+            )
+        return
+
+    def test_canonical_title(self):
+        """Test canonical titles."""
+        self.assertEqual(
+            "Template:Infobox person",
+            src.wpregistry.get_canonical_title(" Template : infobox__person")
+        )
+        self.assertEqual(
+            "Template:A:b", src.wpregistry.get_canonical_title("Template:a:b")
+        )
+        return
+
+    def test_canonical_title_01(self):
+        """Test canonical titles (localization profile)."""
+        localization = src.wplocalization.LocalizationProfile(
+            siteinfo={
+                "namespaces": {
+                    "10": {"name": "Modèle", "case": "case-sensitive"}
+                }
+            }
+        )
+        for title in ("Template:foo bar", "template:foo_bar", "Modèle:foo"):
+            self.assertEqual(
+                "Modèle:" + title.partition(":")[2].replace("_", " "),
+                src.wpregistry.get_canonical_title(
+                    title, localization=localization
+                )
+            )
+        self.assertEqual(
+            "Template:Foo", src.wpregistry.get_canonical_title("template:foo")
+        )
+        self.assertEqual(
+            "Wikipedia:foo",
+            src.wpregistry.get_canonical_title(
+                "Wikipedia:foo", localization=localization
+            )
+        )
+        registry = src.wpregistry.TemplateRegistry(localization=localization)
+        registry.register(
+            src.wppage.Template("Template:foo", "0", "Modèle:Bar", "0", "")
+        )
+        registry.register(src.wppage.Template("Modèle:Bar", "1", "", "1", ""))
+        self.assertEqual("Modèle:Bar", registry.resolve("Modèle:foo"))
+        self.assertIsNone(registry.resolve("Modèle:Foo"))
+        return
+
+    def test_register(self):
+        """Test registering templates."""
+        self.assertEqual(3, len(self.registry))
+        self.assertIn("Template:infobox person", self.registry)
+        self.assertEqual(
+            ("name", "1"),
+            self.registry.get_params("Template:Infobox person")
+        )
+        return
+
+    def test_resolve(self):
+        """Test resolving redirects."""
+        self.assertEqual(
+            "Template:Infobox person",
+            self.registry.resolve("Template:infobox_human")
+        )
+        self.assertIsNone(self.registry.resolve("Template:Loop"))
+        self.assertIsNone(self.registry.resolve("Template:Qux"))
+        return
+
+    def test_persistence(self):
+        """Test saving and loading template registry."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "registry.json")
+            self.registry.save(path)
+            registry = src.wpregistry.TemplateRegistry.load(path)
+        self.assertEqual(self.registry.templates, registry.templates)
+        return